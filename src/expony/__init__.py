@@ -1,2 +1,32 @@
+'''
+Experiments with expony game boards.
+
+The core engine (data, funcs, arr, geometry, tiling, box, hex, ...) needs only
+numpy.  The front-ends gui and autogui need pygame and the gpu backend needs
+torch.  Importing expony loads no submodule, each is imported on first access
+as an attribute, eg expony.arr.Board.
+'''
+import importlib
+
+_submodules = (
+    "animate", "arr", "autogui", "autoplay", "bench", "board", "box", "cli",
+    "corpus", "dashboard", "data", "frames", "funcs", "geometry", "gpu", "gui",
+    "heatmap", "hex", "instrument", "loadgen", "log", "patch", "render",
+    "replay", "server", "sim", "stable", "stats", "sweep", "tiling", "trace",
+    "workers",
+)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
+
+
 def main() -> None:
-    print("Hello from expony!")
+    from .cli import main as cli
+    cli()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+'''
+Frame-paced animation of the stages of moves.
+
+An Animator holds the board values on display and a queue of later stages.
+A front-end pushes the stages of each move as they are computed and, once per
+frame, asks for the tiles to draw at that time.  Tiles that move between two
+stages are interpolated from their source to their destination over the stage
+time, other tiles change value when the stage completes.  Nothing blocks.
+
+When stages queue up faster than they play, each stage is shortened and a long
+backlog is skipped to the latest stage.
+
+This needs no GUI toolkit.  Times are in seconds from any monotonic clock.
+'''
+from collections import deque
+import numpy
+from .geometry import gravity, gravity_moves
+
+
+def motion(before, after):
+    '''
+    Return a dict mapping destination to source (row,col) of tiles that move
+    going from the before to the after 2D arrays of values.
+
+    Two adjacent tiles exchanging values are a swap.  Otherwise zero values in
+    before are holes that the tiles above fall into, with new tiles falling in
+    from above the board (negative source rows).  Other changes have no motion.
+    '''
+    before = numpy.asarray(before)
+    after = numpy.asarray(after)
+    rows, cols = numpy.nonzero(before != after)
+    if len(rows) == 0:
+        return dict()
+
+    if len(rows) == 2:
+        a, b = (int(rows[0]), int(cols[0])), (int(rows[1]), int(cols[1]))
+        if abs(a[0]-b[0]) + abs(a[1]-b[1]) == 1 \
+           and before[a] == after[b] and before[b] == after[a]:
+            return {a: b, b: a}
+
+    holes = zip(*numpy.nonzero(before == 0))
+    return gravity_moves(gravity(before.shape, list(holes)))
+
+
+def ease(frac):
+    '''
+    Smooth step from 0 to 1.
+    '''
+    return frac * frac * (3 - 2 * frac)
+
+
+class Animator:
+    '''
+    Schedule the display of stages of board values.
+    '''
+
+    def __init__(self, values, stage_time=0.1, max_queue=4, max_backlog=32):
+        '''
+        Start showing values.
+
+        Each stage plays over stage_time seconds, shortened in proportion when
+        more than max_queue stages wait.  With more than max_backlog waiting
+        the display skips to the latest.
+        '''
+        self.stage_time = stage_time
+        self.max_queue = max_queue
+        self.max_backlog = max_backlog
+        self.reset(values)
+
+    def reset(self, values):
+        '''
+        Drop all stages and show values now.
+        '''
+        self.shown = numpy.array(values)
+        self.queue = deque()
+        self._step = None
+
+    @property
+    def busy(self):
+        return bool(self._step or self.queue)
+
+    @property
+    def latest(self):
+        '''
+        The values of the last pushed stage.
+        '''
+        if self.queue:
+            return self.queue[-1][0]
+        if self._step:
+            return self._step[0]
+        return self.shown
+
+    def push(self, values, moves=None):
+        '''
+        Queue a stage of values.
+
+        The moves map destination to source positions relative to the previous
+        stage and by default are found by motion().  A backend that reports
+        the Gravity of a stage can give geometry.gravity_moves() of it.
+        '''
+        values = numpy.array(values)
+        if moves is None:
+            moves = motion(self.latest, values)
+        self.queue.append((values, moves))
+
+    def advance(self, now):
+        '''
+        Finish stages that are over at time now and start the next.
+
+        Return the fraction of the current stage that is done, None if idle.
+        '''
+        if len(self.queue) > self.max_backlog:
+            self.reset(self.queue[-1][0])
+            return None
+        while True:
+            if self._step is None:
+                if not self.queue:
+                    return None
+                values, moves = self.queue.popleft()
+                duration = self.stage_time
+                if len(self.queue) > self.max_queue:
+                    duration *= self.max_queue / len(self.queue)
+                if not moves:
+                    # nothing to interpolate, show it for a frame at least
+                    self.shown = values
+                    duration = min(duration, self.stage_time / 2)
+                self._step = (values, moves, now, duration)
+            values, moves, start, duration = self._step
+            if duration > 0 and now < start + duration:
+                return (now - start) / duration
+            self.shown = values
+            self._step = None
+
+    def frame(self, now):
+        '''
+        Return (tiles, moving) to draw at time now.
+
+        The tiles are a list of (pos, (row,col), value) with the (row,col)
+        fractional tile coordinates at which to draw the tile of pos.  The
+        moving is the set of positions that a moving tile passes over and so
+        need their background cleared.
+        '''
+        frac = self.advance(now)
+        nrows, ncols = self.shown.shape
+        moves = dict()
+        values = self.shown
+        if frac is not None:
+            values, moves, _, _ = self._step
+            frac = ease(frac)
+
+        tiles = list()
+        moving = set()
+        for row in range(nrows):
+            for col in range(ncols):
+                pos = (row, col)
+                src = moves.get(pos)
+                if src is None:
+                    tiles.append((pos, pos, int(self.shown[pos])))
+                    continue
+                at = (src[0] + (row - src[0]) * frac,
+                      src[1] + (col - src[1]) * frac)
+                tiles.append((pos, at, int(values[pos])))
+                for r in range(max(0, min(src[0], row)), max(src[0], row) + 1):
+                    for c in range(min(src[1], col), max(src[1], col) + 1):
+                        moving.add((r, c))
+        return tiles, moving
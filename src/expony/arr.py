@@ -11,14 +11,15 @@ This implementation differs from the list-based:
 import numpy
 from typing import List, Generator
 from .data import Position, Matched, adjacent, Move
-from itertools import product
+from .geometry import geometry, gravity, Gravity
 from collections import defaultdict
 from time import time
 
 def positions(shape):
-    pos = list(product(range(shape[0]), range(shape[1])))
-    pos.sort(key=lambda x: x[1])
-    return pos
+    '''
+    Return the shared, column-major positions for the shape.
+    '''
+    return geometry(shape).hint_order
 
 
 class Board:
@@ -32,15 +33,22 @@ class Board:
     # The default shape of the board.
     default_shape = (8,8)
 
-    def __init__(self, source, random_seed=None):
+    def __init__(self, source, random_seed=None, fresh=None):
         '''
         Construct from size, shape, tile array or board object.
+
+        If fresh is a tiling.FreshStream, all random values are drawn from it
+        instead of from a numpy generator seeded with random_seed.  This makes
+        a game reproducible by any backend drawing from the same stream.
         '''
+        if fresh is not None and random_seed is None:
+            random_seed = fresh.seed
         if random_seed is None:
             random_seed = numpy.random.randint(0, 2**31)
         self.random_seed = random_seed
 
         self.rng = numpy.random.default_rng(random_seed)
+        self.fresh = fresh
 
         if source is None:
             source = self.default_shape
@@ -63,6 +71,8 @@ class Board:
         if isinstance(source, Board): # copy
             self.tiles = numpy.copy(source.tiles)
             self.rng.bit_generator.state = source.rng.bit_generator.state
+            if source.fresh is not None:
+                self.fresh = source.fresh.clone()
             self.all_positions = positions(self.tiles.shape)
             return
 
@@ -82,14 +92,8 @@ class Board:
         each cardinal direction.  The directions are the dictionary keys are
         "up", "down", "left", "right".
         '''
-        row,col = pos
-        nrows,ncols = self.tiles.shape
-        return dict(
-            up =  ((r,col) for r in range(row-1,-1,-1)),
-            down= ((r,col) for r in range(row+1,nrows)),
-            left= ((row,c) for c in range(col-1,-1,-1)),
-            right=((row,c) for c in range(col+1,ncols))
-        )
+        right, up, left, down = geometry(self.tiles.shape).radii[pos]
+        return dict(up=up, down=down, left=left, right=right)
 
     def matched(self, seed: Position) -> Matched:
         '''
@@ -137,6 +141,11 @@ class Board:
         return ret
 
     def randint(self, vmin, vmax, shape=None):
+        if self.fresh is not None:
+            if shape is None:
+                return self.fresh.integer(vmin, vmax-1)
+            r = self.fresh.integers(vmin, vmax-1, numpy.prod(shape, dtype=int))
+            return r.reshape(shape)
         r = self.rng.integers(vmin, vmax, shape)
         return r
 
@@ -170,9 +179,12 @@ class Board:
         '''
         self.tiles[seed],self.tiles[targ] = self.tiles[targ],self.tiles[seed]
     
-    def apply_gravity(self, matches: List[Matched]):
+    def apply_gravity(self, matches: List[Matched]) -> Gravity:
         '''
         Move tile values downward as possible. 
+
+        Return the Gravity mapping each position to the row its tile came from
+        and listing the refilled positions.
         '''
 
         if matches and not isinstance(matches[0], Matched):
@@ -182,16 +194,12 @@ class Board:
         for m in matches:
             all_m.update(m.matched)
 
-        for col in range(self.tiles.shape[1]):
-            nempty_below = 0
-            for row in range(self.tiles.shape[0]-1, -1, -1):
-                if (row,col) in all_m:
-                    nempty_below += 1
-                    continue
-                self.tiles[row+nempty_below, col] = self.tiles[row, col]
-            # fill in
-            for row in range(nempty_below):
-                self.set_random((row,col))
+        grav = gravity(self.tiles.shape, all_m)
+        self.tiles[:] = numpy.take_along_axis(self.tiles,
+                                              grav.sources.clip(min=0), axis=0)
+        for pos in grav.refilled:
+            self.set_random(pos)
+        return grav
 
     def unique_new_matches(self) -> List[Matched]:
         match_values = sorted(self.all_matches(),
@@ -1,12 +1,16 @@
 import pygame
 import sys
-import expony.funcs 
+import logging
+import numpy
 from expony.gui import Frame
-from expony.arr import Board as ArrayBoard
+from expony.render import TileRenderer
+from expony.sim import Simulation
+
+log = logging.getLogger(__name__)
 
 CLOCK_TICK=60
 
-pygame.init()
+# Set by main after pygame.init().  Importing this module does not touch SDL.
 screen = None
 
 
@@ -21,29 +25,19 @@ class Board:
 
         self.shape = shape
         self.random_seed = random_seed
-        self.delay_ms = 0
+        self.renderer = TileRenderer(self.tile_shape_pix)
 
         self.reset()
 
     def reset(self):
-
+        '''
+        Forget the shown game until the next snapshot.
+        '''
         self.game_over = False
-        self.eboard = ArrayBoard(self.shape, random_seed=self.random_seed)
-        self.eboard.assure_stable()
+        self.tiles = None
+        self.game_seed = None
         self.total_points = 0
         self.nturns = 0
-        # holds a selected position
-        self.seed_pos = None
-
-
-    def faster(self):
-        self.delay_ms = int(self.delay_ms*0.9)
-        print(f'delay {self.delay_ms} ms')
-    def slower(self):
-        if self.delay_ms == 0:
-            self.delay_ms = 10;
-        self.delay_ms = int(self.delay_ms*1.1)
-        print(f'delay {self.delay_ms} ms')        
 
 
     def pix2pos(self, pix):
@@ -62,182 +56,143 @@ class Board:
                pos[0]*self.tile_shape_pix[1])
         return self.frame.local_to_global(pix)
 
-    def draw_board(self):
-        screen.fill((0, 0, 0))
-        for pos in self.eboard.all_positions:
-            self.draw_tile(pos)
-        pygame.display.flip()
+    def draw_board(self, full=False):
+        '''
+        Draw tiles that changed since the last draw, or all if full.
+        '''
+        if full:
+            screen.fill((0, 0, 0))
+            self.renderer.invalidate()
+        if self.tiles is None:
+            return
+        tiles = ((pos, self.pos2pix(pos), int(value), self.tile_state(pos))
+                 for pos, value in numpy.ndenumerate(self.tiles))
+        dirty = self.renderer.draw(screen, tiles)
+        if full:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
 
     def draw_end(self):
-        font = pygame.font.Font(None, 2*36)
         msg = f'{self.total_points} points / {self.nturns} moves'
-        print(f'{msg}, seed: {self.eboard.random_seed}')
-        text = font.render(msg, True, (0,255,0))
-        text_rect = text.get_rect(center=self.frame.center)
-        screen.blit(text, text_rect)
-        pygame.display.flip()
-
-
-    def draw_tile(self, pos):
-        pix = self.pos2pix(pos)
-        value = self.eboard[pos]
-
-        tile_colors = [
-            '#000000', # black               0 
-            '#0A9396', # Dark cyan           1/2
-            '#E9D8A6', # Beige               2/4
-            '#EE9B00', # Yellowish orange    3/8
-            '#CA6702', # Browny orange       4/16
-            '#005F73', # Petrol              5/32
-            '#AE2012', # Deep red            6/64  
-            '#86350F', # Reddish brown       7/128 
-            '#94D2BD', # Pale teal           8/256 
-            '#FF8080', # Salmon pink         9/512 
-            '#FFCC80', # Wheat              10/1024
-            '#E6FF80', # Light yellow green 11/2048
-            '#99FF80', # Light green        12/4096
-            '#80FFB3', #                    13/8096
-        ]
-        color = tile_colors[value]
-        font_color = (255, 255, 255)
-        if value in (2, 8, 9, 10, 11, 12, 13):
-            font_color = (0, 0, 0) # black
-        
-        border_color = (255, 255, 255)  # default tile color
-        if self.seed_pos == pos:
-            border_color = (0, 0, 0)
-        if self.game_over:
-            border_color = (255, 0, 0)
-
-        rect = (pix[0], pix[1], self.tile_shape_pix[0], self.tile_shape_pix[1])
-        center = (rect[0] + rect[2]//2, rect[1] + rect[3]//2)
+        log.info("game over", extra=dict(points=self.total_points,
+                                         moves=self.nturns,
+                                         seed=self.game_seed))
+        rect = self.renderer.text(screen, msg, self.frame.center)
+        pygame.display.update(rect)
 
-        points = 2**value 
-
-        pygame.draw.rect(screen, color, rect)
-        if value:
-            font = pygame.font.Font(None, 36) # fixme, make dependent on tile_size
-            text = font.render(str(points), True, font_color)
-            text_rect = text.get_rect(center=center)
-            screen.blit(text, text_rect)
-        pygame.draw.rect(screen, border_color, rect, 10)
+    def tile_state(self, pos):
+        if self.game_over:
+            return "over"
+        return "normal"
 
 
-    def do_move(self, seed, targ):
-        points = self.eboard.maybe_swap(seed, targ)
-        if points == 0:
-            return 0
-        self.nturns += 1
-        self.total_points += points
+    def show(self, snap):
+        '''
+        Draw a Simulation snapshot.
+        '''
+        self.tiles = snap.tiles
+        self.game_seed = snap.random_seed
+        self.total_points = snap.total_points
+        self.nturns = snap.nturns
+        self.game_over = snap.game_over
         self.draw_board()
+        if self.game_over:
+            self.draw_end()
 
-    def handle_event(self, event):
-        # print(f"handle event: {event}")
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-
-        if event.type == pygame.MOUSEBUTTONDOWN:
+from pygame.locals import K_q, K_r, K_f, K_s, K_p, K_n, K_SPACE
 
-            pix = event.pos
-            pos = self.pix2pos(pix)
-            print(f'{pix=} {pos=} {event.type}')
+class AutoGui:
+    '''
+    Show a game played on a background Simulation.
 
-            if self.seed_pos is None:
-                print(f'down: set seed tile at {pos}')
-                self.seed_pos = pos
-                self.draw_board()
-                return
+    The display samples the latest snapshot each frame.  Keys: q quit, r new
+    game, space or p pause, n step one move, f faster, s slower.
+    '''
+    def __init__(self, board, sim=None):
+        self.board = board
+        self.sim = sim or Simulation(board.shape, board.random_seed)
 
-            if self.seed_pos == pos:
-                print(f'down: unseed tile at {pos}')
-                self.seed_pos = None
-                self.draw_board()
-                return
+    def run(self):
+        self.clock = pygame.time.Clock()
+        if not self.sim.is_alive():
+            self.sim.start()
+        seq = None
+        try:
+            while True:
+                for event in pygame.event.get():
+                    if self.handle_event(event) is False:
+                        return
+                snap = self.sim.snapshot()
+                if snap.seq != seq:
+                    seq = snap.seq
+                    self.board.show(snap)
+                self.clock.tick(CLOCK_TICK)
+        finally:
+            self.sim.stop()
 
+    def handle_event(self, event):
+        '''
+        Handle one event, return False to quit.
+        '''
+        if event.type == pygame.QUIT:
+            return False
+        if event.type in [
+                pygame.WINDOWSHOWN,
+                pygame.WINDOWEXPOSED,
+        ]:
+            self.board.draw_board(full=True)
             return
-
-        if event.type == pygame.MOUSEBUTTONUP:
-            
-            pix = event.pos
-            pos = self.pix2pos(pix)
-            print(f'{pix=} {pos=} {event.type}')
-
-            if self.seed_pos is None:
-                print(f'up: no seed at {pos}')
-                return
-
-            if self.seed_pos == pos:
-                print(f'up: on seed at {pos}')
-                return
-
-            seed_pos = self.seed_pos
-            self.seed_pos = None
-            print(f'up: at other pos: {seed_pos} -> {pos}')
-            bps = expony.funcs.maybe_swap(self.eboard, seed_pos, pos)
-            if not bps:
-                print(f'up: illegal move {seed_pos} -> {pos}')
-                return
-            self.nturns += 1
-
-            self.draw_board()
-            for bp in bps:
-                print(f'points: {self.total_points} + {bp.points}')
-                self.total_points += bp.points
-                self.eboard = bp.board
-
-                if self.delay_ms:
-                    pygame.time.delay(self.delay_ms)
-
-                self.draw_board()
-
-            self.seed_pos = None
-            print('New board state after move')
-
-            self.draw_board()
+        if event.type != pygame.KEYUP:
             return
-
-from pygame.locals import K_q, K_r, K_f, K_s
-
-class AutoGui:
-    def __init__(self, board):
-        self.board = board
-    def run(self):
-        self.clock = pygame.time.Clock()
-        while True:
-            move = self.board.eboard.automove_hint()
-            if not move:
-                self.board.game_over = True
-                self.board.draw_board()
-                self.board.draw_end()
-                break
-            self.board.do_move(*move)
-            pygame.event.pump()
-
-        while True:
-            event = pygame.event.wait()
-
-            if event.type in [
-                    pygame.KEYUP,
-            ]:
-                if event.key == K_q:
-                    return
-
-                if event.key == K_r:
-                    self.board.reset()
-                    self.board.draw_board()
-                    return self.run()
+        if event.key == K_q:
+            return False
+        if event.key == K_r:
+            self.board.reset()
+            self.sim.reset(self.board.random_seed)
+        elif event.key in (K_SPACE, K_p):
+            self.sim.toggle()
+        elif event.key == K_n:
+            self.sim.step()
+        elif event.key == K_f:
+            self.sim.faster()
+        elif event.key == K_s:
+            self.sim.slower()
 
 
 if '__main__' == __name__:
+    import argparse
+    parser = argparse.ArgumentParser(description="Watch an autoplay game")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="moves per second, default is as fast as possible")
+    parser.add_argument("--trace", default=None,
+                        help="write a Chrome trace-event JSON timeline to file")
+    parser.add_argument("--trace-capacity", type=int, default=1000000,
+                        help="maximum number of trace spans kept")
+    args = parser.parse_args()
+
     tsize = 8
     bsize = 800
 
     shape = (tsize, tsize)
     screen_size = (bsize, bsize)
 
+    from expony.log import configure_from_env
+    configure_from_env()
+    pygame.init()
     screen = pygame.display.set_mode(screen_size)
 
     board = Board(Frame(pygame.Rect(0,0,*screen_size)), shape)
-    gui = AutoGui(board)
-    gui.run()
+    gui = AutoGui(board, Simulation(shape, speed=args.speed))
+    if not args.trace:
+        gui.run()
+        sys.exit(0)
+
+    from expony.trace import Tracer
+    tracer = Tracer(args.trace_capacity)
+    try:
+        with tracer:
+            gui.run()
+    finally:
+        tracer.save(args.trace)
+        print(f'wrote {len(tracer.events)} spans to {args.trace}')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+'''
+Headless autoplay of many games.
+
+A game is played on an arr.Board by a named strategy until no legal move
+remains.  A game is deterministic given its shape, seed and strategy.  This
+module does not depend on any GUI.
+'''
+import os
+import multiprocessing
+from time import time
+import numpy
+
+from .arr import Board
+
+
+def hint_strategy(board, rng):
+    '''
+    The autoplay hint: the first legal move in column-major order.
+    '''
+    return board.automove_hint()
+
+
+def greedy_strategy(board, rng):
+    '''
+    The legal move giving the most points, ties to the first.
+    '''
+    best = None
+    for move in board.possible_moves():
+        if best is None or move.points > best.points:
+            best = move
+    if best is None:
+        return
+    return (best.seed, best.targ)
+
+
+def random_strategy(board, rng):
+    '''
+    A legal move chosen uniformly at random.
+    '''
+    moves = list()
+    for seed in board.all_positions:
+        row, col = seed
+        for targ in [(row-1, col), (row, col-1)]:
+            if targ[0] < 0 or targ[1] < 0:
+                continue
+            if board.can_swap(seed, targ):
+                moves.append((seed, targ))
+    if not moves:
+        return
+    return moves[rng.integers(len(moves))]
+
+
+strategies = dict(
+    hint = hint_strategy,
+    greedy = greedy_strategy,
+    random = random_strategy,
+)
+
+
+def play(seed, shape=Board.default_shape, strategy="hint", max_moves=None):
+    '''
+    Play one game and return a dict summarizing it.
+
+    The dict has keys: seed, shape, strategy, score, max_value (of a tile),
+    max_tile (2**max_value), moves and time (seconds).
+    '''
+    choose = strategies[strategy]
+    start = time()
+    board = Board(tuple(shape), random_seed=seed)
+    rng = numpy.random.default_rng(seed)
+    score = 0
+    nmoves = 0
+    while max_moves is None or nmoves < max_moves:
+        move = choose(board, rng)
+        if not move:
+            break
+        score += int(board.maybe_swap(*move))
+        nmoves += 1
+    max_value = int(board.tiles.max())
+    return dict(seed=seed, shape=list(board.tiles.shape), strategy=strategy,
+                score=score, max_value=max_value, max_tile=2**max_value,
+                moves=nmoves, time=time() - start)
+
+
+def _play_args(args):
+    return play(*args)
+
+
+def play_many(seeds, shape=Board.default_shape, strategy="hint", jobs=1):
+    '''
+    Generate the summary dicts of playing a game for each seed.
+
+    With jobs larger than one, games are played over a pool of that many
+    processes and dicts are generated in the order that games finish.  A jobs
+    of zero uses one process per CPU.
+    '''
+    if strategy not in strategies:
+        raise ValueError(f'unknown strategy: {strategy}')
+    if jobs == 0:
+        jobs = os.cpu_count()
+    args = ((seed, tuple(shape), strategy) for seed in seeds)
+    if jobs <= 1:
+        yield from map(_play_args, args)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap_unordered(_play_args, args)
@@ -0,0 +1,549 @@
+#!/usr/bin/env python
+'''
+Throughput benchmarks of the expony engines.
+
+Run as:
+
+  python -m expony.bench --output bench.json
+  python -m expony.bench --baseline bench.json --tolerance 0.25
+
+Each backend provides the same set of operations on a board made from a fixed
+seed:
+
+- clone :: copy the board.
+- matched :: one matched() call, averaged over all positions.
+- all_matches :: scan the whole board for matches.
+- gravity :: clone then apply gravity to a line of three doomed tiles.
+- cascade :: clone then make the first legal move, including all combos.
+- hint :: scan for the first legal move.
+- moves :: scan for all legal moves and their resulting boards.
+
+Operations marked "clone then" include the cost of a clone.  In addition
+"autoplay" plays whole games with the first legal move and gives games/s and
+moves/s.
+
+With --corpus, the arr and box backends are also timed on each bucket of
+positions in a corpus (see expony.corpus) with the ops matched (all positions),
+existing_matches, apply_gravity (clone then gravity of the hint move matches),
+possible_moves and automove_hint.  These are keyed by
+"backend/corpus/bucket/op" and give seconds per position.
+
+With --imports, the time to import each of a few modules in a fresh
+interpreter is keyed by "import/module" along with the heavy optional modules
+(pygame, torch) that it loaded.
+
+Results are keyed by "backend/RxC/op" and hold "seconds" per call.  With a
+baseline, an op that is slower than the baseline by more than the tolerance
+fraction is a regression and the exit code is non-zero.
+'''
+import os
+import sys
+import json
+import random
+import platform
+import argparse
+import contextlib
+import subprocess
+from time import perf_counter
+
+import numpy
+
+from .data import Matched
+
+
+def _middle_line(shape):
+    row, col = shape[0]//2, shape[1]//2 - 1
+    return (row, col), [(row, col+1), (row, col+2)]
+
+
+def arr_ops(shape, seed):
+    from .arr import Board
+    board = Board(shape, random_seed=seed)
+    origin, others = _middle_line(shape)
+    doomed = [Matched(board[origin], origin, others)]
+    move = board.automove_hint()
+
+    def matched():
+        for pos in board.all_positions:
+            board.matched(pos)
+
+    def gravity():
+        Board(board).apply_gravity(doomed)
+
+    def cascade():
+        Board(board).maybe_swap(*move)
+
+    ops = dict(clone=lambda: Board(board),
+               matched=matched,
+               all_matches=board.all_matches,
+               gravity=gravity,
+               cascade=cascade,
+               hint=board.automove_hint,
+               moves=lambda: list(board.possible_moves()))
+    return ops, len(board.all_positions)
+
+
+def gpu_ops(shape, seed):
+    from .gpu import Board
+    board = Board(shape, random_seed=seed)
+    origin, others = _middle_line(shape)
+    doomed = [Matched(board.tiles[origin], origin, others)]
+    move = board.automove_hint()
+
+    def matched():
+        for pos in board.all_positions:
+            board.matched(pos)
+
+    def gravity():
+        Board(board).apply_gravity(doomed)
+
+    def cascade():
+        Board(board).maybe_swap(*move)
+
+    ops = dict(clone=lambda: Board(board),
+               matched=matched,
+               all_matches=board.all_matches,
+               gravity=gravity,
+               cascade=cascade,
+               hint=board.automove_hint,
+               moves=lambda: list(board.possible_moves()))
+    return ops, len(board.all_positions)
+
+
+def data_ops(shape, seed):
+    from .data import Board
+    from . import funcs
+    board = Board(shape, random_seed=seed)
+    origin, others = _middle_line(shape)
+    doomed = [Matched(board[origin].value, origin, others)]
+    move = next(funcs.possible_moves(board))
+    positions = list(board.all_positions)
+
+    def matched():
+        for pos in positions:
+            board.matched(pos)
+
+    ops = dict(clone=lambda: Board(board),
+               matched=matched,
+               all_matches=board.all_matches,
+               gravity=lambda: funcs.apply_gravity(board, doomed),
+               cascade=lambda: funcs.maybe_swap(board, move.seed, move.targ),
+               hint=lambda: next(funcs.possible_moves(board)),
+               moves=lambda: list(funcs.possible_moves(board)))
+    return ops, len(positions)
+
+
+def box_first_move(tiling):
+    from .tiling import can_swap
+    for seed, targ in tiling.neighbors():
+        if can_swap(tiling, seed, targ):
+            return (seed, targ)
+
+
+def box_ops(shape, seed):
+    from . import box, tiling
+    fresh = tiling.fresh_values(random.Random(seed))
+    board = box.make(fresh, shape)
+    origin, others = _middle_line(shape)
+    move = box_first_move(board)
+    positions = list(board.positions())
+
+    def matched():
+        for pos in positions:
+            board.matched(pos)
+
+    def gravity():
+        tiling.apply_gravity(board.clone(), others + [origin], fresh)
+
+    def cascade():
+        tiling.apply_swap_inplace(board.clone(), *move, fresh)
+
+    def moves():
+        ret = list()
+        for seed, targ in board.neighbors():
+            clone = board.clone()
+            if tiling.apply_swap_inplace(clone, seed, targ, fresh):
+                ret.append((seed, targ, clone))
+        return ret
+
+    ops = dict(clone=board.clone,
+               matched=matched,
+               all_matches=lambda: tiling.existing_matches(board),
+               gravity=gravity,
+               cascade=cascade,
+               hint=lambda: box_first_move(board),
+               moves=moves)
+    return ops, len(positions)
+
+
+def arr_game(shape, seed):
+    from .arr import Board
+    board = Board(shape, random_seed=seed)
+    nmoves = 0
+    while move := board.automove_hint():
+        board.maybe_swap(*move)
+        nmoves += 1
+    return nmoves
+
+
+def gpu_game(shape, seed):
+    from .gpu import Board
+    board = Board(shape, random_seed=seed)
+    nmoves = 0
+    while move := board.automove_hint():
+        board.maybe_swap(*move)
+        nmoves += 1
+    return nmoves
+
+
+def data_game(shape, seed):
+    from .data import Board
+    from . import funcs
+    board = Board(shape, random_seed=seed)
+    nmoves = 0
+    while move := next(funcs.possible_moves(board), None):
+        board = move.board
+        nmoves += 1
+    return nmoves
+
+
+def box_game(shape, seed):
+    from . import box, tiling
+    fresh = tiling.fresh_values(random.Random(seed))
+    board = box.make(fresh, shape)
+    nmoves = 0
+    while move := box_first_move(board):
+        tiling.apply_swap_inplace(board, *move, fresh)
+        nmoves += 1
+    return nmoves
+
+
+def _hint_matches(board, move, swap, matched):
+    swap(*move)
+    ms = [m for m in (matched(move[0]), matched(move[1])) if m]
+    swap(*move)
+    return ms
+
+
+def arr_corpus_ops(tiles):
+    from .arr import Board
+    boards = [Board(t.astype(int), random_seed=0) for t in tiles]
+    hints = [b.automove_hint() for b in boards]
+    doomed = [_hint_matches(b, h, b.swap, b.matched) if h else []
+              for b, h in zip(boards, hints)]
+
+    def matched():
+        for b in boards:
+            for pos in b.all_positions:
+                b.matched(pos)
+
+    def apply_gravity():
+        for b, d in zip(boards, doomed):
+            Board(b).apply_gravity(d)
+
+    def possible_moves():
+        for b in boards:
+            list(b.possible_moves())
+
+    return dict(matched=matched,
+                existing_matches=lambda: [b.unique_new_matches() for b in boards],
+                apply_gravity=apply_gravity,
+                possible_moves=possible_moves,
+                automove_hint=lambda: [b.automove_hint() for b in boards])
+
+
+def box_corpus_ops(tiles):
+    from . import box, tiling
+    fresh = tiling.fresh_values(random.Random(0))
+    boards = [box.Tiling(t) for t in tiles]
+    doomed = list()
+    for b in boards:
+        move = box_first_move(b)
+        ms = _hint_matches(b, move, b.swap, b.matched) if move else []
+        doomed.append(set(p for m in ms for p in [m.origin] + m.others))
+
+    def matched():
+        for b in boards:
+            for pos in b.positions():
+                b.matched(pos)
+
+    def apply_gravity():
+        for b, d in zip(boards, doomed):
+            tiling.apply_gravity(b.clone(), d, fresh)
+
+    def possible_moves():
+        for b in boards:
+            for seed, targ in b.neighbors():
+                tiling.apply_swap_inplace(b.clone(), seed, targ, fresh)
+
+    return dict(matched=matched,
+                existing_matches=lambda: [tiling.existing_matches(b) for b in boards],
+                apply_gravity=apply_gravity,
+                possible_moves=possible_moves,
+                automove_hint=lambda: [box_first_move(b) for b in boards])
+
+
+corpus_backends = dict(
+    arr = arr_corpus_ops,
+    box = box_corpus_ops,
+)
+
+
+backends = dict(
+    arr = (arr_ops, arr_game),
+    gpu = (gpu_ops, gpu_game),
+    data = (data_ops, data_game),
+    box = (box_ops, box_game),
+)
+
+
+def measure(func, min_time=0.2):
+    '''
+    Return seconds per call of func, calling at least once and for at least
+    min_time seconds.
+    '''
+    ncalls = 0
+    start = perf_counter()
+    while True:
+        func()
+        ncalls += 1
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / ncalls
+
+
+@contextlib.contextmanager
+def _quiet(quiet=True):
+    if not quiet:
+        yield
+        return
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def run(backend_names=("arr", "box"), sizes=(8,), seed=1, games=2,
+        min_time=0.2, ops=None, log=None):
+    '''
+    Run benchmarks and return a results dict.
+
+    The log is a callable given each result key and value as they finish.
+    '''
+    results = dict()
+    for name in backend_names:
+        make_ops, play = backends[name]
+        for size in sizes:
+            shape = (size, size) if isinstance(size, int) else tuple(size)
+            prefix = f'{name}/{shape[0]}x{shape[1]}'
+            with _quiet():
+                try:
+                    board_ops, npos = make_ops(shape, seed)
+                except ImportError as err:
+                    if log:
+                        log(prefix, dict(skipped=str(err)))
+                    continue
+
+            for op, func in board_ops.items():
+                if ops and op not in ops:
+                    continue
+                with _quiet():
+                    sec = measure(func, min_time)
+                if op == "matched":
+                    sec /= npos
+                res = dict(seconds=sec)
+                results[f'{prefix}/{op}'] = res
+                if log:
+                    log(f'{prefix}/{op}', res)
+
+            if games and (not ops or "autoplay" in ops):
+                nmoves = 0
+                start = perf_counter()
+                with _quiet():
+                    for game in range(games):
+                        nmoves += play(shape, seed + game)
+                elapsed = perf_counter() - start
+                res = dict(seconds=elapsed/games,
+                           games_per_s=games/elapsed,
+                           moves_per_s=nmoves/elapsed)
+                results[f'{prefix}/autoplay'] = res
+                if log:
+                    log(f'{prefix}/autoplay', res)
+    return results
+
+
+def run_corpus(corpus, backend_names=("arr", "box"), min_time=0.2,
+               ops=None, log=None):
+    '''
+    Run microbenchmarks on each bucket of a corpus and return results dict.
+    '''
+    results = dict()
+    for name in backend_names:
+        if name not in corpus_backends:
+            continue
+        for bucket, tiles in corpus.items():
+            bucket_ops = corpus_backends[name](tiles)
+            for op, func in bucket_ops.items():
+                if ops and op not in ops:
+                    continue
+                res = dict(seconds=measure(func, min_time) / len(tiles))
+                key = f'{name}/corpus/{bucket}/{op}'
+                results[key] = res
+                if log:
+                    log(key, res)
+    return results
+
+
+import_modules = ("expony", "expony.arr", "expony.box", "expony.autoplay",
+                  "expony.cli", "expony.gui", "expony.gpu")
+heavy_modules = ("pygame", "torch")
+
+
+def import_time(module, repeat=3):
+    '''
+    Return (seconds, heavy) for a fresh interpreter to import module.
+
+    The seconds is the best cumulative time reported by "python -X importtime"
+    and heavy lists the heavy_modules that the import loaded.  An ImportError
+    is raised if the module can not be imported and a ValueError if no time
+    is reported for it, as for a module loaded at interpreter startup.
+    '''
+    code = (f'import sys, {module}; '
+            f'print(",".join(m for m in {heavy_modules!r} if m in sys.modules))')
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              capture_output=True, text=True)
+        if proc.returncode:
+            raise ImportError(proc.stderr.strip().splitlines()[-1])
+        usec = None
+        for line in proc.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                usec = int(fields[1])
+        if usec is None:
+            raise ValueError(f'no import time reported for {module}')
+        # pygame may print a banner before our line
+        last = (proc.stdout.strip().splitlines() or [""])[-1]
+        heavy = [m for m in last.split(",") if m]
+        if best is None or usec < best:
+            best = usec
+    return best * 1e-6, heavy
+
+
+def run_imports(modules=import_modules, log=None):
+    '''
+    Time importing each module in a fresh interpreter and return results dict.
+    '''
+    results = dict()
+    for module in modules:
+        key = f'import/{module}'
+        try:
+            sec, heavy = import_time(module)
+        except (ImportError, ValueError) as err:
+            if log:
+                log(key, dict(skipped=str(err)))
+            continue
+        res = dict(seconds=sec, heavy=heavy)
+        results[key] = res
+        if log:
+            log(key, res)
+    return results
+
+
+def meta():
+    '''
+    Return a dict describing the benchmark environment.
+    '''
+    return dict(python=platform.python_version(),
+                numpy=numpy.__version__,
+                machine=platform.machine(),
+                node=platform.node())
+
+
+def compare(results, baseline, tolerance=0.25):
+    '''
+    Return list of (key, seconds, baseline_seconds) for results slower than
+    the baseline by more than the tolerance fraction.
+    '''
+    base = baseline.get("results", baseline)
+    slow = list()
+    for key, res in sorted(results.items()):
+        if key not in base:
+            continue
+        have, want = res["seconds"], base[key]["seconds"]
+        if have > want * (1 + tolerance):
+            slow.append((key, have, want))
+    return slow
+
+
+def _print_result(key, res):
+    if "skipped" in res:
+        print(f'{key:40s} skipped: {res["skipped"]}')
+        return
+    line = f'{key:40s} {res["seconds"]*1e6:14.1f} us'
+    if "games_per_s" in res:
+        line += f'  {res["games_per_s"]:8.2f} games/s {res["moves_per_s"]:8.1f} moves/s'
+    if res.get("heavy"):
+        line += '  loads ' + ','.join(res["heavy"])
+    print(line, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.bench",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", default="arr,box,data",
+                        help="comma separated backends from: " + ",".join(backends))
+    parser.add_argument("--sizes", default="8",
+                        help="comma separated square board sizes")
+    parser.add_argument("--ops", default=None,
+                        help="comma separated ops, default all")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--games", type=int, default=2,
+                        help="number of autoplay games per backend and size")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="minimum seconds to time each op")
+    parser.add_argument("--corpus", nargs="?", default=None, const="default",
+                        help="also time ops on a corpus of positions, "
+                        "optionally giving its .npz file")
+    parser.add_argument("--imports", action="store_true",
+                        help="also time importing modules in a fresh interpreter")
+    parser.add_argument("--output", default=None,
+                        help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=None,
+                        help="compare to results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional slowdown from baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.backends.split(","),
+                  [int(s) for s in args.sizes.split(",")],
+                  seed=args.seed, games=args.games, min_time=args.min_time,
+                  ops=args.ops.split(",") if args.ops else None,
+                  log=_print_result)
+    if args.corpus:
+        from . import corpus
+        path = corpus.default_path if args.corpus == "default" else args.corpus
+        results.update(run_corpus(corpus.load(path), args.backends.split(","),
+                                  min_time=args.min_time,
+                                  ops=args.ops.split(",") if args.ops else None,
+                                  log=_print_result))
+    if args.imports:
+        results.update(run_imports(log=_print_result))
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(dict(meta=meta(), results=results), fp, indent=1)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as fp:
+        baseline = json.load(fp)
+    slow = compare(results, baseline, args.tolerance)
+    for key, have, want in slow:
+        print(f'REGRESSION {key}: {have*1e6:.1f} us > {want*1e6:.1f} us '
+              f'+{100*args.tolerance:.0f}%')
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+'''
+This module includes an abstract base class Board that maps the opaque
+positions of a tiling.Tiling to and from pixels.
+
+See box and hex for two board implementations.
+'''
+
+from abc import abstractmethod, ABC
+
+
+class Board(ABC):
+    '''
+    A Board places the tiles of a Tiling in a rectangular pixel frame.
+
+    Pixels are in (x,y) order with (0,0) at the upper left.
+    '''
+
+    @property
+    @abstractmethod
+    def tiling(self):
+        '''
+        Return the Tiling of this board.
+        '''
+        pass
+
+    @abstractmethod
+    def set_frame(self, offset, extent):
+        '''
+        Set the pixel offset and extent of the frame holding the tiles.
+        '''
+        pass
+
+    @property
+    @abstractmethod
+    def frame(self):
+        '''
+        Return the pair (offset, extent) of the frame as tuples of pixels.
+        '''
+        pass
+
+    @abstractmethod
+    def position(self, pix):
+        '''
+        Return an opaque tiling position containing the pixel (xpix,ypix).
+        '''
+        pass
+
+    @abstractmethod
+    def pixel(self, pos):
+        '''
+        Return (x,y) pixel at the center of the tile at position.
+        '''
+        pass
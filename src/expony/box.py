@@ -4,12 +4,17 @@ from expony.tiling import (
     Tiling as BaseTiling
 )
 from expony.board import Board as BaseBoard
+from expony.geometry import geometry, matching, gravity, Gravity
 
 import numpy
 value_dtype = numpy.uint8
 
 
 class Tiling(BaseTiling):
+
+    # The geometry.directions giving the match axes of this tiling.
+    kind = "box"
+
     def __init__(self, data, min_match=3):
         '''
         Initialize Box tiling with data.
@@ -27,7 +32,7 @@ class Tiling(BaseTiling):
         '''
         Return a copy of self
         '''
-        return Tiling(self._tiles)
+        return type(self)(self._tiles, self._min_match)
 
     def to_string(self):
         '''
@@ -70,12 +75,20 @@ class Tiling(BaseTiling):
         '''
         Yield all the positions in the tiling.
 
-        This gives column-major order.  
+        This gives row-major order.
+        '''
+        yield from geometry(self._tiles.shape, self.kind).positions
+
+    def match_candidates(self):
+        '''
+        Yield, in positions() order, only the positions that are in a line of
+        at least min_match equal values.
+
+        This is a vectorized scan of the whole tiling.
         '''
-        nrows, ncols = self._tiles.shape
-        for irow in range(nrows):
-            for icol in range(ncols):
-                yield (irow, icol)
+        positions = geometry(self._tiles.shape, self.kind).positions
+        for ind in matching(self._tiles, self.kind, self._min_match):
+            yield positions[ind]
 
     def adjacent(self, a, b):
         '''
@@ -91,14 +104,7 @@ class Tiling(BaseTiling):
         Yield unique, unordered pairs of positions that are considered
         neighbors.
         '''
-        nrows, ncols = self._tiles.shape
-        for irow in range(nrows):
-            for icol in range(ncols):
-                pos = (irow, icol)
-                if irow+1 < nrows:
-                    yield (pos, (irow+1, icol))
-                if icol+1 < ncols:
-                    yield (pos, (irow  , icol+1))
+        yield from geometry(self._tiles.shape, self.kind).neighbors
 
     def radii(self, pos):
         '''
@@ -106,15 +112,7 @@ class Tiling(BaseTiling):
 
         The outer list is size 4 in order right, up, left, down.
         '''
-
-        row,col = pos
-        nrows,ncols = self._tiles.shape
-        return [
-            ((row,c) for c in range(col+1,ncols)),
-            ((r,col) for r in range(row-1,-1,-1)),
-            ((row,c) for c in range(col-1,-1,-1)),
-            ((r,col) for r in range(row+1,nrows))
-        ]
+        return geometry(self._tiles.shape, self.kind).radii[pos]
 
     def matched(self, seed):
         '''
@@ -122,9 +120,11 @@ class Tiling(BaseTiling):
         '''
         target = self._tiles[seed]
 
-        dir_matches = [[],[]]
-        for idir, prange in enumerate(self.radii(seed)):
-            idir = idir%2
+        radii = self.radii(seed)
+        naxes = len(radii)//2
+        dir_matches = [[] for _ in range(naxes)]
+        for idir, prange in enumerate(radii):
+            idir = idir%naxes
             for pos in prange:
                 if self._tiles[pos] != target:
                     break;
@@ -143,22 +143,19 @@ class Tiling(BaseTiling):
         Modify the tiling so that values at positions are nullified and the
         remaining positions are moved "down".
 
-        Return the post-compactified positions that are left null.
-        '''
-        nrows, ncols = self._tiles.shape
-
-        ret = set()
-        for col in range(ncols):
-            nempty_below = 0
-            for row in range(nrows-1, -1, -1):
-                if (row,col) in positions:
-                    nempty_below += 1
-                    continue
-                self._tiles[row+nempty_below, col] = self._tiles[row, col]
-            # fill in
-            for row in range(nempty_below):
-                ret.add((row,col))
-        return ret
+        Return the post-compactified positions that are left null.  See
+        compact_map() to also learn where each remaining value came from.
+        '''
+        return set(self.compact_map(positions).refilled)
+
+    def compact_map(self, positions) -> Gravity:
+        '''
+        Compact as compact() and return the Gravity of the move.
+        '''
+        grav = gravity(self._tiles.shape, positions)
+        self._tiles[:] = numpy.take_along_axis(self._tiles,
+                                               grav.sources.clip(min=0), axis=0)
+        return grav
 
         
 def make(fresh, size=8):
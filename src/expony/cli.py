@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+'''
+The expony command line interface.
+
+This must remain importable without pygame so that headless commands start
+quickly.
+'''
+import sys
+import json
+import click
+
+
+def parse_shape(ctx, param, value):
+    '''
+    Parse a board shape given as "RxC" or "N" for square.
+    '''
+    try:
+        dims = [int(v) for v in value.lower().split("x")]
+    except ValueError:
+        raise click.BadParameter(f'not a shape: {value}')
+    if len(dims) == 1:
+        dims = dims * 2
+    if len(dims) != 2 or min(dims) < 3:
+        raise click.BadParameter(f'not a shape: {value}')
+    return tuple(dims)
+
+
+@click.group()
+@click.option("--log-level", default="WARNING", show_default=True,
+              envvar="EXPONY_LOG_LEVEL",
+              type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"],
+                                case_sensitive=False),
+              help="Least level of engine events to log.")
+@click.option("--log-file", default=None, envvar="EXPONY_LOG_FILE",
+              help="Write events as JSON lines to this file, default stderr.")
+@click.option("--log-sample", default=1, show_default=True,
+              envvar="EXPONY_LOG_SAMPLE",
+              help="Keep one in this many of each debug event.")
+def main(log_level, log_file, log_sample):
+    '''
+    Experiment with expony games.
+    '''
+    from .log import configure
+    configure(log_level, log_file, log_sample)
+
+
+@main.command()
+@click.option("-n", "--games", default=10, show_default=True,
+              help="Number of games to play.")
+@click.option("-s", "--seed-start", default=0, show_default=True,
+              help="Random seed of the first game, others count up.")
+@click.option("-j", "--jobs", default=1, show_default=True,
+              help="Number of worker processes, 0 for one per CPU.")
+@click.option("--strategy", default="hint", show_default=True,
+              type=click.Choice(["hint", "greedy", "random"]),
+              help="How to choose each move.")
+@click.option("--shape", default="8x8", show_default=True,
+              callback=parse_shape, help="Board shape as RxC.")
+@click.option("--server", is_flag=True, default=False,
+              help="Play on a running worker service instead of new processes.")
+@click.option("--address", default=None,
+              help="Socket of the worker service, default is per-user.")
+def autoplay(games, seed_start, jobs, strategy, shape, server, address):
+    '''
+    Play games headlessly, writing one JSON line per finished game.
+    '''
+    seeds = range(seed_start, seed_start + games)
+    if server:
+        from .workers import connect
+        client = connect(address)
+        if client is None:
+            raise click.ClickException("no usable worker service is running")
+        with client:
+            for res in client.iautoplay(seeds, shape, strategy):
+                click.echo(json.dumps(res))
+                sys.stdout.flush()
+        return
+
+    from .autoplay import play_many
+    for res in play_many(seeds, shape, strategy, jobs):
+        click.echo(json.dumps(res))
+        sys.stdout.flush()
+
+
+@main.command()
+@click.option("-j", "--jobs", default=0, show_default=True,
+              help="Number of worker processes, 0 for one per CPU.")
+@click.option("--address", default=None,
+              help="Socket to listen on, default is per-user.")
+@click.option("--stop", is_flag=True, default=False,
+              help="Stop a running service instead of starting one.")
+def serve(jobs, address, stop):
+    '''
+    Run a pool of warm worker processes that takes jobs on a local socket.
+    '''
+    from .workers import Server, connect
+    if stop:
+        client = connect(address)
+        if client is None:
+            raise click.ClickException("no usable worker service is running")
+        with client:
+            client.shutdown()
+        return
+    server = Server(address, jobs).start()
+    click.echo(f'serving {server.njobs} workers on {server.address}', err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+
+@main.command()
+@click.argument("path", type=click.Path(file_okay=False))
+@click.option("--start", default=0, show_default=True,
+              help="First seed of a new sweep.")
+@click.option("--stop", default=None, type=int,
+              help="One past the last seed of a new sweep, omit to resume.")
+@click.option("--chunk", default=1000, show_default=True,
+              help="Number of seeds in each chunk of a new sweep.")
+@click.option("-j", "--jobs", default=1, show_default=True,
+              help="Number of worker processes, 0 for one per CPU.")
+@click.option("--strategy", default="hint", show_default=True,
+              type=click.Choice(["hint", "greedy", "random"]),
+              help="How to choose each move in a new sweep.")
+@click.option("--shape", default="8x8", show_default=True,
+              callback=parse_shape, help="Board shape of a new sweep as RxC.")
+@click.option("--stale", default=3600.0, show_default=True,
+              help="Seconds without a heartbeat after which a claim from "
+              "another host is taken over.")
+@click.option("--heatmaps", is_flag=True, default=False,
+              help="Record per-cell heatmaps of moves in a new sweep.")
+@click.option("--heatmaps-output", default=None,
+              help="Write the heatmaps summed over finished chunks to this .npz.")
+@click.option("--server", is_flag=True, default=False,
+              help="Play on a running worker service instead of new processes.")
+@click.option("--address", default=None,
+              help="Socket of the worker service, default is per-user.")
+def sweep(path, start, stop, chunk, jobs, strategy, shape, stale, heatmaps,
+          heatmaps_output, server, address):
+    '''
+    Run or resume a chunked, checkpointed sweep of seeds in directory PATH.
+
+    The sweep may be run from several hosts sharing PATH at once.
+    '''
+    from .sweep import Sweep
+    try:
+        swp = Sweep(path, start, stop, chunk, shape, strategy, stale, heatmaps)
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    client = None
+    if server:
+        from .workers import connect
+        client = connect(address)
+        if client is None:
+            raise click.ClickException("no usable worker service is running")
+    try:
+        ngames = swp.run(jobs, sys.stderr, client)
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    finally:
+        if client is not None:
+            client.close()
+    if heatmaps_output:
+        maps = swp.heatmaps()
+        if maps is None:
+            raise click.ClickException("the sweep does not record heatmaps")
+        maps.save(heatmaps_output)
+    click.echo(json.dumps(dict(swp.status(), played=ngames)))
+
+
+@main.command()
+@click.argument("paths", nargs=-1)
+@click.option("-j", "--jobs", default=1, show_default=True,
+              help="Number of processes reading files, 0 for one per CPU.")
+@click.option("--accuracy", default=0.01, show_default=True,
+              help="Relative accuracy of quantiles.")
+@click.option("--json", "as_json", is_flag=True, default=False,
+              help="Print the mergeable summary as JSON instead of a table.")
+@click.option("-s", "--summary", "summaries", multiple=True,
+              help="Merge in a summary printed by --json, may repeat.")
+def stats(paths, jobs, accuracy, as_json, summaries):
+    '''
+    Summarize autoplay results in constant memory.
+
+    PATHS are files of JSON lines as written by autoplay or sweep directories,
+    default is to read standard input unless summaries are given.
+    '''
+    import os
+    import glob
+    from .stats import Aggregator, aggregate_files, read_results, load_summary
+    files = list()
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "done", "*.jsonl")))
+        else:
+            files.append(path)
+    parts = [load_summary(path) for path in summaries]
+    if paths:
+        parts.append(aggregate_files(files, accuracy, jobs or os.cpu_count()))
+    elif not summaries:
+        parts.append(Aggregator(accuracy).update(read_results(sys.stdin)))
+    agg = parts[0]
+    try:
+        for part in parts[1:]:
+            agg += part
+    except ValueError as err:
+        raise click.ClickException(str(err))
+    if as_json:
+        click.echo(json.dumps(agg.to_dict()))
+    else:
+        click.echo(agg.table())
+
+
+if __name__ == "__main__":
+    main()
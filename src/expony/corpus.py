@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+'''
+A fixed corpus of real game positions for microbenchmarks.
+
+Positions are taken from arr.Board autoplay games with fixed seeds and grouped
+into buckets:
+
+- opening :: the first moves of a game.
+- midgame :: moves around the middle of a game.
+- cascade :: positions whose hint move causes the deepest cascades.
+- endgame :: the last moves before a game is over.
+- large :: positions from games on a larger board.
+
+A corpus is a dict mapping bucket name to a uint8 array of shape (npositions,
+nrows, ncols) and is stored in a compressed .npz file.  Only tiles are stored
+and boards made from them for benchmarking should use random_seed=0, with which
+the "cascade" depths were measured.  The default corpus is
+shipped with the package and may be rebuilt with:
+
+  python -m expony.corpus
+'''
+import os
+import sys
+import numpy
+from .arr import Board
+
+buckets = ("opening", "midgame", "cascade", "endgame", "large")
+
+default_path = os.path.join(os.path.dirname(__file__), "corpus.npz")
+
+
+def cascade_depth(board, move):
+    '''
+    Return the number of gravity passes caused by making move on a copy of
+    board.
+    '''
+    trial = Board(board)
+    depth = 0
+    apply_gravity = trial.apply_gravity
+    def counting(matches):
+        nonlocal depth
+        depth += 1
+        return apply_gravity(matches)
+    trial.apply_gravity = counting
+    trial.maybe_swap(*move)
+    return depth
+
+
+def play(shape, random_seed, max_moves=None):
+    '''
+    Return list of (tiles, hint move) for every position of an autoplay game.
+
+    If max_moves is given, stop after that many moves.
+    '''
+    board = Board(shape, random_seed=random_seed)
+    ret = list()
+    while move := board.automove_hint():
+        if max_moves is not None and len(ret) >= max_moves:
+            break
+        ret.append((numpy.copy(board.tiles), move))
+        board.maybe_swap(*move)
+    return ret
+
+
+def _spread(positions, count):
+    '''
+    Return count items evenly spread over positions.
+    '''
+    if len(positions) <= count:
+        return list(positions)
+    inds = numpy.linspace(0, len(positions)-1, count).round().astype(int)
+    return [positions[i] for i in inds]
+
+
+def build(seeds=range(8), shape=(8,8), large_shape=(16,16), per_bucket=32,
+          edge=4, large_moves=256):
+    '''
+    Return a corpus from autoplay games with the given seeds.
+
+    The edge gives the number of positions taken from the start of each game
+    for "opening", from its middle for "midgame" and from its end for
+    "endgame".  Games on the large board last very long and only their first
+    large_moves positions are used.
+    '''
+    found = {name: list() for name in buckets}
+    deep = list()
+    for seed in seeds:
+        game = play(shape, seed)
+        tiles = [t for t, m in game]
+        mid = len(tiles)//2 - edge//2
+        found["opening"] += tiles[:edge]
+        found["midgame"] += tiles[mid:mid+edge]
+        found["endgame"] += tiles[-edge:]
+        for ind, (tile, move) in enumerate(game):
+            depth = cascade_depth(Board(tile, random_seed=0), move)
+            deep.append((-depth, seed, ind, tile))
+
+        game = play(large_shape, seed, large_moves)
+        found["large"] += [t for t, m in game]
+
+    deep.sort(key=lambda d: d[:3])
+    found["cascade"] = [d[-1] for d in deep[:per_bucket]]
+
+    return {name: numpy.array(_spread(found[name], per_bucket),
+                              dtype=numpy.uint8)
+            for name in buckets}
+
+
+def save(corpus, path=default_path):
+    '''
+    Save corpus to a compressed .npz file.
+    '''
+    numpy.savez_compressed(path, **corpus)
+
+
+def load(path=default_path):
+    '''
+    Return corpus loaded from a .npz file.
+    '''
+    with numpy.load(path) as dat:
+        return {name: dat[name] for name in dat.files}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else default_path
+    corpus = build()
+    save(corpus, path)
+    for name, tiles in corpus.items():
+        print(f'{name:8s} {tiles.shape[0]:3d} positions of {tiles.shape[1]}x{tiles.shape[2]}')
+    print(f'saved to {path}')
+
+
+if __name__ == "__main__":
+    main()
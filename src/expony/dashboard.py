@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+'''
+Watch many autoplay games at once.
+
+Games are played by worker processes that write each board into one shared
+memory array after every move.  The display samples that array each frame,
+finds the cells that changed since it last drew with one numpy comparison and
+blits only those cells from a texture atlas holding one image per tile value.
+Only the changed rects are sent to the screen.
+
+  python -m expony.dashboard --games 64 --jobs 4 --strategies hint,greedy,random
+
+Strategies (see expony.autoplay) are given to the games in turn.  Each board is
+labeled with its strategy, score and number of finished games.  Keys: q quit,
+space pause.
+'''
+import sys
+import math
+import argparse
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from time import sleep, perf_counter
+
+import numpy
+
+from .arr import Board
+from .autoplay import strategies
+
+
+# Columns of the per-game stats array.
+SCORE, MOVES, GAMES, SEED = range(4)
+
+
+class SharedGames:
+    '''
+    Board tiles and stats of many games held in shared memory.
+    '''
+
+    def __init__(self, ngames, shape, name=None):
+        self.ngames = ngames
+        self.shape = tuple(shape)
+        tiles_bytes = ngames * self.shape[0] * self.shape[1]
+        offset = -(-tiles_bytes // 8) * 8
+        size = offset + ngames * 4 * 8
+        self.owner = name is None
+        if self.owner:
+            self.shm = SharedMemory(create=True, size=size)
+        else:
+            self.shm = SharedMemory(name=name)
+        self.tiles = numpy.ndarray((ngames,) + self.shape, dtype=numpy.uint8,
+                                   buffer=self.shm.buf)
+        self.stats = numpy.ndarray((ngames, 4), dtype=numpy.int64,
+                                   buffer=self.shm.buf, offset=offset)
+        if self.owner:
+            self.tiles[:] = 0
+            self.stats[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # drop our views before the buffer goes
+        del self.tiles, self.stats
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def play_games(name, ngames, shape, indices, strategy_names, seed_start,
+               speed, paused, stopped):
+    '''
+    Play the games of indices in turns, one move each, until stopped.
+
+    Finished games restart with their seed advanced by ngames.  The speed, if
+    given, limits each game to that many moves per second.
+    '''
+    games = SharedGames(ngames, shape, name)
+    boards = dict()
+    rngs = dict()
+
+    def start(index, seed):
+        board = boards[index] = Board(tuple(shape), random_seed=seed)
+        rngs[index] = numpy.random.default_rng(seed)
+        games.tiles[index] = board.tiles
+        games.stats[index, [SCORE, MOVES, SEED]] = (0, 0, seed)
+
+    for index in indices:
+        start(index, seed_start + index)
+
+    try:
+        next_time = perf_counter()
+        while not stopped.is_set():
+            if paused.is_set():
+                sleep(0.01)
+                continue
+            if speed:
+                next_time += 1.0 / speed
+                delay = next_time - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            for index in indices:
+                board = boards[index]
+                choose = strategies[strategy_names[index % len(strategy_names)]]
+                move = choose(board, rngs[index])
+                if not move:
+                    games.stats[index, GAMES] += 1
+                    start(index, int(games.stats[index, SEED]) + ngames)
+                    continue
+                points = board.maybe_swap(*move)
+                games.tiles[index] = board.tiles
+                games.stats[index, SCORE] += int(points)
+                games.stats[index, MOVES] += 1
+    finally:
+        games.close()
+
+
+class Atlas:
+    '''
+    One surface holding a tile image for each value, side by side.
+    '''
+
+    def __init__(self, tile_shape_pix, nvalues=None, border=1):
+        import pygame
+        from .render import TileRenderer, tile_colors
+        nvalues = nvalues or len(tile_colors)
+        width, height = tile_shape_pix
+        renderer = TileRenderer(tile_shape_pix, border)
+        self.surface = pygame.Surface((width * nvalues, height))
+        for value in range(nvalues):
+            self.surface.blit(renderer.tile(value), (value * width, 0))
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.areas = [pygame.Rect(value * width, 0, width, height)
+                      for value in range(nvalues)]
+
+
+class Dashboard:
+    '''
+    Draw a grid of games from a SharedGames.
+    '''
+
+    def __init__(self, screen, games, tile=12, gap=None, labels=None):
+        import pygame
+        self.pygame = pygame
+        self.screen = screen
+        self.games = games
+        self.tile = tile
+        nrows, ncols = games.shape
+        self.gap = gap if gap is not None else tile
+        self.label_height = max(10, tile)
+        self.grid_cols = math.ceil(math.sqrt(games.ngames))
+        self.board_pix = (ncols * tile, nrows * tile)
+        self.cell_pix = (self.board_pix[0] + self.gap,
+                         self.board_pix[1] + self.label_height + self.gap)
+        self.atlas = Atlas((tile, tile), border=max(1, tile // 12))
+        self.labels = labels or [""] * games.ngames
+        self.font = pygame.font.Font(None, self.label_height + 2)
+        self.shown = numpy.full((games.ngames,) + games.shape, 255,
+                                dtype=numpy.uint8)
+        self.shown_stats = numpy.full((games.ngames, 4), -1, dtype=numpy.int64)
+
+        # pixel origin of every cell, indexed [game, row, col]
+        gidx = numpy.arange(games.ngames)
+        ox = (gidx % self.grid_cols) * self.cell_pix[0] + self.gap // 2
+        oy = (gidx // self.grid_cols) * self.cell_pix[1] + self.gap // 2
+        rows = numpy.arange(nrows) * tile
+        cols = numpy.arange(ncols) * tile
+        full = (games.ngames,) + games.shape
+        self.cell_x = numpy.broadcast_to(ox[:, None, None] + cols, full)
+        self.cell_y = numpy.broadcast_to(oy[:, None, None] + rows[:, None], full)
+        self.label_xy = list(zip(ox, oy + self.board_pix[1]))
+
+    @classmethod
+    def screen_size(cls, ngames, shape, tile=12, gap=None):
+        gap = gap if gap is not None else tile
+        grid_cols = math.ceil(math.sqrt(ngames))
+        grid_rows = math.ceil(ngames / grid_cols)
+        return (grid_cols * (shape[1] * tile + gap),
+                grid_rows * (shape[0] * tile + max(10, tile) + gap))
+
+    def draw(self):
+        '''
+        Draw cells and labels that changed, return the dirty rects.
+        '''
+        pygame = self.pygame
+        tiles = self.games.tiles.copy()
+        changed = numpy.nonzero(tiles != self.shown)
+        self.shown[changed] = tiles[changed]
+        atlas, areas = self.atlas.surface, self.atlas.areas
+        xs, ys = self.cell_x[changed], self.cell_y[changed]
+        tile = self.tile
+        blits = [(atlas, (int(x), int(y)), areas[v])
+                 for x, y, v in zip(xs, ys, tiles[changed])]
+        self.screen.blits(blits, doreturn=0)
+        dirty = [pygame.Rect(int(x), int(y), tile, tile) for x, y in zip(xs, ys)]
+
+        stats = self.games.stats.copy()
+        for index in numpy.nonzero((stats != self.shown_stats).any(axis=1))[0]:
+            self.shown_stats[index] = stats[index]
+            score, moves, ngames, seed = stats[index]
+            text = f'{self.labels[index]} {score} #{ngames}'
+            x, y = self.label_xy[index]
+            rect = pygame.Rect(int(x), int(y), self.board_pix[0], self.label_height)
+            self.screen.fill((0, 0, 0), rect)
+            surf = self.font.render(text, True, (200, 200, 200))
+            self.screen.blit(surf, rect, pygame.Rect((0, 0), rect.size))
+            dirty.append(rect)
+        return dirty
+
+
+def start_workers(games, jobs, strategy_names, seed_start=0, speed=None):
+    '''
+    Start jobs processes playing games, return (processes, paused, stopped).
+    '''
+    paused = multiprocessing.Event()
+    stopped = multiprocessing.Event()
+    procs = list()
+    for job in range(jobs):
+        indices = list(range(job, games.ngames, jobs))
+        if not indices:
+            continue
+        proc = multiprocessing.Process(
+            target=play_games, daemon=True,
+            args=(games.name, games.ngames, games.shape, indices,
+                  strategy_names, seed_start, speed, paused, stopped))
+        proc.start()
+        procs.append(proc)
+    return procs, paused, stopped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.dashboard",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("--games", type=int, default=64)
+    parser.add_argument("--shape", default="8x8", help="board shape as RxC")
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="number of engine processes")
+    parser.add_argument("--strategies", default="hint",
+                        help="comma separated strategies given to games in turn")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game, others count up")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="moves per second of each game, default as fast "
+                        "as possible")
+    parser.add_argument("--tile", type=int, default=12, help="tile size in pixels")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="quit after this long and print the frame rate")
+    args = parser.parse_args(argv)
+
+    shape = tuple(int(n) for n in args.shape.lower().split("x"))
+    names = args.strategies.split(",")
+    for name in names:
+        if name not in strategies:
+            parser.error(f'unknown strategy: {name}')
+
+    games = SharedGames(args.games, shape)
+    # Start the engine before SDL so that workers do not inherit it.
+    procs, paused, stopped = start_workers(games, args.jobs, names, args.seed,
+                                           args.speed)
+    import pygame
+    pygame.init()
+    size = Dashboard.screen_size(args.games, shape, args.tile)
+    screen = pygame.display.set_mode(size)
+    labels = [names[i % len(names)] for i in range(args.games)]
+    dash = Dashboard(screen, games, args.tile, labels=labels)
+    clock = pygame.time.Clock()
+    nframes = 0
+    start = perf_counter()
+    try:
+        while True:
+            quit = False
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    quit = True
+                elif event.type == pygame.KEYUP and event.key == pygame.K_q:
+                    quit = True
+                elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+                    if paused.is_set():
+                        paused.clear()
+                    else:
+                        paused.set()
+            if quit:
+                break
+            dirty = dash.draw()
+            if dirty:
+                pygame.display.update(dirty)
+            nframes += 1
+            clock.tick(60)
+            if args.seconds and perf_counter() - start > args.seconds:
+                break
+    finally:
+        elapsed = perf_counter() - start
+        stopped.set()
+        for proc in procs:
+            proc.join(5)
+        pygame.quit()
+        moves = int(games.stats[:, MOVES].sum())
+        games.close()
+    print(f'{nframes/elapsed:.1f} frames/s, {moves/elapsed:.0f} moves/s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,13 @@ The expony game data.
 
 from typing import List, Tuple, Callable
 import copy
+import logging
 from collections import defaultdict
 import random
-from itertools import product
 from dataclasses import dataclass
+from .geometry import geometry
+
+log = logging.getLogger(__name__)
 
 # (row,col) order.  (0,0) is upper left corner.
 Position = tuple
@@ -177,7 +180,7 @@ class Board:
     def set_miv(self, miv):
         if miv > 4:
             self.max_init_value = miv
-            print(f'set {miv=} {self.max_init_value=}')
+            log.debug("max init value", extra=dict(value=miv))
 
     def cardinal_ranges(self, pos: Position):
         '''
@@ -187,14 +190,8 @@ class Board:
         each cardinal direction.  The directions are the dictionary keys are
         "up", "down", "left", "right".
         '''
-        row,col = pos
-        nrows,ncols = self.shape
-        return dict(
-            up =  ((r,col) for r in range(row-1,-1,-1)),
-            down= ((r,col) for r in range(row+1,nrows)),
-            left= ((row,c) for c in range(col-1,-1,-1)),
-            right=((row,c) for c in range(col+1,ncols))
-        )
+        right, up, left, down = geometry(self.shape).radii[pos]
+        return dict(up=up, down=down, left=left, right=right)
             
     def matched(self, seed: Position) -> Matched:
         '''
@@ -227,7 +224,7 @@ class Board:
 
     @property
     def all_positions(self) -> List[Position]:
-        return product(range(self.shape[0]), range(self.shape[1]))
+        return geometry(self.shape).positions
 
     @property
     def all_tiles(self):
@@ -288,7 +285,9 @@ class Board:
         Return a random integer value in the allowed init range.
         '''
         r = self.rng.randint(1, self.max_init_value)
-        print(f'r: {r} {self.max_init_value}')
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("random value", extra=dict(value=r,
+                                                 max_value=self.max_init_value))
         return r
 
     def set_random(self, pos):
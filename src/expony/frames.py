@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+'''
+Offscreen rendering of games to image files.
+
+Games come from saved Records (see expony.replay) or are autoplayed from
+seeds.  Each game is replayed once to collect the tiles of the frames to draw,
+then the frames are drawn onto plain pygame surfaces from cached tile images
+and encoded over a pool of processes.  No window is opened.
+
+Either write one image per frame:
+
+  python -m expony.frames --seed 13 --seed 34 --output frames
+
+giving frames/seed13/move00000.png etc, or one contact sheet per game with a
+thumbnail of every Nth move:
+
+  python -m expony.frames --seed 13 --sheet --every 10 --output sheets
+
+Records are read from JSON files holding one Record.to_dict() per line.
+'''
+import os
+import sys
+import json
+import math
+import argparse
+from time import perf_counter
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from .arr import Board
+from .replay import Record, autoplay_record
+
+
+Frame = namedtuple("Frame", "move score tiles")
+Frame.__doc__ = '''
+The tiles and the score of a game just before a move.
+'''
+
+
+def game_frames(record, every=1):
+    '''
+    Replay a record and return a list of Frame.
+
+    A frame is taken before every "every"th move and after the last move.
+    '''
+    board = Board(record.shape, random_seed=record.random_seed)
+    nmoves = len(record)
+    frames = list()
+    score = 0
+    for k in range(nmoves + 1):
+        if k % every == 0 or k == nmoves:
+            frames.append(Frame(k, score, board.tiles.copy()))
+        if k == nmoves:
+            break
+        seed, targ = record.moves[k]
+        points = board.maybe_swap(seed, targ)
+        if not points:
+            raise ValueError(f'illegal move {k} in record: {seed} -> {targ}')
+        score += int(points)
+    return frames
+
+
+class FrameRenderer:
+    '''
+    Draw frames of one board shape onto one reused surface.
+
+    Only tiles that differ from the previous frame are redrawn.  A caption
+    strip under the board shows the move and score.
+    '''
+
+    def __init__(self, shape, tile=32, caption=True):
+        import pygame
+        from .render import TileRenderer
+        self.pygame = pygame
+        nrows, ncols = shape
+        self.tile = tile
+        self.renderer = TileRenderer((tile, tile), border=max(1, tile // 16))
+        self.caption = max(10, tile // 2) if caption else 0
+        self.board_pix = (ncols * tile, nrows * tile)
+        self.surface = pygame.Surface((self.board_pix[0],
+                                       self.board_pix[1] + self.caption))
+        self.surface.fill((0, 0, 0))
+
+    def draw(self, frame, title=""):
+        '''
+        Draw a Frame and return the surface.
+        '''
+        tile = self.tile
+        self.renderer.draw(self.surface, (
+            (pos, (pos[1]*tile, pos[0]*tile), int(value), "normal")
+            for pos, value in numpy.ndenumerate(frame.tiles)))
+        if self.caption:
+            rect = self.pygame.Rect(0, self.board_pix[1],
+                                    self.board_pix[0], self.caption)
+            self.surface.fill((0, 0, 0), rect)
+            text = self.renderer.font(self.caption + 2).render(
+                f'{title} {frame.move}: {frame.score}'.strip(), True,
+                (200, 200, 200))
+            self.surface.blit(text, rect, self.pygame.Rect((0, 0), rect.size))
+        return self.surface
+
+
+def contact_sheet(frames, shape, tile=8, columns=10, gap=None, title=""):
+    '''
+    Return a surface with a grid of thumbnails of frames.
+    '''
+    import pygame
+    gap = tile if gap is None else gap
+    renderer = FrameRenderer(shape, tile)
+    width, height = renderer.surface.get_size()
+    nrows = math.ceil(len(frames) / columns)
+    sheet = pygame.Surface((columns * (width + gap) + gap,
+                            nrows * (height + gap) + gap))
+    sheet.fill((40, 40, 40))
+    for index, frame in enumerate(frames):
+        row, col = divmod(index, columns)
+        sheet.blit(renderer.draw(frame, title),
+                   (gap + col * (width + gap), gap + row * (height + gap)))
+    return sheet
+
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+@contextmanager
+def _offscreen():
+    # As _init_worker() but only for the block, so a caller that later opens
+    # a window still gets a real display.
+    old = os.environ.get("SDL_VIDEODRIVER")
+    _init_worker()
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop("SDL_VIDEODRIVER", None)
+
+
+def write_frames(frames, pattern, shape, tile=32, title=""):
+    '''
+    Write an image of each frame to pattern.format(move=frame.move).
+
+    Return the list of paths written.
+    '''
+    import pygame
+    renderer = FrameRenderer(shape, tile)
+    paths = list()
+    for frame in frames:
+        path = pattern.format(move=frame.move)
+        pygame.image.save(renderer.draw(frame, title), path)
+        paths.append(path)
+    return paths
+
+
+def write_sheet(frames, path, shape, tile=8, columns=10, title=""):
+    '''
+    Write a contact sheet of frames to path and return [path].
+    '''
+    import pygame
+    pygame.image.save(contact_sheet(frames, shape, tile, columns, title=title),
+                      path)
+    return [path]
+
+
+def render_games(records, output, every=None, tile=None, sheet=False,
+                 columns=10, jobs=1, chunk=100, ext="png"):
+    '''
+    Render records to image files under the output directory.
+
+    Without sheet, frames of the game with seed S go to output/seedS/ and a
+    game is split into chunks of frames that are encoded in parallel.  With
+    sheet, each game gives one output/seedS.png.  The every defaults to 1 for
+    frames and to about 100 thumbnails a sheet.  Return the list of paths
+    written.
+    '''
+    os.makedirs(output, exist_ok=True)
+    tasks = list()
+    for record in records:
+        name = f'seed{record.random_seed}'
+        if sheet:
+            step = every or max(1, math.ceil(len(record) / 100))
+            frames = game_frames(record, step)
+            path = os.path.join(output, f'{name}.{ext}')
+            tasks.append((write_sheet, frames, path, record.shape,
+                          tile or 8, columns, name))
+            continue
+        frames = game_frames(record, every or 1)
+        gamedir = os.path.join(output, name)
+        os.makedirs(gamedir, exist_ok=True)
+        pattern = os.path.join(gamedir, 'move{move:05d}.' + ext)
+        for start in range(0, len(frames), chunk):
+            tasks.append((write_frames, frames[start:start + chunk], pattern,
+                          record.shape, tile or 32, name))
+
+    if jobs <= 1:
+        with _offscreen():
+            return [path for func, *args in tasks for path in func(*args)]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(func, *args) for func, *args in tasks]
+        return [path for f in futures for path in f.result()]
+
+
+def load_records(path):
+    '''
+    Return the Records in a file of one JSON Record.to_dict() per line.
+    '''
+    with open(path) as fp:
+        return [Record.from_dict(json.loads(line)) for line in fp if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.frames",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("records", nargs="*",
+                        help="JSON files of records, one per line")
+    parser.add_argument("--seed", type=int, action="append", default=[],
+                        help="autoplay a game with this seed, may repeat")
+    parser.add_argument("--strategy", default="hint",
+                        choices=["hint", "greedy", "random"])
+    parser.add_argument("--shape", default="8x8", help="board shape as RxC")
+    parser.add_argument("--output", default="frames", help="output directory")
+    parser.add_argument("--sheet", action="store_true",
+                        help="write one contact sheet per game")
+    parser.add_argument("--every", type=int, default=None,
+                        help="draw every this many moves")
+    parser.add_argument("--tile", type=int, default=None,
+                        help="tile size in pixels, default 32 or 8 for sheets")
+    parser.add_argument("--columns", type=int, default=10,
+                        help="thumbnails across a contact sheet")
+    parser.add_argument("--format", default="png", help="image file extension")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="encoding processes, 0 for one per CPU")
+    args = parser.parse_args(argv)
+
+    records = list()
+    for path in args.records:
+        records += load_records(path)
+    shape = tuple(int(n) for n in args.shape.lower().split("x"))
+    for seed in args.seed:
+        records.append(autoplay_record(shape, seed, args.strategy))
+    if not records:
+        parser.error("give record files or --seed")
+
+    start = perf_counter()
+    paths = render_games(records, args.output, args.every, args.tile,
+                         args.sheet, args.columns,
+                         args.jobs or os.cpu_count(), ext=args.format)
+    elapsed = perf_counter() - start
+    print(f'wrote {len(paths)} images in {elapsed:.1f} s, '
+          f'{len(paths)/elapsed:.0f}/s')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
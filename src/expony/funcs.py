@@ -9,7 +9,7 @@ Also, the functions leave the tiles in place in their board and only change
 their values.
 '''
 
-from typing import List, Generator
+from typing import List, Generator, Tuple
 from expony.data import (
     Board,
     Tile,
@@ -201,5 +201,45 @@ def possible_moves(board: Board) -> Generator[Move, None, None]:
             new_board = bps[-1].board
             yield Move(seed, targ, points, new_board)
             
+def scored_moves(board: Board) -> List[Tuple[Position, Position, int]]:
+    '''
+    Return list of (seed, targ, points) of the possible moves in board.
+
+    The points are those of the whole move including combos, as from
+    possible_moves(), but no board is kept and candidate swaps that make no
+    match are rejected in place without copying the board.
+    '''
+    moves = list()
+    for seed in board.all_positions:
+        row, col = seed
+        for targ in [(row-1, col), (row, col-1)]:
+            if targ[0] < 0 or targ[1] < 0:
+                continue
+            stile, ttile = board[seed], board[targ]
+            if stile.value == ttile.value:
+                continue
+            stile.value, ttile.value = ttile.value, stile.value
+            try:
+                legal = board.matched(seed) or board.matched(targ)
+            finally:
+                stile.value, ttile.value = ttile.value, stile.value
+            if not legal:
+                continue
+            bps = maybe_swap(board, seed, targ)
+            moves.append((seed, targ, sum([bp.points for bp in bps])))
+    return moves
+
+
+def scored_moves_of_values(values: List[List[int]]
+                           ) -> List[Tuple[Position, Position, int]]:
+    '''
+    Return scored_moves() of a board made from a 2D list of tile values.
+
+    New tiles are drawn from a generator seeded by the board digest so the
+    points are those that a board with these values would give.
+    '''
+    return scored_moves(Board([[Tile(v) for v in row] for row in values]))
+
+
 def max_value(board: Board):
     return max([board[pos].value for pos in board.all_positions])
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+'''
+Per-shape geometry tables shared by all board backends.
+
+Positions, neighbor pairs and radii depend only on the board shape and the kind
+of tiling and not on the tile values.  The geometry() function builds them once
+per (shape, kind) and every board of that shape shares the result.  The tables
+are tuples and read-only arrays and must not be modified.
+'''
+from collections import namedtuple
+import numpy
+
+# The (drow,dcol) steps of each radial direction, ordered by angle.  A
+# direction and its opposite are len(directions)//2 apart.
+directions = dict(
+    box = ((0,1), (-1,0), (0,-1), (1,0)), # right, up, left, down
+    # Axial (r,q) coordinates of flat-top hexagons with r as row and q as
+    # column: up-right, up, up-left, down-left, down, down-right.
+    hex = ((-1,1), (-1,0), (0,-1), (1,-1), (1,0), (0,1)),
+)
+
+Gravity = namedtuple("Gravity", "sources refilled")
+Gravity.__doc__ = '''
+Where the tiles of a board come from after gravity.
+
+- sources :: int array of the board shape giving, for each position, the row
+  in the same column that its tile fell from.  Rows are negative for tiles
+  refilled from above the board, -1 being just above row 0.
+- refilled :: list of (row,col) positions given new values, column by column
+  and top to bottom in each column.
+'''
+
+Geometry = namedtuple("Geometry", "shape kind positions hint_order flat hint_flat "
+                      "neighbors radii")
+Geometry.__doc__ = '''
+Geometry tables for one (shape, kind).
+
+- positions :: tuple of (row,col) in row-major order.
+- hint_order :: tuple of (row,col) in column-major (autoplay hint) order.
+- flat :: flat indices of positions.
+- hint_flat :: flat indices of hint_order.
+- neighbors :: tuple of unique, unordered pairs of neighboring positions.
+- radii :: dict mapping position to tuple of tuples of positions radiating
+  to the edge, one per direction.
+'''
+
+
+def _frozen(arr):
+    arr.setflags(write=False)
+    return arr
+
+
+def _radius(pos, step, shape):
+    row, col = pos
+    ret = list()
+    while True:
+        row += step[0]
+        col += step[1]
+        if row < 0 or col < 0 or row >= shape[0] or col >= shape[1]:
+            return tuple(ret)
+        ret.append((row, col))
+
+
+def _build(shape, kind):
+    try:
+        steps = directions[kind]
+    except KeyError:
+        raise ValueError(f'unknown tiling kind: {kind}') from None
+    nrows, ncols = shape
+
+    positions = tuple((r, c) for r in range(nrows) for c in range(ncols))
+    hint_order = tuple(sorted(positions, key=lambda p: p[1]))
+
+    def flatten(poses):
+        return _frozen(numpy.array([r*ncols + c for r, c in poses],
+                                   dtype=numpy.intp))
+
+    # "forward" steps give each unordered neighbor pair once.
+    forward = sorted([s for s in steps if s > (0,0)], reverse=True)
+    neighbors = tuple((p, (p[0]+s[0], p[1]+s[1]))
+                      for p in positions for s in forward
+                      if 0 <= p[0]+s[0] < nrows and 0 <= p[1]+s[1] < ncols)
+
+    radii = {p: tuple(_radius(p, s, shape) for s in steps) for p in positions}
+
+    return Geometry(shape, kind, positions, hint_order,
+                    flatten(positions), flatten(hint_order),
+                    neighbors, radii)
+
+
+_cache = dict()
+
+def geometry(shape, kind="box") -> Geometry:
+    '''
+    Return the shared Geometry for a board shape (nrows,ncols) and tiling kind.
+
+    This is called on hot paths and a cache hit costs one dict lookup.
+    '''
+    try:
+        return _cache[shape, kind]
+    except KeyError:
+        pass
+    norm = (tuple(int(n) for n in shape), kind)
+    geom = _cache.get(norm)
+    if geom is None:
+        geom = _build(*norm)
+        _cache[norm] = geom
+    _cache[shape, kind] = geom
+    return geom
+
+
+_windows = dict()
+
+def windows(shape, kind="box", length=3):
+    '''
+    Return array of shape (nwindows, length) of flat indices.
+
+    Each row is a line of length positions along one of the match axes.  Every
+    such line that fits in the board is included once.  A tile is part of a
+    match of at least length tiles if and only if it is in a window whose
+    values are all equal.
+    '''
+    key = (shape, kind, length)
+    try:
+        return _windows[key]
+    except KeyError:
+        pass
+    geom = geometry(shape, kind)
+    steps = directions[geom.kind]
+    nrows, ncols = geom.shape
+    ret = list()
+    for step in steps[:len(steps)//2]:
+        for row, col in geom.positions:
+            line = [(row + k*step[0], col + k*step[1]) for k in range(length)]
+            if all(0 <= r < nrows and 0 <= c < ncols for r, c in line):
+                ret.append([r*ncols + c for r, c in line])
+    ret = _frozen(numpy.array(ret, dtype=numpy.intp).reshape(-1, length))
+    _windows[key] = ret
+    return ret
+
+
+def matching(tiles, kind="box", length=3):
+    '''
+    Return flat indices, in row-major order, of tiles that are in a line of at
+    least length equal values along any match axis.
+
+    This is a vectorized scan of the whole 2D tiles array.
+    '''
+    win = windows(tiles.shape, kind, length)
+    vals = tiles.reshape(-1)[win]
+    full = (vals == vals[:, :1]).all(axis=1)
+    mask = numpy.zeros(tiles.size, dtype=bool)
+    mask[win[full].reshape(-1)] = True
+    return numpy.flatnonzero(mask)
+
+
+def gravity(shape, doomed) -> Gravity:
+    '''
+    Return the Gravity of removing the doomed positions from a board of shape.
+
+    Surviving tiles fall straight down their column into the holes and each
+    column is refilled from above with as many new tiles as it lost.
+    '''
+    nrows, ncols = shape
+    mask = numpy.zeros(shape, dtype=bool)
+    if doomed:
+        mask[tuple(numpy.array(list(doomed)).T)] = True
+    rows = numpy.arange(nrows)
+    sources = numpy.empty(shape, dtype=numpy.intp)
+    refilled = list()
+    for col in range(ncols):
+        kept = rows[~mask[:, col]]
+        nholes = nrows - len(kept)
+        sources[nholes:, col] = kept
+        sources[:nholes, col] = rows[:nholes] - nholes
+        refilled += [(row, col) for row in range(nholes)]
+    return Gravity(sources, refilled)
+
+
+def gravity_moves(grav):
+    '''
+    Return a dict mapping destination to source (row,col) of the tiles that
+    move under a Gravity.
+    '''
+    return {(row, col): (int(src), col)
+            for (row, col), src in numpy.ndenumerate(grav.sources)
+            if src != row}
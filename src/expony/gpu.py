@@ -13,14 +13,15 @@ For this instance we do not try to support batched operations.
 import torch
 from typing import List, Generator
 from .data import Position, Matched, adjacent, Move
-from itertools import product
+from .geometry import geometry, gravity, Gravity
 from collections import defaultdict
 from time import time
 
 def positions(shape):
-    pos = list(product(range(shape[0]), range(shape[1])))
-    pos.sort(key=lambda x: x[1])
-    return pos
+    '''
+    Return the shared, column-major positions for the shape.
+    '''
+    return geometry(shape).hint_order
 
 
 class Board:
@@ -34,14 +35,21 @@ class Board:
     # The default shape of the board.
     default_shape = (8,8)
 
-    def __init__(self, source, random_seed=None, device='cpu'):
+    def __init__(self, source, random_seed=None, device='cpu', fresh=None):
         '''
         Construct from size, shape, tile array or board object.
+
+        If fresh is a tiling.FreshStream, all random values are drawn from it
+        as in arr.Board so both backends produce the same games.
         '''
         self.rng = torch.Generator()
-        if not random_seed:
+        if fresh is not None and random_seed is None:
+            random_seed = fresh.seed
+        if random_seed is None:
             random_seed = int(time())
+        self.random_seed = random_seed
         self.rng.manual_seed(random_seed)
+        self.fresh = fresh
 
         if source is None:
             source = self.default_shape
@@ -68,6 +76,8 @@ class Board:
             tiles.requires_grad = False
             self.tiles = tiles.to(device=device, dtype=torch.int)
             self.rng = source.rng.clone_state()
+            if source.fresh is not None:
+                self.fresh = source.fresh.clone()
             self.all_positions = positions(self.tiles.shape)
             return
 
@@ -81,14 +91,8 @@ class Board:
         each cardinal direction.  The directions are the dictionary keys are
         "up", "down", "left", "right".
         '''
-        row,col = pos
-        nrows,ncols = self.tiles.shape
-        return dict(
-            up =  ((r,col) for r in range(row-1,-1,-1)),
-            down= ((r,col) for r in range(row+1,nrows)),
-            left= ((row,c) for c in range(col-1,-1,-1)),
-            right=((row,c) for c in range(col+1,ncols))
-        )
+        right, up, left, down = geometry(self.tiles.shape).radii[pos]
+        return dict(up=up, down=down, left=left, right=right)
 
     def matched(self, seed: Position) -> Matched:
         '''
@@ -136,6 +140,11 @@ class Board:
         return ret
 
     def randint(self, vmin, vmax, shape=1, device='cpu'):
+        if self.fresh is not None:
+            count = shape if isinstance(shape, int) else shape[0]*shape[1]
+            r = torch.from_numpy(self.fresh.integers(vmin, vmax-1, count))
+            r = r.reshape(shape)
+            return r.to(dtype=torch.int, device=device)
         r = torch.rand(shape, generator = self.rng, requires_grad=False)
         r = vmin + (vmax-vmin) * r
         r = torch.floor(r)
@@ -169,7 +178,10 @@ class Board:
         self.tiles[targ] = self.tiles[seed]
         self.tiles[seed] = tmp
     
-    def apply_gravity(self, matches: List[Matched]):
+    def apply_gravity(self, matches: List[Matched]) -> Gravity:
+        '''
+        Move tile values downward as possible and return the Gravity.
+        '''
         if matches and not isinstance(matches[0], Matched):
             raise TypeError(f'expect List[Matched] not List[{type(matches[0])}]')
 
@@ -177,16 +189,12 @@ class Board:
         for m in matches:
             all_m.update(m.matched)
 
-        for col in range(self.tiles.shape[1]):
-            nempty_below = 0
-            for row in range(self.tiles.shape[0]-1, -1, -1):
-                if (row,col) in all_m:
-                    nempty_below += 1
-                    continue
-                self.tiles[row+nempty_below, col] = self.tiles[row, col]
-            # fill in
-            for row in range(nempty_below):
-                self.set_random((row,col))
+        grav = gravity(tuple(self.tiles.shape), all_m)
+        index = torch.as_tensor(grav.sources.clip(min=0), device=self.tiles.device)
+        self.tiles[:] = torch.gather(self.tiles, 0, index)
+        for pos in grav.refilled:
+            self.set_random(pos)
+        return grav
 
     def unique_new_matches(self) -> List[Matched]:
         match_values = sorted(self.all_matches(),
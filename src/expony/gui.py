@@ -1,12 +1,22 @@
 import pygame
 import sys
+import logging
+import multiprocessing
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import expony.data 
 import expony.funcs 
+import expony.workers
+from expony.render import TileRenderer
+from expony.animate import Animator
+
+log = logging.getLogger(__name__)
 
 CLOCK_TICK=60
 
-pygame.init()
+# Set by main after pygame.init().  Importing this module does not touch SDL.
 screen = None
 
 
@@ -44,6 +54,15 @@ class Frame:
 
 import random
 
+
+def service_moves(client, values):
+    '''
+    Return the scored moves of a 2D list of tile values from a workers.Client.
+    '''
+    moves = client.moves([values])[0]
+    return [(m["seed"], m["targ"], m["points"]) for m in moves]
+
+
 class Board:
     def __init__(self, frame, shape=(8,8), random_seed=None):
         self.frame = frame
@@ -55,13 +74,26 @@ class Board:
 
         self.shape = shape
         self.random_seed = random_seed
-        self.delay_ms = 10
+        # time to animate each stage of a move
+        self.delay_ms = 100
+        self.renderer = TileRenderer(self.tile_shape_pix)
+
+        # Moves are scored in the background, on the warm worker service if
+        # one is running else in our own process, and cached by board values.
+        self.executor = None
+        self.use_service = True
+        self.service = None
+        self.score_moves = None
+        self.moves_cache = OrderedDict()
+        self.moves_cache_size = 256
+        # (key, future) of boards being scored
+        self.moves_pending = list()
+        # None, "hint" for the best move or "all" for all moves
+        self.overlay = None
 
         self.reset()
 
     def reset(self):
-        print("RESET")
-
         self.eboard = expony.data.Board(self.shape,
                                         random_seed=self.random_seed)
         self.eboard.assure_stable()
@@ -69,31 +101,157 @@ class Board:
         self.nturns = 0
         # holds a selected position
         self.seed_pos = None
+        self.animator = Animator(self.values(self.eboard),
+                                 stage_time=self.delay_ms/1000)
+        self.animating = False
 
         self.find_possible_moves()
-        print(f'Board constructed with seed {self.random_seed}')
+        log.info("new game", extra=dict(seed=self.random_seed))
 
     def faster(self):
         self.delay_ms = int(self.delay_ms*0.9)
-        print(f'delay {self.delay_ms} ms')
+        self.animator.stage_time = self.delay_ms/1000
+        log.info("delay", extra=dict(ms=self.delay_ms))
     def slower(self):
         if self.delay_ms == 0:
             self.delay_ms = 10;
         self.delay_ms = int(self.delay_ms*1.1)
-        print(f'delay {self.delay_ms} ms')        
+        self.animator.stage_time = self.delay_ms/1000
+        log.info("delay", extra=dict(ms=self.delay_ms))
+
+    def values(self, eboard):
+        return [[eboard[(row, col)].value for col in range(self.shape[1])]
+                for row in range(self.shape[0])]
 
     def find_possible_moves(self):
-        self.possible_moves = list(expony.funcs.possible_moves(self.eboard))
-        print(f'{len(self.possible_moves)} moves possible')
-        for m in self.possible_moves:
-            print(m)
+        '''
+        Start scoring the possible moves of the current board.
+
+        The possible_moves are None until poll_moves() finds the scored moves,
+        a list of (seed, targ, points).
+        '''
+        values = self.values(self.eboard)
+        key = tuple(map(tuple, values))
+        self.moves_key = key
+        self.possible_moves = self.moves_cache.get(key)
+        if self.possible_moves is not None:
+            self.moves_cache.move_to_end(key)
+            return
+        # Superseded boards not yet started are dropped, those already being
+        # scored are cached under their own key when done.
+        self.moves_pending = [(k, f) for k, f in self.moves_pending
+                              if k == key or not f.cancel()]
+        if any(k == key for k, _ in self.moves_pending):
+            return
+        if self.executor is None:
+            self.start_scoring()
+        future = self.executor.submit(self.score_moves, values)
+        self.moves_pending.append((key, future))
+
+    def start_scoring(self):
+        '''
+        Score moves on the worker service, else on a process of our own.
+        '''
+        if self.use_service:
+            self.service = expony.workers.connect()
+        if self.service is not None:
+            # one thread keeps the GUI responsive while the service works
+            self.executor = ThreadPoolExecutor(1)
+            self.score_moves = partial(service_moves, self.service)
+            log.info("scoring moves", extra=dict(on=self.service.address))
+            return
+        # spawn, as forking a process with SDL running is asking for trouble
+        self.executor = ProcessPoolExecutor(
+            1, mp_context=multiprocessing.get_context("spawn"))
+        self.score_moves = expony.funcs.scored_moves_of_values
         # trial variant.  Conclusion, too chaotic!
         # self.eboard.set_miv(expony.funcs.max_value(self.eboard))
-        return len(self.possible_moves)
+
+    def poll_moves(self):
+        '''
+        Collect scored moves that are ready, return True if those of the
+        current board just were.
+        '''
+        arrived = False
+        pending = list()
+        for key, future in self.moves_pending:
+            if not future.done():
+                pending.append((key, future))
+                continue
+            try:
+                moves = future.result()
+            except Exception as err:
+                if self.service is None:
+                    raise
+                # eg the service went away, score again on our own
+                log.warning("scoring failed", extra=dict(error=str(err)))
+                self.close()
+                self.use_service = False
+                self.find_possible_moves()
+                return arrived
+            self.moves_cache[key] = moves
+            while len(self.moves_cache) > self.moves_cache_size:
+                self.moves_cache.popitem(last=False)
+            if key == self.moves_key:
+                self.possible_moves = moves
+                arrived = True
+                log.debug("moves scored", extra=dict(count=len(moves)))
+        self.moves_pending = pending
+        return arrived
+
+    def close(self):
+        '''
+        Stop scoring moves.
+        '''
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.service is not None:
+            self.service.close()
+            self.service = None
+        self.moves_pending = list()
 
     @property
     def game_over(self):
-        return len(self.possible_moves) == 0
+        return self.possible_moves is not None and len(self.possible_moves) == 0
+
+    def toggle_overlay(self, which):
+        '''
+        Show the "hint" or "all" moves overlay, or hide it if shown.
+        '''
+        self.overlay = None if self.overlay == which else which
+        self.draw_board()
+        self.draw_overlay()
+
+    def draw_overlay(self):
+        '''
+        Draw moves as arrows from seed to target labeled with their points.
+        '''
+        if not self.overlay or not self.possible_moves or self.animator.busy:
+            return
+        moves = self.possible_moves
+        if self.overlay == "hint":
+            moves = [max(moves, key=lambda m: m[2])]
+        width = max(2, self.tile_shape_pix[0] // 16)
+        font = self.renderer.font(max(12, self.tile_shape_pix[1] // 4))
+        dirty = list()
+        for seed, targ, points in moves:
+            a = self.tile_center(seed)
+            b = self.tile_center(targ)
+            mid = ((a[0]+b[0])//2, (a[1]+b[1])//2)
+            dirty.append(pygame.draw.line(screen, (255, 255, 255), a, b, width))
+            dirty.append(pygame.draw.circle(screen, (255, 255, 255), b, 2*width))
+            text = font.render(str(points), True, (255, 255, 0), (0, 0, 0))
+            dirty.append(screen.blit(text, text.get_rect(center=mid)))
+            # so the next draw_board() wipes the overlay
+            self.renderer.shown.pop(seed, None)
+            self.renderer.shown.pop(targ, None)
+        pygame.display.update(dirty)
+
+    def tile_center(self, pos):
+        pix = self.pos2pix(pos)
+        return (pix[0] + self.tile_shape_pix[0]//2,
+                pix[1] + self.tile_shape_pix[1]//2)
 
     def pix2pos(self, pix):
         '''
@@ -111,65 +269,63 @@ class Board:
                pos[0]*self.tile_shape_pix[1])
         return self.frame.local_to_global(pix)
 
-    def draw_board(self):
-        screen.fill((0, 0, 0))
-        for pos in self.eboard.all_positions:
-            self.draw_tile(pos)
-        pygame.display.flip()
+    def draw_board(self, full=False):
+        '''
+        Draw the current animation frame, redrawing only tiles that changed
+        or move, or all if full.
+        '''
+        tiles, moving = self.animator.frame(pygame.time.get_ticks()/1000)
+        if full:
+            screen.fill((0, 0, 0))
+            self.renderer.invalidate()
+        cleared = list()
+        for pos in moving:
+            rect = pygame.Rect(self.pos2pix(pos), self.tile_shape_pix)
+            cleared.append(screen.fill((0, 0, 0), rect))
+            self.renderer.shown.pop(pos, None)
+
+        screen.set_clip(self.frame.rect)
+        tiles = ((pos, tuple(map(int, self.pos2pix(at))), value,
+                  self.tile_state(pos)) for pos, at, value in tiles)
+        dirty = self.renderer.draw(screen, tiles)
+        screen.set_clip(None)
+        if full:
+            pygame.display.flip()
+        elif dirty or cleared:
+            pygame.display.update(dirty + cleared)
+
+    def update(self):
+        '''
+        Draw a frame if an animation is playing or just ended, or if scored
+        moves just arrived.
+        '''
+        arrived = self.poll_moves()
+        if self.animating or self.animator.busy:
+            self.draw_board()
+            self.animating = self.animator.busy
+            if self.animating:
+                return
+            arrived = True
+        if arrived:
+            self.draw_board()
+            self.draw_overlay()
+            self.maybe_draw_end()
 
     def draw_end(self):
-        font = pygame.font.Font(None, 2*36)
         msg = f'{self.total_points} points / {self.nturns} moves'
-        text = font.render(msg, True, (0,255,0))
-        text_rect = text.get_rect(center=self.frame.center)
-        screen.blit(text, text_rect)
-        pygame.display.flip()
-
+        rect = self.renderer.text(screen, msg, self.frame.center)
+        pygame.display.update(rect)
 
-    def draw_tile(self, pos):
-        pix = self.pos2pix(pos)
-        tile = self.eboard[pos]
-
-        tile_colors = [
-            '#000000', # black               0 
-            '#0A9396', # Dark cyan           1/2
-            '#E9D8A6', # Beige               2/4
-            '#EE9B00', # Yellowish orange    3/8
-            '#CA6702', # Browny orange       4/16
-            '#005F73', # Petrol              5/32
-            '#AE2012', # Deep red            6/64  
-            '#86350F', # Reddish brown       7/128 
-            '#94D2BD', # Pale teal           8/256 
-            '#FF8080', # Salmon pink         9/512 
-            '#FFCC80', # Wheat              10/1024
-            '#E6FF80', # Light yellow green 11/2048
-            '#99FF80', # Light green        12/4096
-            '#80FFB3', #                    13/8096
-        ]
-        color = tile_colors[tile.value]
-        font_color = (255, 255, 255)
-        if tile.value in (2, 8, 9, 10, 11, 12, 13):
-            font_color = (0, 0, 0) # black
-        
-        border_color = (255, 255, 255)  # default tile color
+    def tile_state(self, pos):
+        if self.game_over and not self.animator.busy:
+            return "over"
         if self.seed_pos == pos:
-            border_color = (0, 0, 0)
-        if self.game_over:
-            border_color = (255, 0, 0)
-
-        rect = (pix[0], pix[1], self.tile_shape_pix[0], self.tile_shape_pix[1])
-        center = (rect[0] + rect[2]//2, rect[1] + rect[3]//2)
-
-        pygame.draw.rect(screen, color, rect)
-        if tile.value:
-            font = pygame.font.Font(None, 36) # fixme, make dependent on tile_size
-            text = font.render(str(tile.points), True, font_color)
-            text_rect = text.get_rect(center=center)
-            screen.blit(text, text_rect)
-        pygame.draw.rect(screen, border_color, rect, 10)
+            return "seed"
+        return "normal"
 
     def draw(self):
-        self.draw_board()
+        self.draw_board(full=True)
+        self.draw_overlay()
         self.maybe_draw_end()
 
 
@@ -183,18 +339,20 @@ class Board:
 
             pix = event.pos
             pos = self.pix2pos(pix)
-            print(f'{pix=} {pos=} {event.type}')
+            log.debug("mouse", extra=dict(pix=pix, pos=pos, type=event.type))
 
             if self.seed_pos is None:
-                print(f'down: set seed tile at {pos}')
+                log.debug("select", extra=dict(pos=pos))
                 self.seed_pos = pos
                 self.draw_board()
+                self.draw_overlay()
                 return
 
             if self.seed_pos == pos:
-                print(f'down: unseed tile at {pos}')
+                log.debug("unselect", extra=dict(pos=pos))
                 self.seed_pos = None
                 self.draw_board()
+                self.draw_overlay()
                 return
 
             return
@@ -203,97 +361,105 @@ class Board:
             
             pix = event.pos
             pos = self.pix2pos(pix)
-            print(f'{pix=} {pos=} {event.type}')
+            log.debug("mouse", extra=dict(pix=pix, pos=pos, type=event.type))
 
             if self.seed_pos is None:
-                print(f'up: no seed at {pos}')
                 return
 
             if self.seed_pos == pos:
-                print(f'up: on seed at {pos}')
                 return
 
             seed_pos = self.seed_pos
             self.seed_pos = None
-            print(f'up: at other pos: {seed_pos} -> {pos}')
             bps = expony.funcs.maybe_swap(self.eboard, seed_pos, pos)
             if not bps:
-                print(f'up: illegal move {seed_pos} -> {pos}')
+                log.info("illegal move", extra=dict(seed=seed_pos, targ=pos))
                 return
             self.nturns += 1
 
-            self.draw_board()
+            # The game moves on at once while the stages play out in update().
             for bp in bps:
-                print(f'points: {self.total_points} + {bp.points}')
                 self.total_points += bp.points
+                log.info("points", extra=dict(points=bp.points,
+                                              total=self.total_points))
                 self.eboard = bp.board
-
-                if self.delay_ms:
-                    pygame.time.delay(self.delay_ms)
-
-                self.draw_board()
+                self.animator.push(self.values(bp.board))
 
             self.seed_pos = None
-            print('New board state after move')
             self.find_possible_moves()
-
-            self.draw_board()
-            self.maybe_draw_end()
             return
 
     def maybe_draw_end(self):
-        if self.game_over:
+        if self.game_over and not self.animator.busy:
             self.draw_board()
             self.draw_end()
 
 
-from pygame.locals import K_q, K_r, K_f, K_s
+from pygame.locals import K_q, K_r, K_f, K_s, K_h, K_a
 class Gui:
     def __init__(self, board):
         self.board = board
 
     def run(self):
         self.clock = pygame.time.Clock()
-        while True:
-            event = pygame.event.wait()
+        try:
+            while True:
+                for event in pygame.event.get():
+                    if self.handle_event(event) is False:
+                        return
+                self.board.update()
+                self.clock.tick(CLOCK_TICK)
+        finally:
+            self.board.close()
 
-            if event.type in [
-                    pygame.KEYUP,
-            ]:
-                if event.key == K_q:
-                    return
+    def handle_event(self, event):
+        '''
+        Handle one event, return False to quit.
+        '''
+        if event.type in [
+                pygame.KEYUP,
+        ]:
+            if event.key == K_q:
+                return False
+
+            if event.key == K_r:
+                self.board.reset()
+                self.board.draw()
+                return
 
-                if event.key == K_r:
-                    self.board.reset()
-                    self.board.draw()
-                    continue
+            if event.key == K_f:
+                self.board.faster()
+                return
 
-                if event.key == K_f:
-                    self.board.faster()
-                    continue
+            if event.key == K_s:
+                self.board.slower()
+                return
 
-                if event.key == K_s:
-                    self.board.slower()
-                    continue
+            if event.key == K_h:
+                self.board.toggle_overlay("hint")
+                return
 
-            if event.type == pygame.MOUSEMOTION:
-                continue
-            if event.type == pygame.QUIT:
+            if event.key == K_a:
+                self.board.toggle_overlay("all")
                 return
-            if event.type in [
-                    pygame.WINDOWSHOWN,
-                    pygame.WINDOWRESIZED,
-                    pygame.WINDOWEXPOSED,
-                              ]:
-                # print(f'{event}')
-                self.board.draw()
-                continue
 
-            if event.type in [pygame.MOUSEBUTTONUP,
-                              pygame.MOUSEBUTTONDOWN]:
-                print(f'{event}')
-                if self.board.frame.rect.collidepoint(*event.pos):
-                    self.board.handle_event(event)
+        if event.type == pygame.MOUSEMOTION:
+            return
+        if event.type == pygame.QUIT:
+            return False
+        if event.type in [
+                pygame.WINDOWSHOWN,
+                pygame.WINDOWRESIZED,
+                pygame.WINDOWEXPOSED,
+                          ]:
+            # print(f'{event}')
+            self.board.draw()
+            return
+
+        if event.type in [pygame.MOUSEBUTTONUP,
+                          pygame.MOUSEBUTTONDOWN]:
+            if self.board.frame.rect.collidepoint(*event.pos):
+                self.board.handle_event(event)
 
 
 
@@ -311,7 +477,9 @@ if __name__ == "__main__":
 
     shape = (tsize, tsize)
     screen_size = (bsize, bsize)
-    print(screen)
+    from expony.log import configure_from_env
+    configure_from_env()
+    pygame.init()
     screen = pygame.display.set_mode(screen_size)
     board = Board(Frame(pygame.Rect(0,0,*screen_size)), shape)
     gui = Gui(board)
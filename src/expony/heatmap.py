@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+'''
+Where on the board things happen, summed over many moves.
+
+A Heatmaps holds one count per board cell for each kind of event:
+
+- seeds :: the seed (first) position of each legal swap.
+- targets :: the target position of each legal swap.
+- origins :: where each match lands its merged tile.
+- matched :: the other tiles consumed by each match.
+- cascades :: all tiles of matches made by combos, after the first gravity
+  pass of a move.
+- max_tile :: the cells holding the largest value after each move.
+
+Recording is off by default and then costs nothing.  recording() wraps
+arr.Board in place (see expony.patch), as expony.instrument does, so that
+every move of every arr.Board, on any thread, feeds the active Heatmaps.
+Trial moves made by possible_moves() on copies of a board are not counted.
+
+  with recording(Heatmaps((8,8))) as maps:
+      autoplay.play(seed)
+  maps.save("hint.npz")
+
+Heatmaps add, so those of the chunks of a sweep (see expony.sweep) or of
+separate runs merge into one.  From the command line:
+
+  python -m expony.heatmap play --games 1000 --jobs 8 --output hint.npz
+  python -m expony.heatmap merge --output all.npz a.npz b.npz
+  python -m expony.heatmap show hint.npz
+  python -m expony.heatmap render hint.npz --output hint.png
+'''
+import os
+import sys
+import argparse
+import threading
+import multiprocessing
+from functools import wraps
+from contextlib import contextmanager
+
+import numpy
+
+from . import arr, patch
+
+
+kinds = ("seeds", "targets", "origins", "matched", "cascades", "max_tile")
+
+
+class Heatmaps:
+    '''
+    Per-cell counts of each kind of event over a number of moves.
+    '''
+
+    def __init__(self, shape, counts=None, moves=0):
+        self.shape = tuple(int(n) for n in shape)
+        self.moves = moves
+        self.counts = {kind: numpy.zeros(self.shape, dtype=numpy.int64)
+                       for kind in kinds}
+        if counts:
+            for kind, values in counts.items():
+                self.counts[kind][:] = values
+
+    def __getitem__(self, kind):
+        return self.counts[kind]
+
+    def __iadd__(self, other):
+        if other.shape != self.shape:
+            raise ValueError(f'can not add heatmaps of shape {other.shape} '
+                             f'to {self.shape}')
+        for kind in kinds:
+            self.counts[kind] += other.counts[kind]
+        self.moves += other.moves
+        return self
+
+    def rates(self, kind):
+        '''
+        Return the counts of kind per move.
+        '''
+        return self.counts[kind] / max(self.moves, 1)
+
+    def save(self, path):
+        '''
+        Save to a .npz file.
+        '''
+        numpy.savez(path, shape=numpy.array(self.shape), moves=self.moves,
+                    **self.counts)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Return Heatmaps loaded from a .npz file written by save().
+        '''
+        with numpy.load(path) as dat:
+            return cls(dat["shape"], {kind: dat[kind] for kind in kinds},
+                       int(dat["moves"]))
+
+
+def merge(paths):
+    '''
+    Return the sum of the Heatmaps in the .npz files at paths.
+    '''
+    total = None
+    for path in paths:
+        maps = Heatmaps.load(path)
+        if total is None:
+            total = maps
+        else:
+            total += maps
+    return total
+
+
+# The active heatmaps, if any, and the tokens of our patches.  Wrappers pass
+# straight through while heatmaps is None.
+heatmaps = None
+_patches = list()
+
+
+class _State(threading.local):
+    # Gravity passes of the move in progress and the depth of trial moves.
+    # Boards may move on several threads at once, eg a sim.Simulation and
+    # the main thread, so each thread keeps its own.
+    passes = 0
+    trials = 0
+
+
+_state = _State()
+# Serializes updates of the counts.
+_lock = threading.Lock()
+
+
+def _patch(owner, name, make):
+    _patches.append(patch.install(owner, name, make))
+
+
+def _add(counts, positions):
+    if positions:
+        rows, cols = numpy.array(positions).T
+        numpy.add.at(counts, (rows, cols), 1)
+
+
+def _maybe_swap(func):
+    @wraps(func)
+    def wrapper(self, seed, targ):
+        maps = heatmaps
+        if maps is None or _state.trials:
+            return func(self, seed, targ)
+        _state.passes = 0
+        points = func(self, seed, targ)
+        if points and self.tiles.shape == maps.shape:
+            counts = maps.counts
+            with _lock:
+                counts["seeds"][seed] += 1
+                counts["targets"][targ] += 1
+                counts["max_tile"] += self.tiles == self.tiles.max()
+                maps.moves += 1
+        return points
+    return wrapper
+
+
+def _apply_gravity(func):
+    @wraps(func)
+    def wrapper(self, matches):
+        maps = heatmaps
+        if maps is None or _state.trials or not matches \
+           or self.tiles.shape != maps.shape:
+            return func(self, matches)
+        counts = maps.counts
+        with _lock:
+            _add(counts["origins"], [m.origin for m in matches])
+            _add(counts["matched"], [p for m in matches for p in m.matched])
+            if _state.passes:
+                _add(counts["cascades"],
+                     [p for m in matches for p in m.all_positions])
+        _state.passes += 1
+        return func(self, matches)
+    return wrapper
+
+
+def _trial(func):
+    @wraps(func)
+    def wrapper(*args, **kwds):
+        if heatmaps is None:
+            yield from func(*args, **kwds)
+            return
+        gen = func(*args, **kwds)
+        while True:
+            _state.trials += 1
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            finally:
+                _state.trials -= 1
+            yield item
+    return wrapper
+
+
+def enable(maps) -> Heatmaps:
+    '''
+    Start recording the moves of every arr.Board into maps and return it.
+
+    Moves on boards of another shape are ignored.
+    '''
+    global heatmaps
+    if not _patches:
+        _patch(arr.Board, "maybe_swap", _maybe_swap)
+        _patch(arr.Board, "apply_gravity", _apply_gravity)
+        _patch(arr.Board, "possible_moves", _trial)
+    heatmaps = maps
+    return maps
+
+
+def disable():
+    '''
+    Stop recording, removing our wrappers from the engine code.
+    '''
+    global heatmaps
+    while _patches:
+        patch.remove(_patches.pop())
+    heatmaps = None
+
+
+@contextmanager
+def recording(maps):
+    '''
+    A context manager recording into maps and yielding them.
+    '''
+    try:
+        yield enable(maps)
+    finally:
+        disable()
+
+
+def play_games(seeds, shape=(8,8), strategy="hint"):
+    '''
+    Autoplay a game for each seed and return the Heatmaps of all their moves.
+    '''
+    from .autoplay import play
+    with recording(Heatmaps(shape)) as maps:
+        for seed in seeds:
+            play(seed, shape, strategy)
+    return maps
+
+
+def play_many(seeds, shape=(8,8), strategy="hint", jobs=1):
+    '''
+    As play_games() with the seeds spread over jobs processes.
+    '''
+    seeds = list(seeds)
+    if jobs <= 1:
+        return play_games(seeds, shape, strategy)
+    parts = [seeds[i::jobs] for i in range(jobs)]
+    with multiprocessing.Pool(jobs) as pool:
+        results = pool.starmap(play_games,
+                               [(part, shape, strategy) for part in parts])
+    total = Heatmaps(shape)
+    for maps in results:
+        total += maps
+    return total
+
+
+def format_table(values, fmt="{:6.3f}"):
+    '''
+    Return a text table of a 2D array with row and column numbers.
+    '''
+    nrows, ncols = values.shape
+    width = len(fmt.format(0))
+    lines = ["    " + "".join(f'{c:>{width+1}d}' for c in range(ncols))]
+    for row in range(nrows):
+        lines.append(f'{row:3d} ' + "".join(" " + fmt.format(v)
+                                            for v in values[row]))
+    return "\n".join(lines)
+
+
+def colorize(values):
+    '''
+    Return an RGB uint8 array of shape values.shape + (3,) mapping the range
+    of values from black through red and yellow to white.
+    '''
+    values = numpy.asarray(values, dtype=float)
+    span = values.max() - values.min()
+    frac = (values - values.min()) / span if span else numpy.zeros_like(values)
+    rgb = numpy.clip(frac[..., None] * 3 - numpy.arange(3), 0, 1)
+    return (rgb * 255).astype(numpy.uint8)
+
+
+def render(maps, cell=32, kinds=kinds):
+    '''
+    Return a pygame surface with a titled heatmap of each kind side by side.
+    '''
+    import pygame
+    if not pygame.font.get_init():
+        pygame.font.init()
+    font = pygame.font.Font(None, 20)
+    nrows, ncols = maps.shape
+    width, height = ncols * cell, nrows * cell
+    gap, title = 10, 20
+    surface = pygame.Surface((len(kinds) * (width + gap) + gap,
+                              height + title + 2 * gap))
+    surface.fill((40, 40, 40))
+    for index, kind in enumerate(kinds):
+        rgb = colorize(maps[kind]).repeat(cell, 0).repeat(cell, 1)
+        image = pygame.surfarray.make_surface(rgb.transpose(1, 0, 2))
+        x = gap + index * (width + gap)
+        surface.blit(font.render(kind, True, (220, 220, 220)), (x, gap))
+        surface.blit(image, (x, gap + title))
+    return surface
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.heatmap",
+                                     description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("play", help="autoplay games and save their heatmaps")
+    p.add_argument("-n", "--games", type=int, default=100)
+    p.add_argument("-s", "--seed-start", type=int, default=0)
+    p.add_argument("-j", "--jobs", type=int, default=1)
+    p.add_argument("--strategy", default="hint",
+                   choices=["hint", "greedy", "random"])
+    p.add_argument("--shape", default="8x8", help="board shape as RxC")
+    p.add_argument("-o", "--output", required=True, help="a .npz file")
+
+    p = sub.add_parser("merge", help="sum heatmaps files")
+    p.add_argument("-o", "--output", required=True, help="a .npz file")
+    p.add_argument("inputs", nargs="+")
+
+    p = sub.add_parser("show", help="print heatmaps as tables of rates")
+    p.add_argument("input")
+    p.add_argument("--kind", action="append", choices=kinds, default=None)
+
+    p = sub.add_parser("render", help="draw heatmaps to an image")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", required=True, help="an image file")
+    p.add_argument("--cell", type=int, default=32, help="pixels per cell")
+    p.add_argument("--kind", action="append", choices=kinds, default=None)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "play":
+        shape = tuple(int(n) for n in args.shape.lower().split("x"))
+        seeds = range(args.seed_start, args.seed_start + args.games)
+        maps = play_many(seeds, shape, args.strategy, args.jobs)
+        maps.save(args.output)
+        print(f'{maps.moves} moves of {args.games} games to {args.output}')
+    elif args.command == "merge":
+        maps = merge(args.inputs)
+        maps.save(args.output)
+        print(f'{maps.moves} moves from {len(args.inputs)} files to {args.output}')
+    elif args.command == "show":
+        maps = Heatmaps.load(args.input)
+        for kind in args.kind or kinds:
+            print(f'{kind} per move over {maps.moves} moves:')
+            print(format_table(maps.rates(kind)))
+    elif args.command == "render":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        maps = Heatmaps.load(args.input)
+        pygame.image.save(render(maps, args.cell, args.kind or kinds),
+                          args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
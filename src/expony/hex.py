@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+'''
+A hexagonal tiling of expony.
+
+Tiles are flat-top hexagons located with axial coordinates (r,q) which are
+stored as (row,col) of a 2D array.  A column of constant q is a vertical line of
+hexagons and each column sits half a hexagon lower than the one to its left so
+the board is drawn as a parallelogram.
+
+There are three match axes: vertical (along r), falling diagonal (along q)
+and rising diagonal (r+q constant).  Gravity moves values "down", to larger r along a
+column, exactly as with box.
+
+Matching, radii and gravity are inherited from box.Tiling and driven by the
+shared "hex" geometry tables.  The radii() are in order up-right, up, up-left,
+down-left, down, down-right.
+'''
+
+from math import sqrt
+import numpy
+
+from expony.tiling import assure_stable
+from expony.board import Board as BaseBoard
+from expony.geometry import directions
+from expony import box
+
+value_dtype = box.value_dtype
+
+sqrt3 = sqrt(3)
+
+
+class Tiling(box.Tiling):
+
+    kind = "hex"
+
+    def adjacent(self, a, b):
+        '''
+        Return True if positions a and b are adjacent.
+        '''
+        return (b[0] - a[0], b[1] - a[1]) in directions[self.kind]
+
+
+def make(fresh, size=8):
+    '''
+    Return a hex tiling of given size.
+
+    The size is an int for square (size,size) or a tuple giving (nrows,ncols)
+    '''
+    if isinstance(size, int):
+        size = (size, size)
+
+    if not isinstance(size, tuple):
+        raise TypeError(f'can not make expony.hex.Tiling of size {size}')
+    data = numpy.zeros(size, dtype=value_dtype)
+    t = Tiling(data)
+    for p, r in zip(t.positions(), fresh):
+        t[p] = r
+    assure_stable(t, fresh)
+    return t
+
+
+class Board(BaseBoard):
+
+    def __init__(self, tiling, size=50):
+        '''
+        Create a hex.Board
+
+        The optional size gives the hexagon radius (center to corner) in pixels
+        to set initial frame size.
+        '''
+        self._tiling = tiling
+        self._radius = float(size)
+        self._frame_offset = numpy.zeros(2)
+        self._frame_extent = self._extent(self._radius)
+
+    @property
+    def tiling(self):
+        return self._tiling
+
+    @property
+    def radius(self):
+        '''
+        The hexagon radius (center to corner) in pixels.
+        '''
+        return self._radius
+
+    def _extent(self, radius):
+        nrows, ncols = self.tiling._tiles.shape
+        return numpy.array([radius * (2 + 1.5*(ncols-1)),
+                            radius * sqrt3 * (nrows + 0.5*(ncols-1))])
+
+    def set_frame(self, offset, extent):
+        '''
+        Set the frame and choose the largest radius that fits in it.
+        '''
+        self._frame_offset = numpy.array(offset)
+        self._frame_extent = numpy.array(extent)
+        unit = self._extent(1.0)
+        self._radius = float(numpy.min(self._frame_extent / unit))
+
+    @property
+    def frame(self):
+        return (tuple(self._frame_offset.tolist()),
+                tuple(self._frame_extent.tolist()))
+
+    def position(self, pix):
+        '''
+        Return the (r,q) position of the hexagon containing pixel (xpix,ypix).
+        '''
+        rad = self._radius
+        x, y = numpy.array(pix, dtype=float) - self._frame_offset
+        q = (x - rad) / (1.5*rad)
+        r = (y - 0.5*sqrt3*rad) / (sqrt3*rad) - 0.5*q
+
+        # round in cube coordinates (q, r, s) with q+r+s = 0
+        s = -q - r
+        rq, rr, rs = round(q), round(r), round(s)
+        dq, dr, ds = abs(rq - q), abs(rr - r), abs(rs - s)
+        if dq > dr and dq > ds:
+            rq = -rr - rs
+        elif dr > ds:
+            rr = -rq - rs
+        pos = (int(rr), int(rq))
+        self._check_pos(pos)
+        return pos
+
+    def pixel(self, pos):
+        '''
+        Return (x,y) pixel at the center of the hexagon at position.
+        '''
+        self._check_pos(pos)
+        r, q = pos
+        rad = self._radius
+        pix = numpy.array([rad * (1 + 1.5*q),
+                           rad * sqrt3 * (0.5 + r + 0.5*q)])
+        pix = numpy.floor(pix + self._frame_offset).astype(int)
+        return tuple(pix.tolist())
+
+    def corners(self, pos):
+        '''
+        Return the six (x,y) corner pixels of the hexagon at position.
+        '''
+        cx, cy = self.pixel(pos)
+        angles = numpy.arange(6) * numpy.pi / 3
+        xs = cx + self._radius * numpy.cos(angles)
+        ys = cy + self._radius * numpy.sin(angles)
+        return [(int(x), int(y)) for x, y in zip(xs, ys)]
+
+    def _check_pos(self, pos):
+        nrows, ncols = self.tiling._tiles.shape
+        if not (0 <= pos[0] < nrows and 0 <= pos[1] < ncols):
+            raise ValueError(f'illegal position: {pos}')
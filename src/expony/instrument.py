@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+'''
+Engine instrumentation counters.
+
+Instrumentation is off by default and then costs nothing: the engine code has no
+hooks.  Calling enable() wraps the hot methods of arr.Board, data.Board,
+box.Tiling (and so hex.Tiling) and the functions of funcs and tiling in place
+with counting versions (see expony.patch) and disable() removes them.
+
+  with instrumented() as counters:
+      board = arr.Board(8)
+      while move := board.automove_hint():
+          board.maybe_swap(*move)
+      per_game = counters.end_game()
+
+The counters are:
+
+- matched :: number of matched() calls.
+- cells :: number of tiles compared while walking out from a matched() seed.
+- gravity :: number of gravity passes.
+- combos :: number of gravity passes due to combos, after the first pass of a
+  move.
+- cascade_max :: the most gravity passes caused by a single move.
+- fill_draws :: number of random values drawn to fill or stabilize a board.
+- refill_draws :: number of random values drawn to refill a board after
+  gravity.
+- clones :: number of boards copied.
+- moves :: number of attempted moves (swaps).
+
+and the seconds spent in each phase.  Phases may nest: "swap" includes the
+"match" and "gravity" time of a move.
+
+- hint_time :: scanning for a hint move.
+- swap_time :: making a move, including its combos.
+- match_time :: in matched() calls.
+- gravity_time :: applying gravity including refills.
+'''
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from time import perf_counter
+import numpy
+
+from . import arr, data, funcs, tiling, box, patch
+
+
+class Counters:
+    '''
+    Counts and phase times of the current game and a list of finished games.
+    '''
+
+    counts = ("matched", "cells", "gravity", "combos", "cascade_max",
+              "fill_draws", "refill_draws", "clones", "moves")
+    times = ("hint_time", "swap_time", "match_time", "gravity_time")
+    dtype = numpy.dtype([(n, numpy.int64) for n in counts] +
+                        [(n, numpy.float64) for n in times])
+
+    def __init__(self):
+        self.games = list()
+        self.reset()
+
+    def reset(self):
+        '''
+        Zero the counters of the current game.
+        '''
+        for name in self.counts:
+            setattr(self, name, 0)
+        for name in self.times:
+            setattr(self, name, 0.0)
+
+    def snapshot(self):
+        '''
+        Return the counters of the current game as a dict.
+        '''
+        return {name: getattr(self, name) for name in self.dtype.names}
+
+    def record(self):
+        '''
+        Return the counters of the current game as a numpy record.
+        '''
+        snap = self.snapshot()
+        return numpy.array([tuple(snap.values())], dtype=self.dtype)[0]
+
+    def end_game(self):
+        '''
+        Finish the current game, append its counters to games, reset and
+        return them as a dict.
+        '''
+        snap = self.snapshot()
+        self.games.append(snap)
+        self.reset()
+        return snap
+
+    def records(self):
+        '''
+        Return the counters of all finished games as a numpy record array.
+        '''
+        rows = [tuple(g.values()) for g in self.games]
+        return numpy.array(rows, dtype=self.dtype)
+
+
+# The active counters, if any, and the tokens of our patches.  Wrappers pass
+# straight through while counters is None.
+counters = None
+_patches = list()
+# Per thread depth of apply_gravity calls, draws within are refills.
+_local = threading.local()
+
+
+def _patch(owner, name, make):
+    _patches.append(patch.install(owner, name, make))
+
+
+def _timed(phase, count=None):
+    def make(func):
+        @wraps(func)
+        def wrapper(*args, **kwds):
+            active = counters
+            if active is None:
+                return func(*args, **kwds)
+            if count:
+                setattr(active, count, getattr(active, count) + 1)
+            start = perf_counter()
+            try:
+                return func(*args, **kwds)
+            finally:
+                setattr(active, phase,
+                        getattr(active, phase) + perf_counter() - start)
+        return wrapper
+    return make
+
+
+def _counting(func):
+    '''
+    Wrap a function returning iterables of positions to count the positions
+    that are actually consumed.
+    '''
+    def walk(active, positions):
+        for pos in positions:
+            active.cells += 1
+            yield pos
+
+    @wraps(func)
+    def wrapper(*args, **kwds):
+        ret = func(*args, **kwds)
+        active = counters
+        if active is None:
+            return ret
+        if isinstance(ret, dict):
+            return {k: walk(active, v) for k, v in ret.items()}
+        return [walk(active, r) for r in ret]
+    return wrapper
+
+
+def _cascade(func):
+    '''
+    Count the gravity passes caused by a move.
+    '''
+    @wraps(func)
+    def wrapper(*args, **kwds):
+        active = counters
+        if active is None:
+            return func(*args, **kwds)
+        before = active.gravity
+        ret = func(*args, **kwds)
+        depth = active.gravity - before
+        if depth:
+            active.combos += depth - 1
+            active.cascade_max = max(active.cascade_max, depth)
+        return ret
+    return wrapper
+
+
+def _cloning(func):
+    @wraps(func)
+    def wrapper(self, source=None, *args, **kwds):
+        if counters is not None and isinstance(source, type(self)):
+            counters.clones += 1
+        return func(self, source, *args, **kwds)
+    return wrapper
+
+
+def _refilling(func):
+    @wraps(func)
+    def wrapper(*args, **kwds):
+        _local.refilling = getattr(_local, "refilling", 0) + 1
+        try:
+            return func(*args, **kwds)
+        finally:
+            _local.refilling -= 1
+    return wrapper
+
+
+def _drawing(size_of):
+    def make(func):
+        @wraps(func)
+        def wrapper(*args, **kwds):
+            ret = func(*args, **kwds)
+            if counters is not None:
+                name = ("refill_draws" if getattr(_local, "refilling", 0)
+                        else "fill_draws")
+                setattr(counters, name,
+                        getattr(counters, name) + size_of(args, ret))
+            return ret
+        return wrapper
+    return make
+
+
+def _count(name):
+    def make(func):
+        @wraps(func)
+        def wrapper(*args, **kwds):
+            if counters is not None:
+                setattr(counters, name, getattr(counters, name) + 1)
+            return func(*args, **kwds)
+        return wrapper
+    return make
+
+
+def _randint_size(args, ret):
+    return int(numpy.size(ret))
+
+
+def _install():
+    gravity = _timed("gravity_time", "gravity")
+
+    # numpy backend
+    _patch(arr.Board, "__init__", _cloning)
+    _patch(arr.Board, "matched", _timed("match_time", "matched"))
+    _patch(arr.Board, "cardinal_ranges", _counting)
+    _patch(arr.Board, "apply_gravity", gravity)
+    _patch(arr.Board, "apply_gravity", _refilling)
+    _patch(arr.Board, "randint", _drawing(_randint_size))
+    _patch(arr.Board, "automove_hint", _timed("hint_time"))
+    _patch(arr.Board, "maybe_swap", _timed("swap_time", "moves"))
+    _patch(arr.Board, "maybe_swap", _cascade)
+
+    # list backend
+    _patch(data.Board, "__init__", _cloning)
+    _patch(data.Board, "matched", _timed("match_time", "matched"))
+    _patch(data.Board, "cardinal_ranges", _counting)
+    _patch(data.Board, "random_value", _drawing(lambda a, r: 1))
+    _patch(funcs, "apply_gravity", gravity)
+    _patch(funcs, "apply_gravity", _refilling)
+    _patch(funcs, "maybe_swap", _timed("swap_time", "moves"))
+    _patch(funcs, "maybe_swap", _cascade)
+
+    # tilings
+    _patch(box.Tiling, "clone", _count("clones"))
+    _patch(box.Tiling, "matched", _timed("match_time", "matched"))
+    _patch(box.Tiling, "radii", _counting)
+    _patch(box.Tiling, "compact", _drawing(lambda a, r: len(r)))
+    _patch(tiling, "apply_gravity", gravity)
+    _patch(tiling, "apply_gravity", _refilling)
+    for name in ("apply_swap_inplace", "apply_swap_stepped"):
+        _patch(tiling, name, _timed("swap_time", "moves"))
+        _patch(tiling, name, _cascade)
+
+
+def enable(use=None) -> Counters:
+    '''
+    Enable instrumentation and return the active Counters.
+
+    A given Counters is used, else a new one is made.  If already enabled the
+    active counters are replaced.
+    '''
+    global counters
+    if not _patches:
+        _install()
+    counters = use or Counters()
+    return counters
+
+
+def disable():
+    '''
+    Disable instrumentation, removing our wrappers from the engine code.
+    '''
+    global counters
+    while _patches:
+        patch.remove(_patches.pop())
+    counters = None
+
+
+@contextmanager
+def instrumented(use=None):
+    '''
+    A context manager enabling instrumentation and yielding its Counters.
+    '''
+    try:
+        yield enable(use)
+    finally:
+        disable()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+'''
+Load generation against the game engine.
+
+N simulated players play concurrently.  Each player starts a game, then
+repeatedly thinks for a random time and makes a move until no legal move
+remains, when it starts a new game.  A player follows one strategy drawn from
+a weighted mix:
+
+- hint :: ask for a hint (automove_hint) and make that move.
+- random :: try a swap of a random tile and a random neighbor, which is
+  usually rejected by maybe_swap.
+
+The latency of each engine call ("new", "hint" and "swap") is recorded and
+reported as p50/p95/p99 along with the call throughput.  The engine is either
+in-process (a server.Games driven from a thread pool) or a running game server:
+
+  python -m expony.loadgen --players 100 --duration 30 --think 0.05
+  python -m expony.loadgen --players 1000 --port 7474 --mix hint=1,random=3
+'''
+import sys
+import json
+import random
+import asyncio
+import argparse
+from time import perf_counter
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
+from .server import Games, GameClient
+
+
+class LocalTarget:
+    '''
+    Drive an in-process Games from a pool of threads.
+    '''
+
+    def __init__(self, jobs=4):
+        self.games = Games()
+        self.executor = ThreadPoolExecutor(jobs)
+
+    async def connect(self):
+        return self
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def new(self, shape, seed):
+        return await self._call(self.games.new, shape, seed)
+
+    async def hint(self, gid):
+        return await self._call(self.games.hint, gid)
+
+    async def swap(self, gid, seed, targ):
+        points, delta = await self._call(self.games.swap, gid, seed, targ)
+        return points
+
+    async def end(self, gid):
+        self.games.close(gid)
+
+    async def close(self):
+        pass
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+class RemoteTarget:
+    '''
+    Drive a game server, with one connection per player.
+    '''
+
+    def __init__(self, host="127.0.0.1", port=7474):
+        self.host = host
+        self.port = port
+
+    async def connect(self):
+        return RemoteSession(await GameClient.connect(self.host, self.port))
+
+    def shutdown(self):
+        pass
+
+
+class RemoteSession:
+
+    def __init__(self, client):
+        self.client = client
+
+    async def new(self, shape, seed):
+        return (await self.client.new(shape, seed))["game"]
+
+    async def hint(self, gid):
+        return await self.client.hint(gid)
+
+    async def swap(self, gid, seed, targ):
+        return (await self.client.swap(gid, seed, targ))["points"]
+
+    async def end(self, gid):
+        await self.client.request("close", game=gid)
+
+    async def close(self):
+        await self.client.close()
+
+
+def parse_mix(text):
+    '''
+    Parse a strategy mix like "hint=3,random=1" to a dict of weights.
+    '''
+    mix = dict()
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("hint", "random"):
+            raise ValueError(f'unknown strategy: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def random_swap(shape, rng):
+    row, col = rng.randrange(shape[0]), rng.randrange(shape[1])
+    drow, dcol = rng.choice(((0,1), (1,0), (0,-1), (-1,0)))
+    targ = (min(max(row + drow, 0), shape[0]-1),
+            min(max(col + dcol, 0), shape[1]-1))
+    return (row, col), targ
+
+
+class LoadGen:
+    '''
+    Run simulated players against a target and collect call latencies.
+    '''
+
+    def __init__(self, target, players=10, duration=10.0, think=0.0,
+                 mix=None, shape=(8,8), seed=0):
+        self.target = target
+        self.players = players
+        self.duration = duration
+        self.think = think
+        self.mix = mix or dict(hint=1.0)
+        self.shape = tuple(shape)
+        self.seed = seed
+        self.latency = defaultdict(list)
+        self.games = 0
+        self.elapsed = 0.0
+
+    async def _timed(self, op, coro):
+        start = perf_counter()
+        ret = await coro
+        self.latency[op].append(perf_counter() - start)
+        return ret
+
+    async def player(self, index, deadline):
+        rng = random.Random(self.seed * 1000003 + index)
+        strategy = rng.choices(list(self.mix), list(self.mix.values()))[0]
+        session = await self.target.connect()
+        gid = None
+        try:
+            while perf_counter() < deadline:
+                if gid is None:
+                    gid = await self._timed("new", session.new(
+                        self.shape, rng.randrange(2**31)))
+                    self.games += 1
+                if self.think:
+                    await asyncio.sleep(rng.expovariate(1.0 / self.think))
+                if strategy == "random":
+                    await self._timed("swap", session.swap(
+                        gid, *random_swap(self.shape, rng)))
+                    continue
+                hint = await self._timed("hint", session.hint(gid))
+                if not hint:
+                    await session.end(gid)
+                    gid = None
+                    continue
+                await self._timed("swap", session.swap(gid, *hint))
+        finally:
+            if gid is not None:
+                await session.end(gid)
+            await session.close()
+
+    async def arun(self):
+        start = perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*[self.player(i, deadline)
+                               for i in range(self.players)])
+        self.elapsed = perf_counter() - start
+        return self.report()
+
+    def run(self):
+        return asyncio.run(self.arun())
+
+    def report(self):
+        '''
+        Return dict of results keyed by op with count, ops/s and ms latency
+        percentiles.
+        '''
+        ops = dict()
+        for op, lat in sorted(self.latency.items()):
+            ms = numpy.array(lat) * 1000
+            p50, p95, p99 = numpy.percentile(ms, [50, 95, 99])
+            ops[op] = dict(count=len(lat), per_s=len(lat) / self.elapsed,
+                           p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=ms.max())
+        return dict(players=self.players, seconds=self.elapsed,
+                    games=self.games, mix=self.mix, ops=ops)
+
+
+def print_report(rep):
+    print(f'{rep["players"]} players, {rep["games"]} games in '
+          f'{rep["seconds"]:.1f} s')
+    print(f'{"op":6s} {"count":>8s} {"ops/s":>10s} {"p50 ms":>9s} '
+          f'{"p95 ms":>9s} {"p99 ms":>9s} {"max ms":>9s}')
+    for op, r in rep["ops"].items():
+        print(f'{op:6s} {r["count"]:8d} {r["per_s"]:10.1f} {r["p50_ms"]:9.3f} '
+              f'{r["p95_ms"]:9.3f} {r["p99_ms"]:9.3f} {r["max_ms"]:9.3f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.loadgen",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds to run")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="mean think time in seconds before each move")
+    parser.add_argument("--mix", default="hint=1",
+                        help="strategy weights, eg hint=3,random=1")
+    parser.add_argument("--shape", default="8x8", help="board shape as RxC")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="threads driving the in-process engine")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="drive the game server on this port instead of "
+                        "the in-process engine")
+    parser.add_argument("--output", default=None,
+                        help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.port:
+        target = RemoteTarget(args.host, args.port)
+    else:
+        target = LocalTarget(args.jobs)
+    shape = tuple(int(n) for n in args.shape.lower().split("x"))
+    gen = LoadGen(target, args.players, args.duration, args.think,
+                  parse_mix(args.mix), shape, args.seed)
+    try:
+        rep = gen.run()
+    finally:
+        target.shutdown()
+    print_report(rep)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(rep, fp, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
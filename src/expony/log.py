@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+'''
+Structured event logging.
+
+Engine and GUI modules log events to standard library loggers named after the
+module (under "expony").  The message is a short event name and the event
+fields are given as extra:
+
+  log = logging.getLogger(__name__)
+  log.info("move", extra=dict(seed=seed, targ=targ, points=points))
+
+On hot paths the call is guarded so that a disabled level costs one cached
+check and builds nothing:
+
+  if log.isEnabledFor(logging.DEBUG):
+      log.debug("random", extra=dict(value=r))
+
+Nothing is shown until configure() attaches a handler, either human readable
+lines on stderr or one JSON object per line in a file.  Chatty debug events
+can be sampled to keep one in N of each event.  The command line and the GUIs
+configure from the EXPONY_LOG_LEVEL, EXPONY_LOG_FILE and EXPONY_LOG_SAMPLE
+environment variables.
+'''
+import os
+import sys
+import json
+import logging
+from collections import defaultdict
+
+
+# Attributes of every LogRecord, the rest are event fields.
+_standard = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) \
+    | {"message", "asctime", "taskName"}
+
+
+def fields(record):
+    '''
+    Return dict of the event fields of a log record.
+    '''
+    return {key: val for key, val in vars(record).items()
+            if key not in _standard}
+
+
+class JsonlFormatter(logging.Formatter):
+    '''
+    Format a record as one line of JSON.
+
+    The object has the time (unix seconds), level, logger and event (the
+    message) and the event fields.  Values JSON does not know are given as
+    their str().
+    '''
+
+    def format(self, record):
+        obj = dict(time=record.created, level=record.levelname,
+                   logger=record.name, event=record.getMessage())
+        obj.update(fields(record))
+        if record.exc_info:
+            obj["exc"] = self.formatException(record.exc_info)
+        return json.dumps(obj, default=str)
+
+
+class EventFormatter(logging.Formatter):
+    '''
+    Format a record as a human readable line with its fields as key=value.
+    '''
+
+    def __init__(self):
+        super().__init__("%(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extra = " ".join(f'{key}={val}' for key, val in fields(record).items())
+        return f'{line} {extra}' if extra else line
+
+
+class SampleFilter(logging.Filter):
+    '''
+    Pass one in every records of each event at or below level.
+
+    Records above level always pass.  The count is kept per (logger, event)
+    and the first record of each event passes.
+    '''
+
+    def __init__(self, every=100, level=logging.DEBUG):
+        super().__init__()
+        self.every = every
+        self.level = level
+        self.counts = defaultdict(int)
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        key = (record.name, record.msg)
+        count = self.counts[key]
+        self.counts[key] = count + 1
+        return count % self.every == 0
+
+
+def configure(level="WARNING", path=None, sample=1, logger="expony"):
+    '''
+    Send events at level and above to a JSONL file at path or else to stderr.
+
+    A sample above one keeps one in that many of each debug event.  Return the
+    handler, which replaces any that an earlier configure() attached.
+    '''
+    log = logging.getLogger(logger)
+    for handler in list(log.handlers):
+        if getattr(handler, "_expony", False):
+            log.removeHandler(handler)
+            handler.close()
+
+    if path:
+        handler = logging.FileHandler(path)
+        handler.setFormatter(JsonlFormatter())
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(EventFormatter())
+    handler._expony = True
+    if sample > 1:
+        handler.addFilter(SampleFilter(sample))
+    log.addHandler(handler)
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+    return handler
+
+
+def configure_from_env(environ=os.environ):
+    '''
+    Configure from EXPONY_LOG_* variables, if any is set.
+    '''
+    level = environ.get("EXPONY_LOG_LEVEL")
+    path = environ.get("EXPONY_LOG_FILE")
+    if not (level or path):
+        return
+    return configure(level or "INFO", path,
+                     int(environ.get("EXPONY_LOG_SAMPLE", 1)))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+'''
+Shared in-place wrapping of engine code.
+
+expony.instrument, expony.trace and expony.heatmap wrap methods of the boards
+and functions of the engine modules in place.  Each may be turned on and off
+at any time and in any order, so they do not save and restore what they
+replace themselves.  Instead the wrappers of each attribute are kept here in
+a chain over the original:
+
+  token = install(arr.Board, "maybe_swap", make)
+  ...
+  remove(token)
+
+where make(func) returns a function wrapping func.  Removing a wrapper
+rebuilds its chain from the original and the wrappers that remain, in the
+order they were installed.  The original is put back when none remain.
+'''
+
+# (owner, name) -> (original, list of (token, make))
+_chains = dict()
+# token -> (owner, name)
+_tokens = dict()
+
+
+def _rebuild(key):
+    owner, name = key
+    orig, makes = _chains[key]
+    func = orig
+    for _, make in makes:
+        func = make(func)
+    setattr(owner, name, func)
+    if not makes:
+        del _chains[key]
+
+
+def install(owner, name, make):
+    '''
+    Wrap the attribute name of owner with make and return a token to remove().
+    '''
+    key = (owner, name)
+    if key not in _chains:
+        _chains[key] = (vars(owner)[name], list())
+    token = object()
+    _chains[key][1].append((token, make))
+    _tokens[token] = key
+    _rebuild(key)
+    return token
+
+
+def remove(token):
+    '''
+    Remove the wrapper installed with token.
+    '''
+    key = _tokens.pop(token)
+    makes = _chains[key][1]
+    makes[:] = [(t, m) for t, m in makes if t is not token]
+    _rebuild(key)
+
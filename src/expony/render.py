@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+'''
+Cached, dirty-rect drawing of board tiles with pygame.
+
+A TileRenderer pre-renders one surface for each (value, tile size, border
+state) on first use and remembers what it last drew at each position so that
+drawing a board only blits the tiles that changed and returns their rects for
+pygame.display.update().
+
+  renderer = TileRenderer((100, 100))
+  dirty = renderer.draw(screen, ((pos, pix, value, "normal") for ...))
+  pygame.display.update(dirty)
+'''
+import pygame
+
+
+tile_colors = [
+    '#000000', # black               0
+    '#0A9396', # Dark cyan           1/2
+    '#E9D8A6', # Beige               2/4
+    '#EE9B00', # Yellowish orange    3/8
+    '#CA6702', # Browny orange       4/16
+    '#005F73', # Petrol              5/32
+    '#AE2012', # Deep red            6/64
+    '#86350F', # Reddish brown       7/128
+    '#94D2BD', # Pale teal           8/256
+    '#FF8080', # Salmon pink         9/512
+    '#FFCC80', # Wheat              10/1024
+    '#E6FF80', # Light yellow green 11/2048
+    '#99FF80', # Light green        12/4096
+    '#80FFB3', #                    13/8096
+]
+
+# Values drawn with black rather than white text.
+dark_text = (2, 8, 9, 10, 11, 12, 13)
+
+# The border color of each tile state.
+border_colors = dict(
+    normal = (255, 255, 255),
+    seed = (0, 0, 0),
+    over = (255, 0, 0),
+)
+
+
+class TileRenderer:
+    '''
+    Draw tiles of one size from a cache of pre-rendered surfaces.
+    '''
+
+    def __init__(self, tile_shape_pix, border=10):
+        self.tile_shape_pix = tuple(tile_shape_pix)
+        self.border = border
+        self._tiles = dict()
+        self._fonts = dict()
+        # pos -> (pix, value, state) last drawn
+        self.shown = dict()
+
+    def font(self, size):
+        '''
+        Return the default font at size, made once.
+        '''
+        font = self._fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def tile(self, value, state="normal"):
+        '''
+        Return the surface of a tile of value in state.
+        '''
+        key = (value, self.tile_shape_pix, state)
+        surf = self._tiles.get(key)
+        if surf is not None:
+            return surf
+
+        width, height = self.tile_shape_pix
+        surf = pygame.Surface((width, height))
+        surf.fill(tile_colors[value])
+        if value:
+            color = (0, 0, 0) if value in dark_text else (255, 255, 255)
+            # The text size that we long used for 100 pixel tiles.
+            size = max(8, int(36 * min(width, height) / 100))
+            text = self.font(size).render(str(2**int(value)), True, color)
+            surf.blit(text, text.get_rect(center=(width//2, height//2)))
+        pygame.draw.rect(surf, border_colors[state], surf.get_rect(), self.border)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()
+        self._tiles[key] = surf
+        return surf
+
+    def draw(self, surface, tiles):
+        '''
+        Draw tiles that differ from what was last drawn.
+
+        The tiles are an iterable of (pos, pix, value, state) with pix the
+        top-left pixel of the tile in surface.  Return the list of rects that
+        were drawn.
+        '''
+        dirty = list()
+        shown = self.shown
+        for pos, pix, value, state in tiles:
+            have = (pix, value, state)
+            if shown.get(pos) == have:
+                continue
+            shown[pos] = have
+            dirty.append(surface.blit(self.tile(value, state), pix))
+        return dirty
+
+    def invalidate(self):
+        '''
+        Forget what was drawn so the next draw() redraws every tile.
+        '''
+        self.shown.clear()
+
+    def text(self, surface, msg, center, size=72, color=(0,255,0)):
+        '''
+        Draw a line of text centered on a pixel and return its rect.
+
+        Tiles under the text are redrawn by the next draw().
+        '''
+        text = self.font(size).render(msg, True, color)
+        rect = surface.blit(text, text.get_rect(center=center))
+        for pos, (pix, value, state) in list(self.shown.items()):
+            if rect.colliderect(pygame.Rect(pix, self.tile_shape_pix)):
+                del self.shown[pos]
+        return rect
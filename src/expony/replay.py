@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+'''
+Rebuild any position of a recorded game.
+
+An expony game on an arr.Board is deterministic given its random seed and its
+list of moves (see docs/autoplay.org).  A Record holds exactly that.  A Replay
+plays a Record forward once, keeping a checkpoint (tiles and RNG state) every
+"spacing" moves so that the board at move k can later be rebuilt by loading the
+nearest checkpoint at or before k and replaying only the remaining moves.
+'''
+from typing import List, Tuple
+from dataclasses import dataclass, field
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+from .data import Position
+from .arr import Board
+
+# The board state just before move number "move" is applied.
+Checkpoint = namedtuple("Checkpoint", "move tiles state")
+
+
+@dataclass
+class Record:
+    '''
+    Everything needed to reproduce one game.
+    '''
+
+    shape: Tuple[int]
+    random_seed: int
+    moves: List[Tuple[Position, Position]] = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def to_dict(self):
+        '''
+        Return a JSON-friendly dict representation.
+        '''
+        return dict(shape=list(self.shape),
+                    random_seed=self.random_seed,
+                    moves=[[list(s), list(t)] for s, t in self.moves])
+
+    @classmethod
+    def from_dict(cls, dat):
+        '''
+        Return a Record from its to_dict() representation.
+        '''
+        moves = [(tuple(s), tuple(t)) for s, t in dat["moves"]]
+        return cls(tuple(dat["shape"]), dat["random_seed"], moves)
+
+
+def autoplay_record(shape=Board.default_shape, random_seed=None,
+                    strategy="hint") -> Record:
+    '''
+    Play a game with an autoplay strategy and return its Record.
+
+    The strategy is named as in expony.autoplay and the game is the one that
+    autoplay.play() gives for the same seed.
+    '''
+    from .autoplay import strategies
+    choose = strategies[strategy]
+    board = Board(shape, random_seed=random_seed)
+    rng = numpy.random.default_rng(board.random_seed)
+    rec = Record(board.tiles.shape, board.random_seed)
+    while move := choose(board, rng):
+        board.maybe_swap(*move)
+        rec.moves.append(tuple(move))
+    return rec
+
+
+class Replay:
+    '''
+    Seekable access to the boards of a Record.
+    '''
+
+    def __init__(self, record: Record, spacing=100):
+        '''
+        Play the record forward, storing a checkpoint every spacing moves.
+        '''
+        if spacing < 1:
+            raise ValueError(f'checkpoint spacing must be positive: {spacing}')
+        self.record = record
+        self.spacing = spacing
+        self.checkpoints = list()
+
+        board = Board(record.shape, random_seed=record.random_seed)
+        for k, move in enumerate(record.moves):
+            if k % spacing == 0:
+                self.checkpoints.append(self._checkpoint(board, k))
+            self._play(board, k)
+        if len(record) % spacing == 0:
+            self.checkpoints.append(self._checkpoint(board, len(record)))
+
+    def __len__(self):
+        return len(self.record)
+
+    def _checkpoint(self, board, k):
+        return Checkpoint(k, numpy.copy(board.tiles),
+                          board.rng.bit_generator.state)
+
+    def _play(self, board, k):
+        seed, targ = self.record.moves[k]
+        if not board.maybe_swap(seed, targ):
+            raise ValueError(f'illegal move {k} in record: {seed} -> {targ}')
+
+    def board(self, k) -> Board:
+        '''
+        Return a new Board holding the state just before move k.
+
+        A k equal to the number of moves gives the final board.  Negative k
+        counts from the end as with a list index.
+        '''
+        nmoves = len(self.record)
+        if k < 0:
+            k += nmoves + 1
+        if k < 0 or k > nmoves:
+            raise IndexError(f'move {k} out of range for {nmoves} moves')
+
+        cp = self.checkpoints[k // self.spacing]
+        board = Board(cp.tiles, random_seed=self.record.random_seed)
+        board.rng.bit_generator.state = cp.state
+        for kk in range(cp.move, k):
+            self._play(board, kk)
+        return board
+
+    def __getitem__(self, k) -> Board:
+        return self.board(k)
+
+
+def _rebuild_one(record, moves, spacing):
+    replay = Replay(record, spacing)
+    return [replay.board(k) for k in moves]
+
+
+def rebuild_many(requests, spacing=100, jobs=1) -> List[List[Board]]:
+    '''
+    Rebuild many positions from many games.
+
+    The requests is a sequence of (record, moves) pairs where moves is a
+    sequence of move numbers to rebuild from that record.  A list of lists of
+    Board is returned in the order of requests.
+
+    With jobs larger than one, the records are replayed in parallel over that
+    many worker processes.
+    '''
+    requests = [(rec, list(moves)) for rec, moves in requests]
+    if jobs <= 1:
+        return [_rebuild_one(rec, moves, spacing) for rec, moves in requests]
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_rebuild_one, rec, moves, spacing)
+                   for rec, moves in requests]
+        return [f.result() for f in futures]
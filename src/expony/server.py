@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+'''
+An asyncio game server.
+
+Clients connect over TCP and exchange JSON objects, one per line.  Each request
+may carry an "id" that is copied to its response.  The operations are:
+
+- new :: {"op":"new", "shape":[R,C], "seed":S} -> {"game":G, "tiles":[[...]],
+  "score":0}.  Shape and seed are optional.
+- swap :: {"op":"swap", "game":G, "seed":[r,c], "targ":[r,c]} -> {"points":P,
+  "score":S, "moves":M, "delta":[[r,c,v],...]} where delta lists the cells
+  changed by the move and their new values.
+- hint :: {"op":"hint", "game":G} -> {"hint":[[r,c],[r,c]]}, or null hint when
+  no legal move remains and so the game is over.
+- state :: {"op":"state", "game":G} -> {"tiles":..., "score":S, "moves":M}.
+- close :: {"op":"close", "game":G} -> {"closed":G}.
+- stats :: {"op":"stats"} -> {"games":N, "bytes":B}.
+
+An error gives {"error":message}.  Only the connection that made a game may
+swap in or close it and games are dropped when that connection closes.
+
+Each game is held compactly as its uint8 tiles, its score and the seed and
+draw index of the tiling.FreshStream that gives its fresh tiles, so tens of
+thousands of games take a few MB.  A move rebuilds an arr.Board from this
+state and may cascade through several passes of matching and refilling, and a
+hint is a scan for a legal move.  Either can take milliseconds and so both are
+run in an executor to keep the event loop responsive to other clients.
+
+  python -m expony.server --port 7474
+'''
+import sys
+import json
+import asyncio
+import argparse
+from itertools import count
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from .arr import Board
+from .tiling import FreshStream
+from .workers import hint_job
+
+
+def swap_job(tiles, stream_seed, index, seed, targ):
+    '''
+    Attempt a move on the state of a game and return (points, tiles, index),
+    the new tiles and fresh stream index being those after the move.
+    '''
+    board = Game(tiles, stream_seed, index).board()
+    points = int(board.maybe_swap(tuple(seed), tuple(targ)))
+    return points, board.tiles.astype(numpy.uint8), board.fresh.index
+
+
+class Game:
+    '''
+    The compact state of one game.
+    '''
+    __slots__ = ("tiles", "seed", "index", "score", "moves")
+
+    def __init__(self, tiles, seed, index, score=0, moves=0):
+        self.tiles = tiles
+        self.seed = seed
+        self.index = index
+        self.score = score
+        self.moves = moves
+
+    @property
+    def nbytes(self):
+        return self.tiles.nbytes + 5 * 8
+
+    def board(self):
+        '''
+        Return an arr.Board in the state of this game.
+        '''
+        return Board(self.tiles.astype(numpy.int64), random_seed=0,
+                     fresh=FreshStream(self.seed, index=self.index))
+
+
+class Games:
+    '''
+    The engine API of the server: a collection of games addressed by number.
+
+    This has no networking and may be used directly in-process.
+    '''
+
+    def __init__(self):
+        self.games = dict()
+        self._ids = count(1)
+
+    def __len__(self):
+        return len(self.games)
+
+    def __getitem__(self, gid):
+        try:
+            return self.games[gid]
+        except KeyError:
+            raise KeyError(f'no such game: {gid}') from None
+
+    @property
+    def nbytes(self):
+        return sum(g.nbytes for g in self.games.values())
+
+    def new(self, shape=Board.default_shape, seed=None):
+        '''
+        Start a game and return its number.
+        '''
+        if seed is None:
+            seed = int(numpy.random.randint(0, 2**31))
+        fresh = FreshStream(seed)
+        board = Board(tuple(shape), fresh=fresh)
+        gid = next(self._ids)
+        self.games[gid] = Game(board.tiles.astype(numpy.uint8), seed, fresh.index)
+        return gid
+
+    def swap(self, gid, seed, targ):
+        '''
+        Attempt a move and return (points, delta).
+        '''
+        game = self[gid]
+        return self.update(gid, *swap_job(game.tiles, game.seed, game.index,
+                                          seed, targ))
+
+    def update(self, gid, points, tiles, index):
+        '''
+        Apply the result of a swap_job() to a game and return (points, delta)
+        where delta lists the changed cells and their new values.
+        '''
+        game = self[gid]
+        if not points:
+            return 0, []
+        changed = numpy.argwhere(tiles != game.tiles)
+        delta = [[int(r), int(c), int(tiles[r,c])] for r, c in changed]
+        game.tiles = tiles
+        game.index = index
+        game.score += points
+        game.moves += 1
+        return points, delta
+
+    def hint(self, gid):
+        return hint_job(self[gid].tiles)
+
+    def close(self, gid):
+        self.games.pop(gid, None)
+
+
+class GameServer:
+    '''
+    Serve Games over JSON lines on TCP.
+
+    Swaps and hints run in the executor, by default a pool of jobs processes.
+    '''
+
+    def __init__(self, games=None, executor=None, jobs=None):
+        self.games = Games() if games is None else games
+        self.executor = executor or ProcessPoolExecutor(jobs)
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=7474):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host="127.0.0.1", port=7474):
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        mine = set()
+        try:
+            while line := await reader.readline():
+                req = None
+                try:
+                    req = json.loads(line)
+                    res = await self.dispatch(req, mine)
+                except Exception as err:
+                    req = req if isinstance(req, dict) else dict()
+                    res = dict(error=f'{type(err).__name__}: {err}')
+                if "id" in req:
+                    res["id"] = req["id"]
+                writer.write(json.dumps(res).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for gid in mine:
+                self.games.close(gid)
+            writer.close()
+
+    @staticmethod
+    def _own(req, mine):
+        gid = req["game"]
+        if gid not in mine:
+            raise PermissionError(f'game {gid} is not of this connection')
+        return gid
+
+    async def dispatch(self, req, mine):
+        op = req.get("op")
+        games = self.games
+        if op == "new":
+            gid = games.new(req.get("shape", Board.default_shape), req.get("seed"))
+            mine.add(gid)
+            return dict(game=gid, tiles=games[gid].tiles.tolist(), score=0)
+        if op == "swap":
+            gid = self._own(req, mine)
+            game = games[gid]
+            loop = asyncio.get_running_loop()
+            res = await loop.run_in_executor(
+                self.executor, swap_job, game.tiles, game.seed, game.index,
+                req["seed"], req["targ"])
+            points, delta = games.update(gid, *res)
+            game = games[gid]
+            return dict(points=points, score=game.score, moves=game.moves,
+                        delta=delta)
+        if op == "hint":
+            tiles = games[req["game"]].tiles
+            loop = asyncio.get_running_loop()
+            hint = await loop.run_in_executor(self.executor, hint_job, tiles)
+            return dict(hint=hint)
+        if op == "state":
+            game = games[req["game"]]
+            return dict(tiles=game.tiles.tolist(), score=game.score,
+                        moves=game.moves)
+        if op == "close":
+            gid = self._own(req, mine)
+            games.close(gid)
+            mine.discard(gid)
+            return dict(closed=gid)
+        if op == "stats":
+            return dict(games=len(games), bytes=games.nbytes)
+        raise ValueError(f'unknown op: {op}')
+
+
+class GameClient:
+    '''
+    A stand-in client of a GameServer.
+    '''
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = count(1)
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=7474):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op, **kwds):
+        '''
+        Send one request and return its response, raising on error.
+        '''
+        kwds.update(op=op, id=next(self._ids))
+        self.writer.write(json.dumps(kwds).encode() + b"\n")
+        await self.writer.drain()
+        res = json.loads(await self.reader.readline())
+        if "error" in res:
+            raise RuntimeError(res["error"])
+        return res
+
+    async def new(self, shape=Board.default_shape, seed=None):
+        return await self.request("new", shape=list(shape), seed=seed)
+
+    async def swap(self, game, seed, targ):
+        return await self.request("swap", game=game, seed=list(seed),
+                                  targ=list(targ))
+
+    async def hint(self, game):
+        return (await self.request("hint", game=game))["hint"]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def autoplay(self, shape=Board.default_shape, seed=None, max_moves=None):
+        '''
+        Play a game by hints to its end and return (score, moves).
+        '''
+        game = (await self.new(shape, seed))["game"]
+        score = moves = 0
+        while max_moves is None or moves < max_moves:
+            hint = await self.hint(game)
+            if not hint:
+                break
+            res = await self.swap(game, *hint)
+            score, moves = res["score"], res["moves"]
+        await self.request("close", game=game)
+        return score, moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m expony.server",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7474)
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="number of hint worker processes")
+    args = parser.parse_args(argv)
+    server = GameServer(jobs=args.jobs)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+'''
+Autoplay simulation on a background thread.
+
+A Simulation plays games by the automove hint on its own thread and publishes
+a Snapshot after each move.  A display samples the latest snapshot at its own
+frame rate and so may skip moves while the simulation runs at full engine
+speed or at a set number of moves per second.  Pause, step, speed and reset
+take effect at once from any thread.
+
+This needs no GUI toolkit.
+'''
+import threading
+from time import monotonic
+from collections import namedtuple
+
+from .arr import Board
+
+
+Snapshot = namedtuple("Snapshot",
+                      "seq tiles total_points nturns game_over random_seed")
+Snapshot.__doc__ = '''
+The state of a simulated game after a move.  The seq counts snapshots.
+'''
+
+
+class Simulation(threading.Thread):
+    '''
+    Play games by the automove hint on a thread.
+
+    The speed is the maximum moves per second, None for as fast as possible.
+    '''
+
+    def __init__(self, shape=Board.default_shape, random_seed=None, speed=None):
+        super().__init__(daemon=True)
+        self.shape = shape
+        self.speed = speed
+        self.paused = False
+        self._steps = 0
+        self._stopping = False
+        self._reset = None
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._new_game(random_seed)
+
+    def _new_game(self, random_seed):
+        self.board = Board(self.shape, random_seed=random_seed)
+        self.board.assure_stable()
+        self.total_points = 0
+        self.nturns = 0
+        self.game_over = False
+        self._publish()
+
+    def _publish(self):
+        self._seq += 1
+        # A single assignment, so readers always see a whole snapshot.
+        self._latest = Snapshot(self._seq, self.board.tiles.copy(),
+                                self.total_points, self.nturns, self.game_over,
+                                self.board.random_seed)
+
+    def snapshot(self) -> Snapshot:
+        '''
+        Return the latest published snapshot.
+        '''
+        return self._latest
+
+    def _wait(self):
+        # Called with the condition held.  Return False to stop.
+        while True:
+            if self._stopping:
+                return False
+            if self._reset is not None:
+                self._new_game(self._reset[0])
+                self._reset = None
+                continue
+            if self.game_over:
+                self._cond.wait()
+                continue
+            if self.paused:
+                if self._steps:
+                    self._steps -= 1
+                    return True
+                self._cond.wait()
+                continue
+            return True
+
+    def run(self):
+        next_time = monotonic()
+        while True:
+            with self._cond:
+                if not self._wait():
+                    return
+                if self.speed and not self.paused:
+                    now = monotonic()
+                    if now < next_time:
+                        # wake early on any control change
+                        self._cond.wait(next_time - now)
+                        continue
+                    next_time = max(now, next_time + 1.0 / self.speed)
+            self.move()
+
+    def move(self):
+        '''
+        Make one move on the calling thread, return its points.
+        '''
+        move = self.board.automove_hint()
+        if not move:
+            self.game_over = True
+            self._publish()
+            return 0
+        points = self.board.maybe_swap(*move)
+        self.total_points += int(points)
+        self.nturns += 1
+        self._publish()
+        return points
+
+    def _control(self, **attrs):
+        with self._cond:
+            for key, val in attrs.items():
+                setattr(self, key, val)
+            self._cond.notify_all()
+
+    def pause(self):
+        self._control(paused=True)
+
+    def resume(self):
+        self._control(paused=False, _steps=0)
+
+    def toggle(self):
+        self._control(paused=not self.paused, _steps=0)
+
+    def step(self, count=1):
+        '''
+        Pause, if not already, and make count more moves.
+        '''
+        with self._cond:
+            self.paused = True
+            self._steps += count
+            self._cond.notify_all()
+
+    def faster(self):
+        '''
+        Double the speed, past 10000 moves per second is unlimited.
+        '''
+        if self.speed:
+            speed = self.speed * 2
+            self._control(speed=None if speed > 10000 else speed)
+
+    def slower(self):
+        '''
+        Halve the speed, from unlimited go to 100 moves per second.
+        '''
+        self._control(speed=max(1, self.speed / 2) if self.speed else 100)
+
+    def reset(self, random_seed=None):
+        '''
+        Start a new game.
+        '''
+        self._control(_reset=(random_seed,))
+
+    def stop(self):
+        '''
+        Stop the thread and wait for it.
+        '''
+        self._control(_stopping=True)
+        if self.is_alive():
+            self.join()
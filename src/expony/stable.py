@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+'''
+Construct stable boards directly.
+
+The assure_stable() methods fill a board at random and then repeatedly scan for
+matches and re-randomize.  Here, cells are instead filled one at a time in
+row-major order and a cell never takes a value that would complete a line of
+min_match equal values with the cells already filled before it.  No scan or
+retry is needed and many boards are filled at once with numpy.
+
+Distribution
+------------
+
+Each cell is drawn uniformly from the values that are still allowed given the
+cells filled before it along each match axis.  The probability of a board is
+thus the product over cells of 1/k where k is the number of allowed values at
+that cell.  This is not uniform over the set of all stable boards: boards with
+more "near lines" (pairs that forced exclusions) are slightly favored.  The
+process is symmetric under any permutation of the values so the marginal
+distribution of every cell is uniform over [vmin,vmax].  It is also not the
+distribution produced by assure_stable() and the same seed gives different
+boards than arr.Board(shape, random_seed).
+'''
+import numpy
+from .geometry import geometry, directions
+
+_predecessors = dict()
+
+def predecessors(shape, kind="box", length=3):
+    '''
+    Return the shared table of preceding lines.
+
+    The table is a list indexed by flat position giving an int array of shape
+    (nlines, length-1).  Each row holds the flat indices of the cells just
+    before the position along one match axis, in the direction of earlier
+    row-major fill order.  Axes that run off the board are omitted.
+    '''
+    key = (shape, kind, length)
+    try:
+        return _predecessors[key]
+    except KeyError:
+        pass
+    geom = geometry(shape, kind)
+    nrows, ncols = geom.shape
+    backward = [s for s in directions[geom.kind] if s < (0,0)]
+    ret = list()
+    for row, col in geom.positions:
+        lines = list()
+        for step in backward:
+            line = [(row + k*step[0], col + k*step[1]) for k in range(1, length)]
+            if all(0 <= r < nrows and 0 <= c < ncols for r, c in line):
+                lines.append([r*ncols + c for r, c in line])
+        ret.append(numpy.array(lines, dtype=numpy.intp).reshape(-1, length-1))
+    _predecessors[key] = ret
+    return ret
+
+
+def make_stable(shape=(8,8), rng=None, count=None,
+                vmin=1, vmax=3, kind="box", min_match=3):
+    '''
+    Return tiles of stable boards.
+
+    The shape gives (nrows,ncols).  The rng is a numpy Generator or a seed for
+    one.  Values are in [vmin,vmax], inclusive, which by default matches the
+    initial values of arr.Board.  The kind names a geometry.directions.
+
+    If count is None a single 2D array is returned else an array of shape
+    (count, nrows, ncols) holding count independent boards.
+    '''
+    if not isinstance(rng, numpy.random.Generator):
+        rng = numpy.random.default_rng(rng)
+    nvals = vmax - vmin + 1
+    naxes = len(directions[kind])//2
+    if nvals <= naxes:
+        raise ValueError(f'need more than {naxes} values for {kind}: '
+                         f'[{vmin},{vmax}]')
+
+    nboards = 1 if count is None else count
+    ncells = shape[0]*shape[1]
+    tiles = numpy.zeros((nboards, ncells), dtype=numpy.int64)
+    boards = numpy.arange(nboards)
+    for ind, lines in enumerate(predecessors(shape, kind, min_match)):
+        allowed = numpy.ones((nboards, nvals), dtype=bool)
+        for line in lines:
+            vals = tiles[:, line]
+            same = numpy.all(vals == vals[:, :1], axis=1)
+            allowed[boards[same], vals[same, 0] - vmin] = False
+        nallowed = allowed.sum(axis=1)
+        pick = rng.integers(0, nallowed)
+        choice = numpy.argmax(numpy.cumsum(allowed, axis=1) > pick[:, None],
+                              axis=1)
+        tiles[:, ind] = vmin + choice
+
+    tiles = tiles.reshape((nboards,) + tuple(shape))
+    if count is None:
+        return tiles[0]
+    return tiles
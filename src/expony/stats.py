@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+'''
+Constant memory summaries of many autoplay results.
+
+An Aggregator takes the result dicts of games (see expony.autoplay.play) one
+at a time and keeps, for the score, moves and time of each game:
+
+- count, mean, min and max, with the game giving the min and max score,
+- a fixed-width Histogram,
+- a QuantileSketch giving any quantile to within a relative accuracy,
+
+and for each max tile value the number of games, their mean score and moves
+and the first few seeds reaching it.  Nothing grows with the number of games.
+Aggregators merge, so each worker may summarize part of the results and the
+parts are summed.  The table() is the summary of docs/autoplay.org:
+
+  expony autoplay --games 1000 | expony stats
+  expony stats runs/hint8/done/*.jsonl --jobs 8
+
+Summaries saved as JSON are read back and merged, with or without more
+results:
+
+  expony stats --json run1.jsonl > run1.json
+  expony stats --summary run1.json --summary run2.json run3.jsonl
+'''
+import json
+import math
+import multiprocessing
+from functools import partial
+from collections import defaultdict
+
+
+class Histogram:
+    '''
+    Counts of values in bins of a fixed width, only non-empty bins kept.
+    '''
+
+    def __init__(self, width=1.0, bins=None):
+        self.width = width
+        self.bins = defaultdict(int, bins or {})
+
+    def add(self, value, count=1):
+        self.bins[math.floor(value / self.width)] += count
+
+    def __iadd__(self, other):
+        if other.width != self.width:
+            raise ValueError(f'can not add histogram of width {other.width} '
+                             f'to {self.width}')
+        for index, count in other.bins.items():
+            self.bins[index] += count
+        return self
+
+    def items(self):
+        '''
+        Return sorted list of (low edge, count) of non-empty bins.
+        '''
+        return [(index * self.width, self.bins[index])
+                for index in sorted(self.bins)]
+
+    def to_dict(self):
+        return dict(width=self.width, bins={str(k): v for k, v in self.bins.items()})
+
+    @classmethod
+    def from_dict(cls, dat):
+        return cls(dat["width"], {int(k): v for k, v in dat["bins"].items()})
+
+
+class QuantileSketch:
+    '''
+    A mergeable sketch of the quantiles of non-negative values.
+
+    Values fall in buckets whose edges grow geometrically so that a quantile
+    is returned to within the relative accuracy.  Zero has its own bucket.
+    The number of buckets grows only with the log of the range of values.
+    '''
+
+    def __init__(self, accuracy=0.01, buckets=None, zeros=0):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int, buckets or {})
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def add(self, value, count=1):
+        if value < 0:
+            raise ValueError(f'negative value in quantile sketch: {value}')
+        if value == 0:
+            self.zeros += count
+            return
+        self.buckets[math.ceil(math.log(value) / self._log_gamma)] += count
+
+    def __iadd__(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError(f'can not add sketch of accuracy {other.accuracy} '
+                             f'to {self.accuracy}')
+        for index, count in other.buckets.items():
+            self.buckets[index] += count
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q):
+        '''
+        Return the value at quantile q in [0,1], None if empty.
+        '''
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # the middle of the bucket (gamma**(i-1), gamma**i]
+                return 2 * self.gamma ** index / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.buckets) / (1 + self.gamma)
+
+    def to_dict(self):
+        return dict(accuracy=self.accuracy, zeros=self.zeros,
+                    buckets={str(k): v for k, v in self.buckets.items()})
+
+    @classmethod
+    def from_dict(cls, dat):
+        return cls(dat["accuracy"], {int(k): v for k, v in dat["buckets"].items()},
+                   dat["zeros"])
+
+
+class Stat:
+    '''
+    Streaming summary of one quantity.
+    '''
+
+    def __init__(self, width=1.0, accuracy=0.01):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.hist = Histogram(width)
+        self.sketch = QuantileSketch(accuracy)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.hist.add(value)
+        self.sketch.add(value)
+
+    def __iadd__(self, other):
+        self.count += other.count
+        self.total += other.total
+        for name, pick in (("min", min), ("max", max)):
+            values = [v for v in (getattr(self, name), getattr(other, name))
+                      if v is not None]
+            setattr(self, name, pick(values) if values else None)
+        self.hist += other.hist
+        self.sketch += other.sketch
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def to_dict(self):
+        return dict(count=self.count, total=self.total, min=self.min,
+                    max=self.max, hist=self.hist.to_dict(),
+                    sketch=self.sketch.to_dict())
+
+    @classmethod
+    def from_dict(cls, dat):
+        stat = cls()
+        stat.count, stat.total = dat["count"], dat["total"]
+        stat.min, stat.max = dat["min"], dat["max"]
+        stat.hist = Histogram.from_dict(dat["hist"])
+        stat.sketch = QuantileSketch.from_dict(dat["sketch"])
+        return stat
+
+
+# The quantities summarized and their histogram bin widths.
+quantities = dict(score=5000, moves=100, time=0.5)
+
+
+class Aggregator:
+    '''
+    Summarize autoplay results in constant memory.
+    '''
+
+    def __init__(self, accuracy=0.01, nseeds=10):
+        '''
+        Quantiles are kept to within the relative accuracy and the first
+        nseeds seeds (lowest first) reaching each max tile are kept.
+        '''
+        self.accuracy = accuracy
+        self.nseeds = nseeds
+        self.stats = {name: Stat(width, accuracy)
+                      for name, width in quantities.items()}
+        # max_value -> dict(games, score, moves, seeds)
+        self.by_max = dict()
+        self.min_game = None
+        self.max_game = None
+
+    @property
+    def count(self):
+        return self.stats["score"].count
+
+    def _by_max(self, value):
+        row = self.by_max.get(value)
+        if row is None:
+            row = self.by_max[value] = dict(games=0, score=0, moves=0, seeds=[])
+        return row
+
+    def add(self, res):
+        '''
+        Add one result dict with at least seed, score, max_value, moves and
+        time.
+        '''
+        for name, stat in self.stats.items():
+            stat.add(res[name])
+        row = self._by_max(res["max_value"])
+        row["games"] += 1
+        row["score"] += res["score"]
+        row["moves"] += res["moves"]
+        self._keep_seeds(row, [res["seed"]])
+        game = {key: res[key] for key in
+                ("seed", "score", "max_value", "moves", "time")}
+        if self.min_game is None or res["score"] < self.min_game["score"]:
+            self.min_game = game
+        if self.max_game is None or res["score"] > self.max_game["score"]:
+            self.max_game = game
+
+    def _keep_seeds(self, row, seeds):
+        row["seeds"] = sorted(set(row["seeds"]) | set(seeds))[:self.nseeds]
+
+    def update(self, results):
+        '''
+        Add each of an iterable of result dicts and return self.
+        '''
+        for res in results:
+            self.add(res)
+        return self
+
+    def __iadd__(self, other):
+        for name, stat in self.stats.items():
+            stat += other.stats[name]
+        for value, theirs in other.by_max.items():
+            row = self._by_max(value)
+            for key in ("games", "score", "moves"):
+                row[key] += theirs[key]
+            self._keep_seeds(row, theirs["seeds"])
+        if other.min_game and (self.min_game is None or
+                               other.min_game["score"] < self.min_game["score"]):
+            self.min_game = other.min_game
+        if other.max_game and (self.max_game is None or
+                               other.max_game["score"] > self.max_game["score"]):
+            self.max_game = other.max_game
+        return self
+
+    def to_dict(self):
+        '''
+        Return a JSON-friendly dict representation.
+        '''
+        return dict(accuracy=self.accuracy, nseeds=self.nseeds,
+                    stats={k: v.to_dict() for k, v in self.stats.items()},
+                    by_max={str(k): v for k, v in self.by_max.items()},
+                    min_game=self.min_game, max_game=self.max_game)
+
+    @classmethod
+    def from_dict(cls, dat):
+        agg = cls(dat["accuracy"], dat["nseeds"])
+        agg.stats = {k: Stat.from_dict(v) for k, v in dat["stats"].items()}
+        agg.by_max = {int(k): v for k, v in dat["by_max"].items()}
+        agg.min_game = dat["min_game"]
+        agg.max_game = dat["max_game"]
+        return agg
+
+    def table(self):
+        '''
+        Return a text summary.
+        '''
+        lines = [f'{self.count} games']
+        if not self.count:
+            return lines[0]
+        lines.append(f'{"":6s} {"mean":>10s} {"min":>10s} {"p10":>10s} '
+                     f'{"p50":>10s} {"p90":>10s} {"p99":>10s} {"max":>10s}')
+        for name, stat in self.stats.items():
+            qs = [stat.quantile(q) for q in (0.1, 0.5, 0.9, 0.99)]
+            vals = [stat.mean, stat.min] + qs + [stat.max]
+            lines.append(f'{name:6s} ' + " ".join(f'{v:10.1f}' for v in vals))
+
+        lines.append("")
+        lines.append("min and max score games:")
+        for game in (self.min_game, self.max_game):
+            lines.append(format_game(game))
+
+        lines.append("")
+        lines.append(f'{"max tile":>12s} {"games":>8s} {"frac":>7s} '
+                     f'{"score":>9s} {"moves":>8s}  seeds')
+        for value in sorted(self.by_max):
+            row = self.by_max[value]
+            games = row["games"]
+            seeds = " ".join(map(str, row["seeds"]))
+            if games > len(row["seeds"]):
+                seeds += " ..."
+            lines.append(f'{value:3d}/{2**value:<8d} {games:8d} '
+                         f'{games/self.count:7.4f} {row["score"]/games:9.1f} '
+                         f'{row["moves"]/games:8.1f}  {seeds}')
+
+        hist = self.stats["score"].hist
+        lines.append("")
+        lines.append(f'score histogram, bins of {hist.width}:')
+        items = hist.items()
+        most = max(count for _, count in items)
+        for low, count in items:
+            bar = "#" * max(1, round(40 * count / most))
+            lines.append(f'{low:10.0f} {count:8d} {bar}')
+        return "\n".join(lines)
+
+
+def format_game(game):
+    '''
+    Return the line describing one game as in docs/autoplay.org.
+    '''
+    value = game["max_value"]
+    rate = game["moves"] / game["time"] if game["time"] else 0.0
+    return (f'{game["seed"]:4d}: {game["score"]:6d} points, max {value:2d}/'
+            f'{2**value:4d} in {game["time"]:4.1f} s / {rate:.1f} Hz after '
+            f'{game["moves"]} plays')
+
+
+def read_results(stream):
+    '''
+    Generate result dicts from a stream of JSON lines, skipping blank lines.
+    '''
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def load_summary(path):
+    '''
+    Return the Aggregator saved as JSON of its to_dict() in a file.
+    '''
+    with open(path) as fp:
+        return Aggregator.from_dict(json.load(fp))
+
+
+def aggregate_file(path, accuracy=0.01):
+    '''
+    Return an Aggregator of the results in a JSON lines file.
+    '''
+    with open(path) as fp:
+        return Aggregator(accuracy).update(read_results(fp))
+
+
+def aggregate_files(paths, accuracy=0.01, jobs=1):
+    '''
+    Return an Aggregator of the results in many JSON lines files, read over
+    jobs processes.
+    '''
+    total = Aggregator(accuracy)
+    if jobs <= 1:
+        for path in paths:
+            total += aggregate_file(path, accuracy)
+        return total
+    with multiprocessing.Pool(jobs) as pool:
+        for part in pool.imap_unordered(partial(aggregate_file, accuracy=accuracy),
+                                       paths):
+            total += part
+    return total
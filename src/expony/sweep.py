@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+'''
+Resumable seed sweeps.
+
+A sweep plays one game for each seed in a range.  The range is split into
+chunks of consecutive seeds and all state lives in a sweep directory:
+
+- sweep.json :: the sweep parameters, written once.
+- claims/NNNNNNNN :: a chunk is being played by the host and process named
+  inside.
+- done/NNNNNNNN.jsonl :: the autoplay results of a finished chunk, one JSON line
+  per game.  The done directory is the manifest of finished chunks.
+- done/NNNNNNNN.npz :: the heatmaps of a finished chunk (see expony.heatmap), if
+  the sweep records them.
+
+Claims are made with O_CREAT|O_EXCL and done files are written to a temporary
+name and moved into place with os.replace() so several processes, including on
+several hosts sharing the directory, may run the same sweep.  An interrupted
+sweep is resumed by running it again: only chunks not yet done are played.  A
+claim left by a dead process on this host is taken over immediately, one from
+another host once it is older than the "stale" time.  While a chunk is played
+its claim is touched every quarter of the stale time, so stale is how long a
+host may go silent before its chunks are taken over, not a limit on how long a
+chunk may take.
+
+A sweep may instead play its chunks, one after another, on a running worker
+service (see expony.workers), except a sweep recording heatmaps.
+'''
+import os
+import sys
+import json
+import socket
+import threading
+import multiprocessing
+from time import time
+
+from .autoplay import play, strategies
+from . import heatmap
+
+
+def chunk_name(index):
+    return f'{index:08d}'
+
+
+class Sweep:
+    '''
+    A seed sweep held in a directory.
+    '''
+
+    def __init__(self, path, start=0, stop=None, chunk=1000, shape=(8,8),
+                 strategy="hint", stale=3600, heatmaps=False):
+        '''
+        Open the sweep at path, creating it if the parameters are given.
+
+        An existing sweep keeps its own parameters.  The stale time in seconds
+        is how long a claim from another host is honored after its last
+        heartbeat.  A new sweep with
+        heatmaps also records where moves happen on the board.
+        '''
+        self.path = path
+        self.stale = stale
+        if stop is None and not os.path.exists(self.params_path):
+            raise ValueError(f'no sweep at {path}')
+        os.makedirs(self.claims_dir, exist_ok=True)
+        os.makedirs(self.done_dir, exist_ok=True)
+        if stop is not None:
+            if strategy not in strategies:
+                raise ValueError(f'unknown strategy: {strategy}')
+            params = dict(start=start, stop=stop, chunk=chunk,
+                          shape=list(shape), strategy=strategy)
+            if heatmaps:
+                params["heatmaps"] = True
+            self._create(params)
+        self.params = self.load_params()
+
+    @property
+    def params_path(self):
+        return os.path.join(self.path, "sweep.json")
+
+    @property
+    def claims_dir(self):
+        return os.path.join(self.path, "claims")
+
+    @property
+    def done_dir(self):
+        return os.path.join(self.path, "done")
+
+    def _create(self, params):
+        try:
+            fd = os.open(self.params_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            have = self.load_params()
+            if have != params:
+                raise ValueError(f'sweep at {self.path} has other parameters: {have}')
+            return
+        with os.fdopen(fd, "w") as fp:
+            json.dump(params, fp)
+
+    def load_params(self):
+        with open(self.params_path) as fp:
+            return json.load(fp)
+
+    @property
+    def nchunks(self):
+        p = self.params
+        return -(-(p["stop"] - p["start"]) // p["chunk"])
+
+    def seeds(self, index):
+        '''
+        Return the range of seeds of a chunk.
+        '''
+        p = self.params
+        first = p["start"] + index * p["chunk"]
+        return range(first, min(first + p["chunk"], p["stop"]))
+
+    def done_path(self, index):
+        return os.path.join(self.done_dir, chunk_name(index) + ".jsonl")
+
+    def heatmaps_path(self, index):
+        return os.path.join(self.done_dir, chunk_name(index) + ".npz")
+
+    def claim_path(self, index):
+        return os.path.join(self.claims_dir, chunk_name(index))
+
+    def done(self):
+        '''
+        Return the set of indices of finished chunks.
+        '''
+        return {int(f[:-6]) for f in os.listdir(self.done_dir)
+                if f.endswith(".jsonl")}
+
+    def missing(self):
+        '''
+        Return the indices of chunks not yet finished.
+        '''
+        done = self.done()
+        return [i for i in range(self.nchunks) if i not in done]
+
+    def _is_stale(self, path):
+        try:
+            with open(path) as fp:
+                owner = json.load(fp)
+            age = time() - os.stat(path).st_mtime
+        except (FileNotFoundError, ValueError):
+            # gone, or caught between create and write
+            return False
+        if owner.get("host") == socket.gethostname():
+            try:
+                os.kill(owner["pid"], 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+            return False
+        return age > self.stale
+
+    def claim(self, index):
+        '''
+        Try to claim a chunk for this process, return True on success.
+        '''
+        path = self.claim_path(index)
+        for attempt in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if attempt or not self._is_stale(path):
+                    return False
+                # Only one taker can rename away the stale claim.
+                grave = f'{path}.stale.{socket.gethostname()}.{os.getpid()}'
+                try:
+                    os.rename(path, grave)
+                except FileNotFoundError:
+                    return False
+                os.unlink(grave)
+                continue
+            with os.fdopen(fd, "w") as fp:
+                json.dump(dict(host=socket.gethostname(), pid=os.getpid(),
+                               time=time()), fp)
+            if os.path.exists(self.done_path(index)):
+                self.release(index)
+                return False
+            return True
+        return False
+
+    def _heartbeat(self, index, stop):
+        path = self.claim_path(index)
+        while not stop.wait(max(self.stale / 4, 0.01)):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return
+
+    def release(self, index):
+        try:
+            os.unlink(self.claim_path(index))
+        except FileNotFoundError:
+            pass
+
+    def run_chunk(self, index, client=None):
+        '''
+        Claim, play and finish one chunk, on the workers.Client if given.
+
+        Return the number of games played, zero if the chunk was not claimed.
+        '''
+        if os.path.exists(self.done_path(index)) or not self.claim(index):
+            return 0
+        p = self.params
+        final = self.done_path(index)
+        temp = f'{final}.{socket.gethostname()}.{os.getpid()}.tmp'
+        temp_maps = temp[:-4] + ".npz"
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(index, stop),
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            seeds = self.seeds(index)
+            maps = None
+            if p.get("heatmaps"):
+                maps = heatmap.enable(heatmap.Heatmaps(p["shape"]))
+            try:
+                with open(temp, "w") as fp:
+                    if client is None:
+                        played = (play(seed, p["shape"], p["strategy"])
+                                  for seed in seeds)
+                    else:
+                        played = client.autoplay(seeds, p["shape"],
+                                                 p["strategy"])
+                    for res in played:
+                        fp.write(json.dumps(res) + "\n")
+            finally:
+                if maps:
+                    heatmap.disable()
+            if maps:
+                # in place before the results mark the chunk done
+                maps.save(temp_maps)
+                os.replace(temp_maps, self.heatmaps_path(index))
+            os.replace(temp, final)
+        except BaseException:
+            for path in (temp, temp_maps):
+                if os.path.exists(path):
+                    os.unlink(path)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+            self.release(index)
+        return len(seeds)
+
+    def results(self):
+        '''
+        Generate the result dicts of all finished chunks, in chunk order.
+        '''
+        for index in sorted(self.done()):
+            with open(self.done_path(index)) as fp:
+                for line in fp:
+                    yield json.loads(line)
+
+    def heatmaps(self):
+        '''
+        Return the Heatmaps summed over all finished chunks, None if the sweep
+        does not record them.
+        '''
+        if not self.params.get("heatmaps"):
+            return
+        total = heatmap.Heatmaps(self.params["shape"])
+        for index in sorted(self.done()):
+            total += heatmap.Heatmaps.load(self.heatmaps_path(index))
+        return total
+
+    def run(self, jobs=1, log=None, client=None):
+        '''
+        Play all missing chunks over jobs processes or on the workers.Client.
+
+        Progress and throughput are written to the log stream as each chunk
+        finishes.  Return the number of games played by this call.
+        '''
+        if client is not None and self.params.get("heatmaps"):
+            raise ValueError("a sweep recording heatmaps can not run on a "
+                             "worker service")
+        todo = self.missing()
+        total = self.nchunks
+        ndone = total - len(todo)
+        ngames = 0
+        start = time()
+        if jobs == 0:
+            jobs = os.cpu_count()
+        if client is not None:
+            played = (self.run_chunk(index, client) for index in todo)
+            pool = None
+        elif jobs <= 1:
+            played = map(self.run_chunk, todo)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(jobs)
+            played = pool.imap_unordered(self.run_chunk, todo)
+        try:
+            for count in played:
+                if not count:
+                    continue
+                ndone += 1
+                ngames += count
+                if log:
+                    dt = time() - start
+                    rate = ngames / dt if dt > 0 else 0.0
+                    log.write(f'{ndone}/{total} chunks, {ngames} games, '
+                              f'{rate:.1f} games/s\n')
+                    log.flush()
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+        return ngames
+
+    def status(self):
+        '''
+        Return a dict summarizing the progress of the sweep.
+        '''
+        done = self.done()
+        claims = [f for f in os.listdir(self.claims_dir) if f.isdigit()]
+        return dict(self.params, chunks=self.nchunks, done=len(done),
+                    claimed=len(claims))
+
+
+def run(path, jobs=1, log=sys.stderr, **params):
+    '''
+    Create or resume the sweep at path and play its missing chunks.
+    '''
+    return Sweep(path, **params).run(jobs, log)
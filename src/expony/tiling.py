@@ -14,6 +14,7 @@ from contextlib import contextmanager
 from collections import namedtuple
 from math import floor
 import random
+import numpy
 
 Matched = namedtuple("Matched", "origin others value")
 
@@ -76,6 +77,15 @@ class Tiling(ABC):
         '''
         pass
 
+    def match_candidates(self):
+        '''
+        Yield, in positions() order, the positions that may seed a match.
+
+        Implementations may override this to skip positions that can not
+        possibly match.  By default all positions are yielded.
+        '''
+        return self.positions()
+
     @abstractmethod
     def neighbors(self):
         '''
@@ -129,8 +139,7 @@ def all_seeded_matches(tiling):
     '''
     Yield all Matched in tiling
     '''
-    ret = list()
-    for seed in tiling.positions():
+    for seed in tiling.match_candidates():
         m = tiling.matched(seed)
         if m is None:
             continue
@@ -156,6 +165,9 @@ def fresh_values(rng=None, vmin=1, vmax=4):
     '''
     Yield integer values in [vmin,vmax], inclusive given generator of
     uniform random numbers in [0.0,1.0].
+
+    See FreshStream for a counter-based alternative that is reproducible
+    across backends.
     '''
     if rng is None:
         rng = random.Random()
@@ -164,6 +176,161 @@ def fresh_values(rng=None, vmin=1, vmax=4):
     while True:
         yield rng.choice(values)
 
+
+# Philox4x32-10 constants (Salmon et al, "Parallel random numbers: as easy as
+# 1, 2, 3", SC11).
+_PHILOX_M = (numpy.uint64(0xD2511F53), numpy.uint64(0xCD9E8D57))
+_PHILOX_W = (0x9E3779B9, 0xBB67AE85)
+_MASK32 = numpy.uint64(0xFFFFFFFF)
+_SHIFT32 = numpy.uint64(32)
+
+def philox(ctr, key):
+    '''
+    Return the Philox4x32-10 bijection of counters under key.
+
+    The ctr is a sequence of four arrays of 32-bit counter words and key is a
+    pair of 32-bit ints.  Four uint64 arrays holding 32-bit words are returned.
+    '''
+    c0, c1, c2, c3 = [numpy.asarray(c, dtype=numpy.uint64) for c in ctr]
+    k0, k1 = int(key[0]) & 0xFFFFFFFF, int(key[1]) & 0xFFFFFFFF
+    for _ in range(10):
+        p0 = _PHILOX_M[0] * c0
+        p1 = _PHILOX_M[1] * c2
+        c0, c1, c2, c3 = ((p1 >> _SHIFT32) ^ c1 ^ numpy.uint64(k0),
+                          p1 & _MASK32,
+                          (p0 >> _SHIFT32) ^ c3 ^ numpy.uint64(k1),
+                          p0 & _MASK32)
+        k0 = (k0 + _PHILOX_W[0]) & 0xFFFFFFFF
+        k1 = (k1 + _PHILOX_W[1]) & 0xFFFFFFFF
+    return c0, c1, c2, c3
+
+
+class FreshStream:
+    '''
+    A counter-based, splittable stream of fresh tile values.
+
+    The value at draw index i depends only on (seed, stream, i) so any draw can
+    be reached in O(1) with seek() and every backend that draws from a
+    FreshStream sees the same values.  Values are produced in vectorized blocks
+    of 32-bit Philox words mapped to [vmin,vmax], inclusive.
+
+    A FreshStream is an iterator of int and so may be used anywhere a
+    fresh_values() generator is accepted.
+    '''
+
+    block_size = 256
+
+    def __init__(self, seed=0, vmin=1, vmax=4, stream=0, index=0):
+        self.seed = int(seed)
+        self.vmin = vmin
+        self.vmax = vmax
+        self.stream = int(stream)
+        self.index = int(index)
+        self._buffer = numpy.zeros(0, dtype=numpy.uint64)
+        self._buffer_start = 0
+
+    def __repr__(self):
+        return (f'<FreshStream seed={self.seed} stream={self.stream} '
+                f'index={self.index} [{self.vmin},{self.vmax}]>')
+
+    def clone(self):
+        '''
+        Return a copy of self at the same draw index.
+        '''
+        return FreshStream(self.seed, self.vmin, self.vmax,
+                           self.stream, self.index)
+
+    def words(self, start, count):
+        '''
+        Return uint64 array of count 32-bit words from draw index start.
+
+        This does not change the draw index.
+        '''
+        idx = numpy.arange(start, start+count, dtype=numpy.uint64)
+        blocks = idx >> numpy.uint64(2)
+        lanes = (idx & numpy.uint64(3)).astype(numpy.intp)
+        ctr = (blocks & _MASK32, blocks >> _SHIFT32,
+               numpy.full(count, self.stream & 0xFFFFFFFF, dtype=numpy.uint64),
+               numpy.full(count, self.stream >> 32, dtype=numpy.uint64))
+        out = numpy.stack(philox(ctr, (self.seed, self.seed >> 32)))
+        return out[lanes, numpy.arange(count)]
+
+    def values(self, start, count, vmin=None, vmax=None):
+        '''
+        Return int64 array of count values from draw index start.
+
+        Values are in [vmin,vmax], inclusive, defaulting to the stream range.
+        This does not change the draw index.
+        '''
+        return self._scale(self.words(start, count), vmin, vmax)
+
+    def _scale(self, words, vmin, vmax):
+        vmin = self.vmin if vmin is None else vmin
+        vmax = self.vmax if vmax is None else vmax
+        nvals = numpy.uint64(vmax - vmin + 1)
+        vals = (words * nvals) >> _SHIFT32
+        return vals.astype(numpy.int64) + vmin
+
+    def __getitem__(self, index):
+        return int(self.values(index, 1)[0])
+
+    def seek(self, index):
+        '''
+        Set the index of the next draw.
+        '''
+        self.index = int(index)
+        return self
+
+    def integers(self, vmin, vmax, count):
+        '''
+        Draw count values in [vmin,vmax], inclusive, advancing the index.
+        '''
+        vals = self.values(self.index, count, vmin, vmax)
+        self.index += count
+        return vals
+
+    def block(self, count):
+        '''
+        Draw count values in the stream range, advancing the index.
+        '''
+        return self.integers(self.vmin, self.vmax, count)
+
+    def integer(self, vmin=None, vmax=None):
+        '''
+        Draw one int in [vmin,vmax], inclusive, advancing the index.
+
+        Single draws are served from a buffered block of words.
+        '''
+        off = self.index - self._buffer_start
+        if off < 0 or off >= len(self._buffer):
+            self._buffer_start = self.index
+            self._buffer = self.words(self.index, self.block_size)
+            off = 0
+        self.index += 1
+        return int(self._scale(self._buffer[off], vmin, vmax))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.integer()
+
+    def split(self, n):
+        '''
+        Return n independent streams derived from this one.
+
+        The children share the seed and range and each has a distinct stream
+        number derived from this stream's number so splits may be nested.
+        '''
+        k = numpy.arange(n, dtype=numpy.uint64)
+        ctr = (k, numpy.full(n, 0xFFFFFFFF, dtype=numpy.uint64),
+               numpy.full(n, self.stream & 0xFFFFFFFF, dtype=numpy.uint64),
+               numpy.full(n, self.stream >> 32, dtype=numpy.uint64))
+        w0, w1, _, _ = philox(ctr, (self.seed, self.seed >> 32))
+        return [FreshStream(self.seed, self.vmin, self.vmax,
+                            int(lo) | (int(hi) << 32))
+                for lo, hi in zip(w0, w1)]
+
         
 @contextmanager
 def swapped(tiling, seed, targ):
@@ -238,7 +405,7 @@ def apply_matches(tiling, matches):
     points = 0
     for m in matches:
         tiling[m.origin] = m.value
-        points += 2**m.value
+        points += 2**int(m.value)
         doomed.update(m.others)
 
     for null in doomed:
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+'''
+Timeline tracing in Chrome trace-event format.
+
+A Tracer records spans as "complete" trace events that can be opened in
+https://ui.perfetto.dev or chrome://tracing.  Attaching a tracer wraps the
+engine in place (see expony.patch), as instrument does, so that each move gives spans for:
+
+- hint :: searching for a hint move (arr.Board.automove_hint).
+- swap :: making a move, including all its combos.
+- match :: each scan for matches (one per cascade stage).
+- gravity :: each gravity pass and refill.
+- draw :: drawing the board, if expony.gui or expony.autogui is loaded.
+
+  tracer = Tracer()
+  with tracer:
+      ...play...
+  tracer.save("autoplay.json")
+
+Events are kept in a ring buffer so that only the most recent "capacity"
+events are held in memory on long runs.
+'''
+import os
+import sys
+import json
+import threading
+from functools import wraps
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+from . import arr, data, funcs, tiling, patch
+
+
+class Tracer:
+    '''
+    Record spans into a ring buffer of Chrome trace events.
+    '''
+
+    def __init__(self, capacity=1000000):
+        self.events = deque(maxlen=capacity)
+        self.nspans = 0
+        self._start = perf_counter_ns()
+        self._pid = os.getpid()
+        self._patches = list()
+
+    @property
+    def dropped(self):
+        '''
+        Number of spans dropped from the ring buffer.
+        '''
+        return self.nspans - len(self.events)
+
+    def add(self, name, start_ns, stop_ns, cat="expony", args=None):
+        '''
+        Add a span given its start and stop times from perf_counter_ns().
+        '''
+        event = dict(name=name, cat=cat, ph="X",
+                     ts=(start_ns - self._start) / 1000.0,
+                     dur=(stop_ns - start_ns) / 1000.0,
+                     pid=self._pid, tid=threading.get_ident())
+        if args:
+            event["args"] = args
+        self.events.append(event)
+        self.nspans += 1
+
+    @contextmanager
+    def span(self, name, cat="expony", **args):
+        '''
+        A context manager recording its body as a span.
+        '''
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, start, perf_counter_ns(), cat, args)
+
+    def _wrap(self, owner, attr, name, cat):
+        def make(func):
+            @wraps(func)
+            def wrapper(*args, **kwds):
+                start = perf_counter_ns()
+                try:
+                    return func(*args, **kwds)
+                finally:
+                    self.add(name, start, perf_counter_ns(), cat)
+            return wrapper
+
+        self._patches.append(patch.install(owner, attr, make))
+
+    def attach(self):
+        '''
+        Wrap the engine, and any loaded GUI, to record spans.
+        '''
+        if self._patches:
+            return self
+        self._wrap(arr.Board, "automove_hint", "hint", "engine")
+        self._wrap(arr.Board, "maybe_swap", "swap", "engine")
+        self._wrap(arr.Board, "unique_new_matches", "match", "engine")
+        self._wrap(arr.Board, "apply_gravity", "gravity", "engine")
+
+        self._wrap(funcs, "maybe_swap", "swap", "engine")
+        self._wrap(data.Board, "all_matches", "match", "engine")
+        self._wrap(funcs, "apply_gravity", "gravity", "engine")
+
+        self._wrap(tiling, "apply_swap_inplace", "swap", "engine")
+        self._wrap(tiling, "existing_matches", "match", "engine")
+        self._wrap(tiling, "apply_gravity", "gravity", "engine")
+
+        for modname in ("expony.gui", "expony.autogui", "__main__"):
+            mod = sys.modules.get(modname)
+            board = getattr(mod, "Board", None)
+            if board is not None and "draw_board" in vars(board):
+                self._wrap(board, "draw_board", "draw", "gui")
+        return self
+
+    def detach(self):
+        '''
+        Remove the wrappers of attach().
+        '''
+        while self._patches:
+            patch.remove(self._patches.pop())
+
+    def __enter__(self):
+        return self.attach()
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def to_dict(self):
+        '''
+        Return the trace as a Chrome trace-event JSON object.
+        '''
+        return dict(traceEvents=list(self.events),
+                    displayTimeUnit="ms",
+                    otherData=dict(spans=self.nspans, dropped=self.dropped))
+
+    def save(self, path):
+        '''
+        Write the trace as Chrome trace-event JSON to path.
+        '''
+        with open(path, "w") as fp:
+            json.dump(self.to_dict(), fp)
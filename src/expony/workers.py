@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+'''
+A warm pool of worker processes served on a local socket.
+
+Starting a process and importing numpy (or torch) costs far more than many of
+the jobs we run.  A worker service is started once:
+
+  expony serve --jobs 8
+
+and keeps a pool of processes with the engine imported.  Clients connect to
+its unix socket, submit jobs in bulk and get back a list of results:
+
+  with Client() as client:
+      games = client.autoplay(range(1000), shape=(8,8))
+      hints = client.hint([tiles1, tiles2])
+
+A job is a kind name and a tuple of arguments given to the function of that
+name in the jobs dict.  The kinds are:
+
+- autoplay :: (seed, shape, strategy) -> the dict of autoplay.play().
+- hint :: (tiles,) -> the [seed, targ] automove hint or None.
+- moves :: (tiles, random_seed) -> a list of dict(seed, targ, points) of all
+  legal moves.
+
+Messages are pickles, so only the user running the server may talk to it.  The
+default socket lives in a private (0700) per-user directory and both ends
+authenticate with a random key that the server writes, readable only by the
+user, next to the socket.
+'''
+import os
+import stat
+import logging
+import tempfile
+import threading
+import multiprocessing
+from itertools import islice
+from multiprocessing.connection import Listener, Client as Connection
+
+import numpy
+
+from .arr import Board
+from .autoplay import play
+
+log = logging.getLogger(__name__)
+
+
+def runtime_dir():
+    '''
+    Return this user's private directory for sockets, making it if needed.
+
+    This is $XDG_RUNTIME_DIR/expony if that is set, else expony-UID in the
+    temporary directory.  A directory that is not owned by this user or that
+    others may enter is refused.
+    '''
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = os.path.join(base, "expony")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f'expony-{os.getuid()}')
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() \
+       or st.st_mode & 0o077:
+        raise PermissionError(f'refusing insecure runtime directory: {path}')
+    return path
+
+
+def default_address():
+    '''
+    Return the default unix socket path of the worker service for this user.
+    '''
+    return os.path.join(runtime_dir(), "workers.sock")
+
+
+def key_path(address):
+    '''
+    Return the path of the authentication key of the server at address.
+    '''
+    return address + ".key"
+
+
+def read_key(address):
+    with open(key_path(address), "rb") as fp:
+        return fp.read()
+
+
+def _write_key(address):
+    path = key_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    key = os.urandom(32)
+    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    with os.fdopen(fd, "wb") as fp:
+        fp.write(key)
+    return key
+
+
+def hint_job(tiles):
+    move = Board(numpy.asarray(tiles), random_seed=0).automove_hint()
+    if move:
+        return [tuple(map(int, p)) for p in move]
+
+
+def moves_job(tiles, random_seed=0):
+    board = Board(numpy.asarray(tiles), random_seed=random_seed)
+    return [dict(seed=tuple(map(int, m.seed)), targ=tuple(map(int, m.targ)),
+                 points=int(m.points))
+            for m in board.possible_moves()]
+
+
+jobs = dict(
+    autoplay = play,
+    hint = hint_job,
+    moves = moves_job,
+)
+
+
+def _run(job):
+    kind, args = job
+    return jobs[kind](*args)
+
+
+class Server:
+    '''
+    Serve a pool of warm workers on a unix socket.
+
+    Each connection may send any number of requests, each a tuple (kind,
+    list of argument tuples), and receives for each a tuple ("ok", list of
+    results) or ("error", message).  The special kinds "ping" and "shutdown"
+    take no items, answer "ok" and the latter stops the server.
+    '''
+
+    def __init__(self, address=None, jobs=0):
+        self.address = address or default_address()
+        self.njobs = jobs or os.cpu_count()
+        self.pool = None
+        self.listener = None
+        self.authkey = None
+        self._stop = threading.Event()
+
+    def start(self):
+        '''
+        Start the pool and listen on the socket.
+        '''
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self.pool = multiprocessing.Pool(self.njobs)
+        # Import the engine in every worker now, not on the first job.
+        self.pool.map(_run, [("hint", ([[1,2,3],[2,3,1],[3,1,2]],))] * self.njobs)
+        # The socket and key are private to this user from their creation.
+        umask = os.umask(0o077)
+        try:
+            self.authkey = _write_key(self.address)
+            self.listener = Listener(self.address, family="AF_UNIX",
+                                     authkey=self.authkey)
+        finally:
+            os.umask(umask)
+        return self
+
+    def handle(self, conn):
+        '''
+        Answer requests on one connection until it closes.
+        '''
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    kind, items = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if kind == "ping":
+                    conn.send(("ok", self.njobs))
+                    continue
+                if kind == "shutdown":
+                    conn.send(("ok", None))
+                    self.stop()
+                    return
+                if kind not in jobs:
+                    conn.send(("error", f'unknown job kind: {kind}'))
+                    continue
+                items = list(items)
+                chunksize = max(1, len(items) // (4 * self.njobs))
+                try:
+                    res = self.pool.map(_run, [(kind, args) for args in items],
+                                        chunksize)
+                except Exception as err:
+                    conn.send(("error", f'{type(err).__name__}: {err}'))
+                    continue
+                conn.send(("ok", res))
+
+    def serve_forever(self):
+        '''
+        Accept connections, each served by its own thread, until stopped.
+        '''
+        if self.listener is None:
+            self.start()
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = self.listener.accept()
+                except multiprocessing.AuthenticationError:
+                    continue
+                except OSError:
+                    break
+                if self._stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self.handle, args=(conn,),
+                                 daemon=True).start()
+        finally:
+            self.close()
+
+    def stop(self):
+        '''
+        Stop accepting connections.
+        '''
+        self._stop.set()
+        # wake the accept() in serve_forever
+        try:
+            Connection(self.address, family="AF_UNIX",
+                       authkey=self.authkey).close()
+        except (OSError, multiprocessing.AuthenticationError):
+            pass
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            try:
+                os.unlink(key_path(self.address))
+            except FileNotFoundError:
+                pass
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+class Client:
+    '''
+    A connection to a worker Server.
+    '''
+
+    def __init__(self, address=None):
+        self.address = address or default_address()
+        self.conn = Connection(self.address, family="AF_UNIX",
+                               authkey=read_key(self.address))
+
+    def submit(self, kind, items):
+        '''
+        Run a job of kind for each argument tuple in items and return the list
+        of results in the same order.
+        '''
+        self.conn.send((kind, list(items)))
+        status, res = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(res)
+        return res
+
+    def ping(self):
+        '''
+        Return the number of workers of the server.
+        '''
+        return self.submit("ping", ())
+
+    def shutdown(self):
+        '''
+        Ask the server to stop.
+        '''
+        return self.submit("shutdown", ())
+
+    def autoplay(self, seeds, shape=Board.default_shape, strategy="hint"):
+        return self.submit("autoplay", [(s, tuple(shape), strategy) for s in seeds])
+
+    def iautoplay(self, seeds, shape=Board.default_shape, strategy="hint",
+                  batch=None):
+        '''
+        Generate autoplay results, in order, as each batch of games finishes.
+
+        The batch defaults to a few games per worker.  The next batch is sent
+        before the results of the last are read so the workers stay busy.
+        '''
+        batch = batch or 4 * self.ping()
+        seeds = iter(seeds)
+        pending = 0
+        try:
+            while True:
+                items = [(s, tuple(shape), strategy)
+                         for s in islice(seeds, batch)]
+                if items:
+                    self.conn.send(("autoplay", items))
+                    pending += 1
+                if not pending:
+                    return
+                if items and pending == 1:
+                    continue
+                status, res = self.conn.recv()
+                pending -= 1
+                if status != "ok":
+                    raise RuntimeError(res)
+                yield from res
+        finally:
+            # keep the connection in step if we stop early
+            try:
+                for _ in range(pending):
+                    self.conn.recv()
+            except (EOFError, OSError):
+                pass
+
+    def hint(self, tiles_list):
+        return self.submit("hint", [(numpy.asarray(t),) for t in tiles_list])
+
+    def moves(self, tiles_list, random_seed=0):
+        return self.submit("moves", [(numpy.asarray(t), random_seed)
+                                     for t in tiles_list])
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(address=None):
+    '''
+    Return a Client of a running server, or None if none is listening or it
+    may not be used safely.
+    '''
+    try:
+        return Client(address)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except PermissionError as err:
+        log.warning("insecure worker service", extra=dict(error=str(err)))
+        return None
@@ -0,0 +1,58 @@
+import numpy
+from expony.animate import motion, Animator
+
+
+def test_motion():
+    before = numpy.array([[1, 2], [3, 4]])
+    assert motion(before, before) == {}
+
+    after = numpy.array([[2, 1], [3, 4]])
+    assert motion(before, after) == {(0, 0): (0, 1), (0, 1): (0, 0)}
+
+    before = numpy.array([[1, 2], [0, 4], [3, 0]])
+    after = numpy.array([[5, 6], [1, 2], [3, 4]])
+    assert motion(before, after) == {
+        (1, 0): (0, 0), (0, 0): (-1, 0),
+        (2, 1): (1, 1), (1, 1): (0, 1), (0, 1): (-1, 1)}
+
+
+def test_animator():
+    start = numpy.array([[1, 2], [3, 4]])
+    anim = Animator(start, stage_time=1.0)
+    assert not anim.busy
+    tiles, moving = anim.frame(0)
+    assert [at for pos, at, value in tiles] == [pos for pos, at, value in tiles]
+    assert not moving
+
+    anim.push([[2, 1], [3, 4]])
+    anim.push([[0, 1], [3, 4]])
+    assert anim.busy
+    tiles, moving = anim.frame(10.0)
+    assert moving == {(0, 0), (0, 1)}
+    at = dict((pos, at) for pos, at, value in tiles)
+    assert at[(0, 0)] == (0, 1)
+
+    tiles, moving = anim.frame(10.5)
+    at = dict((pos, at) for pos, at, value in tiles)
+    assert at[(0, 0)] == (0, 0.5)
+
+    # the swap is done, the second stage has no motion and shows at once
+    tiles, moving = anim.frame(11.0)
+    assert dict((pos, v) for pos, at, v in tiles)[(0, 0)] == 0
+    anim.frame(12.0)
+    assert not anim.busy
+
+
+def test_animator_backlog():
+    anim = Animator(numpy.zeros((2, 2)), stage_time=1.0, max_queue=2,
+                    max_backlog=4)
+    for i in range(4):
+        anim.push(numpy.full((2, 2), i + 1))
+    anim.advance(0.0)
+    # three wait, so the first stage is shortened
+    assert anim._step[3] == 2/3
+    for i in range(6):
+        anim.push(numpy.full((2, 2), i + 10))
+    anim.advance(0.1)
+    assert not anim.busy
+    assert anim.shown[0, 0] == 15
@@ -67,3 +67,21 @@ def test_autoplay_many():
         dt = time.time() - start
         hz = nturns/dt
         print(f'{game_number:4d}: {total_points:6d} points, max {maxval:2d}/{maxpts:4d} in {dt:.1f} s / {hz:.1f} Hz after {nturns:4d} plays, seed={b.random_seed}')
+
+
+def test_apply_gravity_map():
+    import numpy
+    board = Board((6,6), random_seed=5)
+    move = board.automove_hint()
+    board.swap(*move)
+    matches = board.unique_new_matches()
+    before = board.tiles.copy()
+    grav = board.apply_gravity(matches)
+    doomed = set(p for m in matches for p in m.matched)
+    assert len(grav.refilled) == len(doomed)
+    for (row, col), src in numpy.ndenumerate(grav.sources):
+        if src >= 0:
+            assert (src, col) not in doomed
+            assert board.tiles[row, col] == before[src, col]
+        else:
+            assert (row, col) in grav.refilled
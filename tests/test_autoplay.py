@@ -0,0 +1,47 @@
+import sys
+import json
+import subprocess
+from click.testing import CliRunner
+from expony.autoplay import play, play_many
+from expony.cli import main
+
+
+def test_play():
+    res = play(3, (6,6))
+    assert res["seed"] == 3
+    assert res["moves"] > 0
+    assert res["max_tile"] == 2**res["max_value"]
+    assert play(3, (6,6)) ["score"] == res["score"]
+
+    for strategy in ("greedy", "random"):
+        res = play(3, (5,5), strategy, max_moves=20)
+        assert res["strategy"] == strategy
+        assert 0 < res["moves"] <= 20
+
+
+def test_play_many():
+    serial = list(play_many(range(4), (5,5)))
+    parallel = list(play_many(range(4), (5,5), jobs=2))
+    key = lambda r: r["seed"]
+    assert [r["score"] for r in serial] == \
+        [r["score"] for r in sorted(parallel, key=key)]
+
+
+def test_cli_autoplay():
+    runner = CliRunner()
+    got = runner.invoke(main, ["autoplay", "--games", "3", "--seed-start", "5",
+                               "--shape", "5x6"])
+    assert got.exit_code == 0, got.output
+    lines = [json.loads(l) for l in got.output.splitlines()]
+    assert [l["seed"] for l in lines] == [5, 6, 7]
+    assert lines[0]["shape"] == [5, 6]
+
+    got = runner.invoke(main, ["autoplay", "--shape", "2x8"])
+    assert got.exit_code != 0
+
+
+def test_headless_imports():
+    code = "import sys, expony.cli, expony.autoplay; print('pygame' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,24 @@
+import json
+from expony import bench
+
+
+def test_run_and_compare(tmp_path):
+    results = bench.run(["arr", "box"], [5], games=1, min_time=0.0)
+    assert "arr/5x5/matched" in results
+    assert "box/5x5/autoplay" in results
+    assert results["arr/5x5/autoplay"]["moves_per_s"] > 0
+
+    assert not bench.compare(results, dict(results=results))
+    slower = {k: dict(seconds=2*v["seconds"]) for k, v in results.items()}
+    slow = bench.compare(slower, results, tolerance=0.5)
+    assert len(slow) == len(results)
+
+
+def test_main(tmp_path):
+    out = tmp_path / "bench.json"
+    argv = ["--backends", "arr", "--sizes", "4", "--ops", "hint,clone",
+            "--games", "0", "--min-time", "0", "--output", str(out)]
+    assert bench.main(argv) == 0
+    got = json.loads(out.read_text())
+    assert set(got["results"]) == {"arr/4x4/hint", "arr/4x4/clone"}
+    assert bench.main(argv + ["--baseline", str(out), "--tolerance", "1e6"]) == 0
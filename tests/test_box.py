@@ -141,3 +141,12 @@ def test_board():
     assert b.frame[0] == (10,20)
     assert b.frame[1] == (80,80)
 
+
+
+def test_compact_map():
+    t = box.Tiling(numpy.arange(1, 13, dtype=numpy.uint8).reshape(4,3))
+    grav = t.compact_map([(1,0), (3,0)])
+    assert grav.refilled == [(0,0), (1,0)]
+    assert t._tiles[:,0].tolist()[2:] == [1, 7]
+    assert t.compact([(2,1)]) == {(0,1)}
+    assert t._tiles[:,1].tolist()[1:] == [2, 5, 11]
@@ -0,0 +1,30 @@
+import numpy
+from expony import corpus, bench
+from expony.geometry import matching
+
+
+def test_default_corpus():
+    dat = corpus.load()
+    assert set(dat) == set(corpus.buckets)
+    for name, tiles in dat.items():
+        assert tiles.dtype == numpy.uint8
+        assert len(tiles) == 32
+        for t in tiles:
+            assert len(matching(t)) == 0
+    assert dat["large"].shape[1:] == (16,16)
+
+
+def test_build_save_load(tmp_path):
+    small = corpus.build(seeds=[1], large_shape=(10,10), per_bucket=4,
+                         large_moves=10)
+    assert len(small["opening"]) == 4
+    path = tmp_path / "corpus.npz"
+    corpus.save(small, path)
+    back = corpus.load(path)
+    for name in corpus.buckets:
+        assert numpy.all(back[name] == small[name])
+
+    res = bench.run_corpus(small, min_time=0,
+                           ops=["automove_hint", "apply_gravity"])
+    assert "arr/corpus/cascade/automove_hint" in res
+    assert "box/corpus/large/apply_gravity" in res
@@ -0,0 +1,73 @@
+import os
+import multiprocessing
+from time import sleep
+
+import numpy
+import pytest
+
+from expony.dashboard import SharedGames, play_games, MOVES, SEED
+
+
+def test_shared_games():
+    games = SharedGames(3, (4, 5))
+    other = SharedGames(3, (4, 5), games.name)
+    other.tiles[1, 2, 3] = 7
+    other.stats[2, MOVES] = 11
+    assert games.tiles[1, 2, 3] == 7
+    assert games.stats[2, MOVES] == 11
+    other.close()
+    games.close()
+
+
+def test_play_games():
+    games = SharedGames(4, (6, 6))
+    paused = multiprocessing.Event()
+    stopped = multiprocessing.Event()
+    proc = multiprocessing.Process(
+        target=play_games,
+        args=(games.name, 4, (6, 6), [1, 3], ["hint"], 10, None, paused, stopped))
+    proc.start()
+    for _ in range(200):
+        if games.stats[[1, 3], MOVES].min() > 0:
+            break
+        sleep(0.05)
+    stopped.set()
+    proc.join(10)
+    assert proc.exitcode == 0
+    assert games.stats[[1, 3], MOVES].min() > 0
+    assert games.stats[1, SEED] % 4 == 11 % 4
+    assert games.tiles[1].all() and games.tiles[3].all()
+    assert not games.tiles[[0, 2]].any()
+    games.close()
+
+
+def test_dashboard_draw():
+    pygame = pytest.importorskip("pygame")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from expony.dashboard import Dashboard
+    pygame.init()
+    try:
+        games = SharedGames(4, (3, 3))
+        size = Dashboard.screen_size(4, (3, 3), tile=10)
+        screen = pygame.display.set_mode(size)
+        dash = Dashboard(screen, games, tile=10)
+        games.tiles[:] = 1
+
+        # everything at first, 36 cells and 4 labels
+        assert len(dash.draw()) == 40
+        assert dash.draw() == []
+
+        games.tiles[2, 1, 0] = 5
+        dirty = dash.draw()
+        assert len(dirty) == 1
+        x, y = dirty[0].topleft
+        assert (x, y) == (int(dash.cell_x[2, 1, 0]), int(dash.cell_y[2, 1, 0]))
+        want = dash.atlas.surface.get_at((5 * 10 + 5, 5))
+        assert screen.get_at((x + 5, y + 5)) == want
+
+        games.stats[3, MOVES] = 1
+        assert len(dash.draw()) == 1
+        del dash
+        games.close()
+    finally:
+        pygame.quit()
@@ -0,0 +1,50 @@
+import os
+import numpy
+import pytest
+
+pygame = pytest.importorskip("pygame")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from expony.replay import Replay, autoplay_record
+from expony.frames import game_frames, contact_sheet, render_games
+
+
+def test_game_frames():
+    rec = autoplay_record((5,5), random_seed=7)
+    replay = Replay(rec)
+    frames = game_frames(rec, every=3)
+    want = sorted(set(range(0, len(rec) + 1, 3)) | {len(rec)})
+    assert [f.move for f in frames] == want
+    for frame in frames:
+        assert numpy.array_equal(frame.tiles, replay.board(frame.move).tiles)
+    scores = [f.score for f in frames]
+    assert scores == sorted(scores) and scores[-1] > 0
+
+
+def test_contact_sheet():
+    rec = autoplay_record((5,5), random_seed=7)
+    frames = game_frames(rec, every=10)
+    sheet = contact_sheet(frames, (5,5), tile=4, columns=3, gap=2)
+    # 20 pixel boards with 10 pixel captions
+    nrows = -(-len(frames) // 3)
+    assert sheet.get_size() == (3*22 + 2, nrows*32 + 2)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_games(tmp_path, jobs):
+    recs = [autoplay_record((5,5), random_seed=s) for s in (1, 2)]
+    paths = render_games(recs, str(tmp_path), tile=8, jobs=jobs, chunk=10)
+    assert len(paths) == sum(len(r) + 1 for r in recs)
+    assert all(os.path.exists(p) for p in paths)
+    img = pygame.image.load(str(tmp_path / "seed1" / "move00000.png"))
+    assert img.get_size() == (40, 50)
+
+    paths = render_games(recs, str(tmp_path), sheet=True, jobs=jobs)
+    assert sorted(os.path.basename(p) for p in paths) == ["seed1.png", "seed2.png"]
+
+
+def test_render_games_environ(tmp_path, monkeypatch):
+    monkeypatch.delenv("SDL_VIDEODRIVER")
+    rec = autoplay_record((5,5), random_seed=2)
+    assert render_games([rec], str(tmp_path), sheet=True, jobs=1)
+    assert "SDL_VIDEODRIVER" not in os.environ
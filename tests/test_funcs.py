@@ -7,6 +7,8 @@ from expony.funcs import (
     find_and_do_combos,
     maybe_swap,
     possible_moves,
+    scored_moves,
+    scored_moves_of_values,
 )
 from expony.data import (
     range_tiles,
@@ -86,3 +88,13 @@ def test_possible_moves_go_big():
         print(f'{nturns}: {move.seed} -> {move.targ} = {move.points}/{total_points}')
 
     print(f'finished after {nturns} turns with {total_points} points')
+
+
+def test_scored_moves():
+    b = Board(6, random_seed=5)
+    want = [(m.seed, m.targ, m.points) for m in possible_moves(b)]
+    before = b.digest()
+    assert scored_moves(b) == want
+    assert b.digest() == before
+    values = [[b[(r, c)].value for c in range(6)] for r in range(6)]
+    assert scored_moves_of_values(values) == want
@@ -0,0 +1,66 @@
+import pytest
+import numpy
+from expony.geometry import (
+    geometry, windows, matching, gravity, gravity_moves
+)
+
+
+def test_geometry_shared():
+    g = geometry((4,5))
+    assert g is geometry((4,5))
+    assert g is geometry(numpy.zeros((4,5)).shape)
+    with pytest.raises(ValueError):
+        geometry((4,5), "nope")
+
+
+def test_geometry_box():
+    g = geometry((4,5))
+    assert len(g.positions) == 20
+    assert g.positions[:2] == ((0,0), (0,1))
+    assert g.hint_order[:2] == ((0,0), (1,0))
+    assert list(g.flat) == list(range(20))
+    assert g.hint_flat[1] == 5
+    with pytest.raises(ValueError):
+        g.flat[0] = 1
+
+    # 4 rows of 4 horizontal pairs and 3 rows of 5 vertical pairs
+    assert len(g.neighbors) == 4*4 + 3*5
+    assert g.neighbors[0] == ((0,0), (1,0))
+
+    right, up, left, down = g.radii[1,1]
+    assert right == ((1,2), (1,3), (1,4))
+    assert up == ((0,1),)
+    assert left == ((1,0),)
+    assert down == ((2,1), (3,1))
+
+
+def test_geometry_hex():
+    g = geometry((4,4), "hex")
+    assert g is not geometry((4,4))
+    assert len(g.radii[1,1]) == 6
+    # 3 forward steps per position, less those off the board
+    assert len(g.neighbors) == 3*4 + 4*3 + 3*3
+
+
+def test_matching():
+    tiles = numpy.arange(25).reshape(5,5)
+    assert len(matching(tiles)) == 0
+    tiles[2,1:4] = 0
+    tiles[0:3,4] = 1
+    assert list(matching(tiles)) == [4, 9, 11, 12, 13, 14]
+    assert list(matching(tiles, length=4)) == []
+    assert windows((5,5), "box", 3).shape == (2*5*3, 3)
+
+
+def test_gravity():
+    grav = gravity((4,3), [(1,0), (3,0), (2,2)])
+    assert grav.sources.tolist() == [[-2, 0, -1],
+                                     [-1, 1,  0],
+                                     [ 0, 2,  1],
+                                     [ 2, 3,  3]]
+    assert grav.refilled == [(0,0), (1,0), (0,2)]
+    assert gravity_moves(grav) == {(0,0): (-2,0), (1,0): (-1,0), (2,0): (0,0),
+                                   (3,0): (2,0), (0,2): (-1,2), (1,2): (0,2),
+                                   (2,2): (1,2)}
+    grav = gravity((2,2), [])
+    assert grav.refilled == [] and gravity_moves(grav) == {}
@@ -67,3 +67,34 @@ def test_autoplay_many():
         dt = time.time() - start
         hz = nturns/dt
         print(f'{game_number:4d}: {total_points:6d} points, max {maxval:2d}/{maxpts:4d} in {dt:.1f} s / {hz:.1f} Hz after {nturns} plays')
+
+def test_fresh_stream_matches_arr():
+    from expony.tiling import FreshStream
+    from expony import arr
+    gb = Board(8, fresh=FreshStream(42))
+    ab = arr.Board(8, fresh=FreshStream(42))
+    assert (gb.tiles.numpy() == ab.tiles).all()
+    move = ab.automove_hint()
+    assert gb.maybe_swap(*move) == ab.maybe_swap(*move)
+    assert (gb.tiles.numpy() == ab.tiles).all()
+
+def test_apply_gravity_map_matches_arr():
+    from expony.tiling import FreshStream
+    from expony import arr
+    gb = Board(8, fresh=FreshStream(7))
+    ab = arr.Board(8, fresh=FreshStream(7))
+    move = ab.automove_hint()
+    gb.swap(*move)
+    ab.swap(*move)
+    matches = ab.unique_new_matches()
+    ggrav = gb.apply_gravity(matches)
+    agrav = ab.apply_gravity(matches)
+    assert (ggrav.sources == agrav.sources).all()
+    assert ggrav.refilled == agrav.refilled
+    assert (gb.tiles.numpy() == ab.tiles).all()
+
+
+def test_seed_zero():
+    board = Board((5,5), random_seed=0)
+    assert board.random_seed == 0
+    assert (board.tiles == Board((5,5), random_seed=0).tiles).all()
@@ -0,0 +1,107 @@
+import os
+import numpy
+import pytest
+
+from expony import arr, heatmap, instrument
+from expony.trace import Tracer
+from expony.heatmap import Heatmaps, recording, play_games, play_many, merge
+
+
+def test_recording():
+    orig = arr.Board.maybe_swap, arr.Board.apply_gravity
+    with recording(Heatmaps((6,6))) as maps:
+        board = arr.Board((6,6), random_seed=3)
+        nmoves = 0
+        while move := board.automove_hint():
+            board.maybe_swap(*move)
+            nmoves += 1
+        # other shapes and trial moves are not counted
+        other = arr.Board((5,5), random_seed=3)
+        other.maybe_swap(*other.automove_hint())
+        list(board.possible_moves())
+    assert (arr.Board.maybe_swap, arr.Board.apply_gravity) == orig
+    assert heatmap.heatmaps is None
+
+    assert maps.moves == nmoves
+    assert maps["seeds"].sum() == maps["targets"].sum() == nmoves
+    assert maps["origins"].sum() >= nmoves
+    assert maps["matched"].sum() >= 2 * maps["origins"].sum()
+    assert maps["max_tile"].sum() >= nmoves
+    assert maps["cascades"].sum() < maps["origins"].sum() + maps["matched"].sum()
+
+
+def test_save_merge(tmp_path):
+    a = play_games([1, 2], (5,5), "greedy")
+    b = play_games([3], (5,5), "greedy")
+    a.save(tmp_path / "a.npz")
+    b.save(tmp_path / "b.npz")
+    got = merge([tmp_path / "a.npz", tmp_path / "b.npz"])
+    want = play_many([1, 2, 3], (5,5), "greedy", jobs=2)
+    assert got.moves == want.moves == a.moves + b.moves
+    for kind in heatmap.kinds:
+        assert (got[kind] == want[kind]).all()
+    assert got.rates("seeds").sum() == pytest.approx(1)
+    with pytest.raises(ValueError):
+        got += Heatmaps((6,6))
+
+
+def test_render():
+    pygame = pytest.importorskip("pygame")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    maps = Heatmaps((3,4))
+    maps["seeds"][1, 2] = 5
+    rgb = heatmap.colorize(maps["seeds"])
+    assert tuple(rgb[1, 2]) == (255, 255, 255)
+    assert tuple(rgb[0, 0]) == (0, 0, 0)
+    surface = heatmap.render(maps, cell=10, kinds=("seeds",))
+    assert surface.get_size() == (60, 70)
+    assert surface.get_at((10 + 25, 30 + 15))[:3] == (255, 255, 255)
+    assert "   2" in heatmap.format_table(maps.rates("seeds"))
+
+
+def _play(nmoves=3):
+    board = arr.Board((6,6), random_seed=5)
+    for _ in range(nmoves):
+        assert board.maybe_swap(*board.automove_hint())
+
+
+def test_with_instrument_and_tracer():
+    orig = {name: vars(arr.Board)[name]
+            for name in ("maybe_swap", "apply_gravity", "possible_moves")}
+
+    instrument.enable()
+    maps = heatmap.enable(Heatmaps((6,6)))
+    instrument.disable()
+    _play()
+    assert maps.moves == 3
+    heatmap.disable()
+    _play()
+
+    maps = heatmap.enable(Heatmaps((6,6)))
+    tracer = Tracer().attach()
+    heatmap.disable()
+    _play()
+    assert maps.moves == 0 and tracer.nspans
+    tracer.detach()
+    _play()
+
+    assert {name: vars(arr.Board)[name] for name in orig} == orig
+
+
+
+def test_threads():
+    import threading
+    from expony.autoplay import play
+    seeds = range(8)
+    want = play_games(seeds, (6,6))
+    with recording(Heatmaps((6,6))) as maps:
+        threads = [threading.Thread(target=lambda part=part: [
+            play(seed, (6,6)) for seed in part]) for part in (seeds[::2],
+                                                             seeds[1::2])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert maps.moves == want.moves
+    for kind in ("seeds", "origins", "cascades"):
+        assert (maps[kind] == want[kind]).all()
@@ -0,0 +1,81 @@
+import time
+import pytest
+import numpy
+import random
+from expony import hex, box
+from expony.tiling import (
+    fresh_values,
+    all_seeded_matches,
+    existing_matches,
+    can_swap,
+    apply_swap_inplace,
+)
+
+
+def make_fresh(seed=12345):
+    rng = random.Random(seed)
+    return fresh_values(rng)
+
+
+def test_adjacent():
+    t = hex.Tiling(numpy.zeros((4,4), dtype=int))
+    for other in [(0,2), (0,1), (1,0), (2,0), (2,1), (1,2)]:
+        assert t.adjacent((1,1), other)
+    for other in [(0,0), (2,2), (1,1), (1,3)]:
+        assert not t.adjacent((1,1), other)
+    assert len(list(t.neighbors())) == 3*4 + 4*3 + 3*3
+
+
+@pytest.mark.parametrize("line", [
+    [(0,1), (1,1), (2,1)],      # vertical
+    [(1,0), (1,1), (1,2)],      # falling diagonal
+    [(2,0), (1,1), (0,2)],      # rising diagonal
+])
+def test_matched_axes(line):
+    dat = numpy.arange(16).reshape(4,4) + 10
+    for pos in line:
+        dat[pos] = 1
+    t = hex.Tiling(dat)
+    m = t.matched((1,1))
+    assert m.origin == (1,1)
+    assert sorted(m.others) == sorted(p for p in line if p != (1,1))
+    assert m.value == 2
+    assert [m.origin for m in all_seeded_matches(t)] == sorted(line)
+
+    # not a match on a box
+    if line[0][1] != line[1][1] and line[0][0] != line[1][0]:
+        assert box.Tiling(dat).matched((1,1)) is None
+
+
+def test_make_and_play():
+    fresh = make_fresh()
+    t = hex.make(fresh, 8)
+    assert not existing_matches(t)
+    assert list(t.match_candidates()) == []
+
+    moves = [(a, b) for a, b in t.neighbors() if can_swap(t, a, b)]
+    assert moves
+    points = apply_swap_inplace(t, *moves[0], fresh)
+    assert points > 0
+    assert not existing_matches(t)
+    assert t._tiles.min() >= 1
+
+
+def test_board():
+    t = hex.make(make_fresh(), (4,5))
+    b = hex.Board(t, 10)
+    offset, extent = b.frame
+    assert offset == (0,0)
+    for pos in t.positions():
+        pix = b.pixel(pos)
+        assert 0 <= pix[0] < extent[0]
+        assert 0 <= pix[1] < extent[1]
+        assert b.position(pix) == pos
+        assert len(b.corners(pos)) == 6
+
+    b.set_frame((100,50), (200,200))
+    assert b.frame[0] == (100,50)
+    for pos in t.positions():
+        assert b.position(b.pixel(pos)) == pos
+    with pytest.raises(ValueError):
+        b.position((0,0))
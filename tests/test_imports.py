@@ -0,0 +1,37 @@
+import pytest
+import sys
+import subprocess
+import expony
+from expony import bench
+
+
+def loaded(code):
+    code = f'import sys; {code}; print(",".join(sorted(sys.modules)))'
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True)
+    return set(out.stdout.strip().splitlines()[-1].split(","))
+
+
+def test_headless():
+    mods = loaded("import expony")
+    assert "expony.arr" not in mods
+
+    mods = loaded("import expony.data, expony.funcs, expony.arr, expony.tiling, "
+                  "expony.box, expony.hex, expony.stable, expony.cli, "
+                  "expony.autoplay, expony.sweep, expony.replay")
+    assert "pygame" not in mods
+    assert "torch" not in mods
+
+
+def test_lazy():
+    assert expony.box.Tiling
+    assert "arr" in dir(expony)
+
+
+def test_import_time():
+    sec, heavy = bench.import_time("expony.arr", repeat=1)
+    assert sec > 0
+    assert heavy == []
+    # loaded at interpreter startup, so never timed
+    with pytest.raises(ValueError):
+        bench.import_time("sys", repeat=1)
@@ -0,0 +1,100 @@
+import random
+import numpy
+from expony import arr, box, funcs, data, tiling, instrument, patch
+from expony.instrument import instrumented, Counters
+
+
+def test_disabled_is_original():
+    orig = arr.Board.matched, tiling.apply_gravity, box.Tiling.radii
+    with instrumented():
+        assert arr.Board.matched is not orig[0]
+    assert (arr.Board.matched, tiling.apply_gravity, box.Tiling.radii) == orig
+    assert instrument.counters is None
+
+
+def test_arr_game():
+    refilled = list()
+
+    def refilling(func):
+        def wrapper(self, matches):
+            grav = func(self, matches)
+            refilled.append(len(grav.refilled))
+            return grav
+        return wrapper
+
+    token = patch.install(arr.Board, "apply_gravity", refilling)
+    with instrumented() as counters:
+        board = arr.Board(6, random_seed=1)
+        # 36 to fill and 17 more to stabilize this seed
+        assert (counters.fill_draws, counters.refill_draws) == (53, 0)
+        nmoves = 0
+        while move := board.automove_hint():
+            board.maybe_swap(*move)
+            nmoves += 1
+        arr.Board(board)
+        game = counters.end_game()
+    patch.remove(token)
+
+    assert game["fill_draws"] == 53
+    assert game["refill_draws"] == sum(refilled) > 0
+
+    assert game["moves"] == nmoves
+    assert game["gravity"] == nmoves + game["combos"]
+    assert game["cascade_max"] >= 1
+    assert game["cells"] > game["matched"] > 0
+    assert game["clones"] == 1
+    assert game["hint_time"] > 0 and game["swap_time"] > game["gravity_time"] > 0
+    assert counters.matched == 0
+
+    rec = counters.records()
+    assert rec.dtype == Counters.dtype
+    assert rec["moves"][0] == nmoves
+
+
+def test_tiling_and_funcs():
+    fresh = tiling.fresh_values(random.Random(1))
+    t = box.make(fresh, 6)
+    with instrumented() as counters:
+        move = next((a, b) for a, b in t.neighbors() if tiling.can_swap(t, a, b))
+        points = tiling.apply_swap_inplace(t, *move, fresh)
+        assert points
+        assert counters.moves == 1
+        assert counters.gravity >= 1
+        assert counters.fill_draws == 0
+        assert counters.refill_draws == 11
+        assert counters.cells > 0
+        rec = counters.record()
+        assert rec["moves"] == 1
+
+    b = data.Board(data.same_tiles((3,3), 1))
+    b[0,1].value = 6
+    b[1,0].value = 6
+    b[1,2].value = 6
+    with instrumented() as counters:
+        bps = funcs.maybe_swap(b, (0,1), (1,1))
+        assert counters.moves == 1
+        assert counters.gravity == (len(bps) - 2)//2
+        assert counters.clones > 0
+
+
+def test_out_of_order():
+    orig = arr.Board.maybe_swap
+    counters = instrument.enable()
+    token = patch.install(arr.Board, "maybe_swap",
+                          lambda func: lambda *args: func(*args))
+    instrument.disable()
+    assert arr.Board.maybe_swap is not orig
+    board = arr.Board((6,6), random_seed=1)
+    assert board.maybe_swap(*board.automove_hint())
+    assert counters.moves == 0
+    patch.remove(token)
+    assert arr.Board.maybe_swap is orig
+
+
+def test_pass_through(monkeypatch):
+    with instrumented() as counters:
+        monkeypatch.setattr(instrument, "counters", None)
+        board = arr.Board((6,6), random_seed=1)
+        board.maybe_swap(*board.automove_hint())
+        arr.Board(board)
+    assert counters.snapshot() == Counters().snapshot()
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from expony.loadgen import LoadGen, LocalTarget, RemoteTarget, parse_mix, main
+from expony.server import GameServer
+
+
+def test_parse_mix():
+    assert parse_mix("hint=3,random") == dict(hint=3.0, random=1.0)
+    with pytest.raises(ValueError):
+        parse_mix("psychic=1")
+
+
+def test_local():
+    target = LocalTarget(2)
+    gen = LoadGen(target, players=4, duration=0.5, mix=dict(hint=1, random=1),
+                  shape=(5,5))
+    rep = gen.run()
+    target.shutdown()
+    assert rep["games"] >= 4
+    swap = rep["ops"]["swap"]
+    assert swap["count"] > 0
+    assert swap["p50_ms"] <= swap["p95_ms"] <= swap["p99_ms"] <= swap["max_ms"]
+    assert len(target.games) == 0
+
+
+def test_remote():
+    async def run():
+        server = GameServer(executor=ThreadPoolExecutor(2))
+        await server.start(port=0)
+        gen = LoadGen(RemoteTarget(port=server.port), players=3, duration=0.5,
+                      think=0.001, shape=(5,5))
+        rep = await gen.arun()
+        await asyncio.sleep(0.05)
+        assert len(server.games) == 0
+        server.close()
+        return rep
+
+    rep = asyncio.run(run())
+    assert rep["ops"]["hint"]["count"] > 0
+    assert rep["ops"]["new"]["count"] >= 3
+
+
+def test_main(tmp_path, capsys):
+    out = tmp_path / "load.json"
+    assert main(["--players", "2", "--duration", "0.2", "--shape", "5x5",
+                 "--output", str(out)]) == 0
+    assert "p99" in capsys.readouterr().out
+    assert out.exists()
@@ -0,0 +1,61 @@
+import json
+import logging
+
+from expony import data
+from expony.log import configure, configure_from_env, SampleFilter, fields
+
+
+def test_quiet(capsys):
+    data.Board((6,6), random_seed=1).assure_stable()
+    out = capsys.readouterr()
+    assert out.out == "" and out.err == ""
+
+
+def test_jsonl(tmp_path):
+    path = tmp_path / "log.jsonl"
+    handler = configure("debug", str(path))
+    try:
+        data.Board((4,4), random_seed=1)
+        logging.getLogger("expony.gui").info("points", extra=dict(points=8,
+                                                                  total=16))
+    finally:
+        logging.getLogger("expony").removeHandler(handler)
+        logging.getLogger("expony").setLevel(logging.NOTSET)
+        handler.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    rand = [obj for obj in lines if obj["event"] == "random value"]
+    assert len(rand) == 16
+    assert rand[0]["logger"] == "expony.data"
+    assert rand[0]["level"] == "DEBUG"
+    assert 1 <= rand[0]["value"] <= rand[0]["max_value"]
+    assert lines[-1]["event"] == "points" and lines[-1]["total"] == 16
+
+
+def test_sample_filter():
+    filt = SampleFilter(every=10)
+    def record(msg, level=logging.DEBUG):
+        return logging.LogRecord("expony.data", level, "", 0, msg, None, None)
+    kept = [filt.filter(record("a")) for _ in range(25)]
+    assert sum(kept) == 3 and kept[0]
+    assert filt.filter(record("b"))
+    assert all(filt.filter(record("a", logging.INFO)) for _ in range(5))
+
+
+def test_configure_replaces(capsys):
+    log = logging.getLogger("expony")
+    try:
+        configure("info")
+        handler = configure("info", sample=5)
+        assert [h for h in log.handlers if getattr(h, "_expony", False)] == [handler]
+        logging.getLogger("expony.x").info("hello", extra=dict(n=1))
+        assert capsys.readouterr().err.strip() == "INFO expony.x: hello n=1"
+        assert configure_from_env({}) is None
+    finally:
+        log.removeHandler(handler)
+        log.setLevel(logging.NOTSET)
+
+
+def test_fields():
+    rec = logging.LogRecord("x", logging.INFO, "", 0, "m", None, None)
+    rec.seed = 3
+    assert fields(rec) == dict(seed=3)
@@ -0,0 +1,27 @@
+from expony import patch
+
+
+class Thing:
+    def value(self):
+        return 1
+
+
+def adding(amount):
+    def make(func):
+        def wrapper(self):
+            return func(self) + amount
+        return wrapper
+    return make
+
+
+def test_any_order():
+    orig = Thing.value
+    for order in ((0, 1), (1, 0)):
+        tokens = [patch.install(Thing, "value", adding(10)),
+                  patch.install(Thing, "value", adding(100))]
+        assert Thing().value() == 111
+        patch.remove(tokens[order[0]])
+        assert Thing().value() == (101 if order[0] == 0 else 11)
+        patch.remove(tokens[order[1]])
+        assert Thing.value is orig
+    assert not patch._chains and not patch._tokens
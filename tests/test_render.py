@@ -0,0 +1,119 @@
+import os
+import time
+import pytest
+
+pygame = pytest.importorskip("pygame")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from expony.render import TileRenderer
+
+
+def test_renderer():
+    surface = pygame.Surface((300, 100))
+    renderer = TileRenderer((100, 100))
+
+    tile = renderer.tile(3)
+    assert tile is renderer.tile(3)
+    assert tile is not renderer.tile(3, "seed")
+
+    tiles = [((0, c), (100*c, 0), c+1, "normal") for c in range(3)]
+    assert len(renderer.draw(surface, tiles)) == 3
+    assert renderer.draw(surface, tiles) == []
+    assert surface.get_at((150, 50)) == pygame.Color(renderer.tile(2).get_at((50, 50)))
+
+    tiles[1] = ((0, 1), (100, 0), 5, "normal")
+    tiles[2] = ((0, 2), (200, 0), 3, "over")
+    dirty = renderer.draw(surface, tiles)
+    assert [r.x for r in dirty] == [100, 200]
+
+    renderer.text(surface, "hi", (50, 50), size=20)
+    assert [r.x for r in renderer.draw(surface, tiles)] == [0]
+
+    renderer.invalidate()
+    assert len(renderer.draw(surface, tiles)) == 3
+
+
+def test_autogui_board():
+    from expony import autogui
+    from expony.gui import Frame
+    pygame.display.init()
+    try:
+        autogui.screen = pygame.display.set_mode((200, 200))
+        board = autogui.Board(Frame(pygame.Rect(0, 0, 200, 200)), (5, 5),
+                              random_seed=1)
+        board.draw_board(full=True)
+        from expony.sim import Simulation
+        sim = Simulation((5, 5), random_seed=7)
+        sim.move()
+        snap = sim.snapshot()
+        board.show(snap._replace(game_over=True))
+        assert board.nturns == 1
+        assert board.game_seed == 7
+        assert (board.tiles == snap.tiles).all()
+    finally:
+        pygame.display.quit()
+
+
+def test_gui_moves():
+    from concurrent.futures import Future
+    from expony import gui
+    pygame.display.init()
+    try:
+        gui.screen = pygame.display.set_mode((200, 200))
+        board = gui.Board(gui.Frame(pygame.Rect(0, 0, 200, 200)), (5, 5),
+                          random_seed=1)
+        while not board.poll_moves():
+            time.sleep(0.01)
+        assert board.possible_moves
+
+        # a superseded board already being scored is cached under its key,
+        # one not yet started is cancelled
+        running, waiting = Future(), Future()
+        running.set_running_or_notify_cancel()
+        board.moves_pending = [("old", running), ("older", waiting)]
+        board.moves_cache.clear()
+        board.find_possible_moves()
+        assert waiting.cancelled()
+        assert [k for k, _ in board.moves_pending] == ["old", board.moves_key]
+        running.set_result([])
+        while not board.poll_moves():
+            time.sleep(0.01)
+        assert board.moves_cache["old"] == []
+        assert board.moves_cache[board.moves_key] == board.possible_moves
+
+        board.close()
+        assert board.executor is None and not board.moves_pending
+    finally:
+        pygame.display.quit()
+
+
+def test_gui_service(tmp_path, monkeypatch):
+    import threading
+    from expony import gui, workers
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    server = workers.Server(jobs=1).start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pygame.display.init()
+    try:
+        gui.screen = pygame.display.set_mode((200, 200))
+        board = gui.Board(gui.Frame(pygame.Rect(0, 0, 200, 200)), (5, 5),
+                          random_seed=1)
+        assert board.service is not None
+        while not board.poll_moves():
+            time.sleep(0.01)
+        want = workers.moves_job(board.values(board.eboard))
+        assert board.possible_moves == [(m["seed"], m["targ"], m["points"])
+                                        for m in want]
+
+        # the service goes away, moves are scored locally
+        server.stop()
+        thread.join(5)
+        board.moves_cache.clear()
+        board.find_possible_moves()
+        while not board.poll_moves():
+            time.sleep(0.01)
+        assert board.service is None and board.possible_moves
+        board.close()
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,65 @@
+import pytest
+import numpy
+from expony.arr import Board
+from expony.replay import (
+    Record,
+    Replay,
+    autoplay_record,
+    rebuild_many,
+)
+
+
+def play_boards(rec):
+    '''
+    Brute force the tiles before every move of a record.
+    '''
+    board = Board(rec.shape, random_seed=rec.random_seed)
+    tiles = [numpy.copy(board.tiles)]
+    for move in rec.moves:
+        board.maybe_swap(*move)
+        tiles.append(numpy.copy(board.tiles))
+    return tiles
+
+
+def test_replay_seek():
+    rec = autoplay_record((6,6), random_seed=42)
+    assert len(rec) > 0
+    want = play_boards(rec)
+
+    replay = Replay(rec, spacing=7)
+    for k in [0, 1, 6, 7, 8, len(rec)//2, len(rec)]:
+        assert numpy.all(replay.board(k).tiles == want[k])
+    assert numpy.all(replay[-1].tiles == want[-1])
+    with pytest.raises(IndexError):
+        replay.board(len(rec)+1)
+
+    # a rebuilt board continues the game identically.
+    k = len(rec)//2
+    board = replay.board(k)
+    board.maybe_swap(*rec.moves[k])
+    assert numpy.all(board.tiles == want[k+1])
+
+
+def test_record_dict():
+    rec = autoplay_record((5,5), random_seed=7)
+    rec2 = Record.from_dict(rec.to_dict())
+    assert rec2 == rec
+
+
+def test_rebuild_many():
+    recs = [autoplay_record((5,5), random_seed=s) for s in (1, 2, 3)]
+    requests = [(rec, [0, len(rec)]) for rec in recs]
+    serial = rebuild_many(requests, spacing=10)
+    parallel = rebuild_many(requests, spacing=10, jobs=2)
+    for rec, sboards, pboards in zip(recs, serial, parallel):
+        want = play_boards(rec)
+        for k, sb, pb in zip([0, len(rec)], sboards, pboards):
+            assert numpy.all(sb.tiles == want[k])
+            assert numpy.all(pb.tiles == want[k])
+
+
+def test_autoplay_record_strategy():
+    from expony.autoplay import play
+    for strategy in ("hint", "greedy", "random"):
+        rec = autoplay_record((5,5), random_seed=3, strategy=strategy)
+        assert len(rec) == play(3, (5,5), strategy)["moves"]
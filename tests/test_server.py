@@ -0,0 +1,88 @@
+import asyncio
+import numpy
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from expony.server import Games, GameServer, GameClient
+from expony.tiling import FreshStream
+from expony.arr import Board
+
+
+def test_games():
+    games = Games()
+    gid = games.new((6,6), seed=4)
+    board = Board((6,6), fresh=FreshStream(4))
+    assert numpy.array_equal(games[gid].tiles, board.tiles)
+
+    for _ in range(5):
+        hint = games.hint(gid)
+        assert list(map(tuple, hint)) == list(board.automove_hint())
+        before = games[gid].tiles.copy()
+        points, delta = games.swap(gid, *hint)
+        assert points == board.maybe_swap(*hint)
+        assert numpy.array_equal(games[gid].tiles, board.tiles)
+        for r, c, v in delta:
+            before[r, c] = v
+        assert numpy.array_equal(before, board.tiles)
+
+    assert games.swap(gid, (0,0), (0,0)) == (0, [])
+    games.close(gid)
+    assert len(games) == 0
+    with pytest.raises(KeyError):
+        games.hint(gid)
+
+
+def test_server():
+    async def run():
+        server = GameServer(executor=ThreadPoolExecutor(2))
+        await server.start(port=0)
+        clients = [await GameClient.connect(port=server.port) for _ in range(3)]
+        got = await asyncio.gather(*[c.autoplay((5,5), seed=s, max_moves=10)
+                                     for s, c in enumerate(clients)])
+        assert all(moves == 10 for score, moves in got)
+
+        c = clients[0]
+        g = await c.new((5,5), seed=1)
+        stats = await c.request("stats")
+        assert stats["games"] == 1
+        with pytest.raises(RuntimeError):
+            await c.request("bogus")
+        with pytest.raises(RuntimeError):
+            await c.hint(g["game"] + 100)
+        other = clients[1]
+        for op in ("swap", "close"):
+            with pytest.raises(RuntimeError, match="PermissionError"):
+                await other.request(op, game=g["game"], seed=[0, 0],
+                                    targ=[0, 1])
+        assert (await c.request("state", game=g["game"]))["moves"] == 0
+        for c in clients:
+            await c.close()
+        await asyncio.sleep(0.05)
+        assert len(server.games) == 0
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_swap_in_executor():
+    # a swap waits on the executor, not the event loop
+    class Recording(ThreadPoolExecutor):
+        def submit(self, func, *args):
+            self.funcs.append(func.__name__)
+            return super().submit(func, *args)
+
+    async def run():
+        executor = Recording(1)
+        executor.funcs = list()
+        server = GameServer(executor=executor)
+        await server.start(port=0)
+        c = await GameClient.connect(port=server.port)
+        g = await c.new((5,5), seed=3)
+        hint = await c.hint(g["game"])
+        res = await c.request("swap", game=g["game"], seed=hint[0],
+                              targ=hint[1])
+        assert res["points"] > 0
+        assert executor.funcs == ["hint_job", "swap_job"]
+        await c.close()
+        server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+import time
+from expony.sim import Simulation
+from expony.autoplay import play
+
+
+def wait_for(cond, timeout=10):
+    end = time.time() + timeout
+    while not cond():
+        assert time.time() < end
+        time.sleep(0.001)
+
+
+def test_simulation():
+    sim = Simulation((5,5), random_seed=2)
+    first = sim.snapshot()
+    assert first.nturns == 0
+    sim.start()
+    try:
+        wait_for(lambda: sim.snapshot().game_over)
+        snap = sim.snapshot()
+        assert snap.total_points == play(2, (5,5))["score"]
+
+        sim.pause()
+        sim.reset(3)
+        wait_for(lambda: sim.snapshot().random_seed == 3)
+        time.sleep(0.01)
+        assert sim.snapshot().nturns == 0
+
+        sim.step(2)
+        wait_for(lambda: sim.snapshot().nturns == 2)
+        time.sleep(0.01)
+        assert sim.snapshot().nturns == 2
+
+        sim.speed = 200
+        sim.resume()
+        time.sleep(0.05)
+        assert 2 < sim.snapshot().nturns < 30
+    finally:
+        sim.stop()
+    assert not sim.is_alive()
+
+
+def test_speed():
+    sim = Simulation((5,5), random_seed=1)
+    sim.slower()
+    assert sim.speed == 100
+    sim.faster()
+    assert sim.speed == 200
+    sim.speed = 8000
+    sim.faster()
+    assert sim.speed is None
@@ -0,0 +1,49 @@
+import time
+import pytest
+import numpy
+from expony.stable import make_stable
+from expony.geometry import matching
+from expony.arr import Board
+
+
+def test_make_stable_one():
+    tiles = make_stable((8,8), rng=42)
+    assert tiles.shape == (8,8)
+    assert tiles.min() >= 1 and tiles.max() <= 3
+    assert len(matching(tiles)) == 0
+    assert numpy.all(tiles == make_stable((8,8), rng=42))
+    assert not Board(tiles).all_matches()
+
+
+@pytest.mark.parametrize("kind,vmax", [("box", 3), ("box", 4), ("hex", 4)])
+def test_make_stable_many(kind, vmax):
+    boards = make_stable((6,7), rng=1, count=500, vmax=vmax, kind=kind)
+    assert boards.shape == (500, 6, 7)
+    for tiles in boards:
+        assert len(matching(tiles, kind)) == 0
+
+    # marginals are uniform over values
+    counts = numpy.bincount(boards.reshape(-1), minlength=vmax+1)[1:]
+    assert counts.min() > 0.9 * boards.size / vmax
+
+
+def test_make_stable_errors():
+    with pytest.raises(ValueError):
+        make_stable((8,8), vmax=2)
+    with pytest.raises(ValueError):
+        make_stable((8,8), vmax=3, kind="hex")
+
+
+def test_make_stable_speed():
+    start = time.perf_counter()
+    make_stable((8,8), rng=1, count=10000)
+    dt_make = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for seed in range(100):
+        Board(8, random_seed=seed)
+    dt_scan = (time.perf_counter() - start) * 100
+
+    # Typically over 100 times faster, a wide margin for slow or busy hosts.
+    assert dt_make * 10 < dt_scan, \
+        f'10000 boards: constructive {dt_make:.3f} s, scan-and-retry ~{dt_scan:.1f} s'
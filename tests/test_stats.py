@@ -0,0 +1,128 @@
+import json
+import random
+import numpy
+import pytest
+from click.testing import CliRunner
+
+from expony.cli import main
+from expony.stats import (
+    Aggregator, Histogram, QuantileSketch, aggregate_files, format_game,
+)
+
+
+def results(n, start=0):
+    for seed in range(start, start + n):
+        rng = random.Random(seed)
+        value = rng.randint(7, 11)
+        moves = rng.randint(100, 2000)
+        yield dict(seed=seed, score=moves * rng.randint(20, 60),
+                   max_value=value, max_tile=2**value, moves=moves,
+                   time=moves / 800)
+
+
+def test_sketch():
+    rng = numpy.random.default_rng(1)
+    values = rng.lognormal(10, 1, 20000)
+    sketch = QuantileSketch(0.01)
+    for v in values[:10000]:
+        sketch.add(v)
+    other = QuantileSketch(0.01)
+    for v in values[10000:]:
+        other.add(v)
+    sketch += other
+    other.add(0)
+    assert sketch.count == 20000
+    for q in (0.01, 0.5, 0.9, 0.99):
+        want = numpy.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(want, rel=0.011)
+    # a few hundred buckets cover the range
+    assert len(sketch.buckets) < 1000
+    assert other.quantile(0) == 0
+    back = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert back.quantile(0.5) == sketch.quantile(0.5)
+    with pytest.raises(ValueError):
+        sketch += QuantileSketch(0.02)
+
+
+def test_histogram():
+    hist = Histogram(10)
+    for v in (1, 5, 12, 35):
+        hist.add(v)
+    other = Histogram(10)
+    other.add(36)
+    hist += other
+    assert hist.items() == [(0, 2), (10, 1), (30, 2)]
+
+
+def test_aggregator_merge():
+    whole = Aggregator().update(results(300))
+    parts = Aggregator().update(results(100))
+    parts += Aggregator().update(results(200, 100))
+    parts = Aggregator.from_dict(json.loads(json.dumps(parts.to_dict())))
+    assert parts.count == whole.count == 300
+    assert parts.min_game == whole.min_game
+    assert parts.max_game == whole.max_game
+    assert parts.by_max == whole.by_max
+    for name, stat in whole.stats.items():
+        assert parts.stats[name].hist.items() == stat.hist.items()
+        assert parts.stats[name].quantile(0.5) == stat.quantile(0.5)
+        assert parts.stats[name].mean == pytest.approx(stat.mean)
+    assert sum(row["games"] for row in whole.by_max.values()) == 300
+    assert all(len(row["seeds"]) == 10 for row in whole.by_max.values())
+
+    table = whole.table()
+    assert format_game(whole.max_game) in table
+    assert " 11/2048 " in table
+
+
+def test_stats_cli(tmp_path):
+    paths = list()
+    for index in range(3):
+        path = tmp_path / f'{index}.jsonl'
+        path.write_text("".join(json.dumps(r) + "\n"
+                                for r in results(50, 50 * index)))
+        paths.append(str(path))
+    want = Aggregator().update(results(150))
+    assert aggregate_files(paths, jobs=2).by_max == want.by_max
+
+    runner = CliRunner()
+    res = runner.invoke(main, ["stats", "--json"] + paths)
+    assert res.exit_code == 0, res.output
+    got = Aggregator.from_dict(json.loads(res.output))
+    assert got.max_game == want.max_game
+
+    res = runner.invoke(main, ["stats"], input=open(paths[0]).read())
+    assert res.exit_code == 0, res.output
+    assert res.output.startswith("50 games")
+
+
+def test_stats_cli_summaries(tmp_path):
+    runner = CliRunner()
+    summaries = list()
+    for index in range(2):
+        path = tmp_path / f'{index}.jsonl'
+        path.write_text("".join(json.dumps(r) + "\n"
+                                for r in results(50, 50 * index)))
+        res = runner.invoke(main, ["stats", "--json", str(path)])
+        assert res.exit_code == 0, res.output
+        summary = tmp_path / f'{index}.json'
+        summary.write_text(res.output)
+        summaries += ["--summary", str(summary)]
+    more = tmp_path / "more.jsonl"
+    more.write_text("".join(json.dumps(r) + "\n" for r in results(50, 100)))
+
+    res = runner.invoke(main, ["stats", "--json"] + summaries + [str(more)])
+    assert res.exit_code == 0, res.output
+    got = Aggregator.from_dict(json.loads(res.output))
+    want = Aggregator().update(results(150))
+    assert got.count == 150
+    assert got.by_max == want.by_max
+    assert got.max_game == want.max_game
+
+    res = runner.invoke(main, ["stats"] + summaries)
+    assert res.exit_code == 0, res.output
+    assert res.output.startswith("100 games")
+
+    res = runner.invoke(main, ["stats", "--accuracy", "0.05"] + summaries
+                        + [str(more)])
+    assert res.exit_code != 0
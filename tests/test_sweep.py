@@ -0,0 +1,102 @@
+import os
+import json
+import socket
+import pytest
+from click.testing import CliRunner
+from expony.sweep import Sweep
+from expony.autoplay import play
+from expony.cli import main
+
+
+def test_sweep(tmp_path):
+    path = str(tmp_path / "sweep")
+    swp = Sweep(path, start=10, stop=17, chunk=3, shape=(5,5))
+    assert swp.nchunks == 3
+    assert list(swp.seeds(2)) == [16]
+
+    # pretend an earlier run died after finishing chunk 1
+    assert swp.run_chunk(1) == 3
+    assert swp.missing() == [0, 2]
+    assert swp.run_chunk(1) == 0
+
+    # a dead process on this host left a claim on chunk 2
+    with open(swp.claim_path(2), "w") as fp:
+        json.dump(dict(host=socket.gethostname(), pid=2**22+1, time=0), fp)
+    # a live process on another host holds chunk 0
+    with open(swp.claim_path(0), "w") as fp:
+        json.dump(dict(host="elsewhere", pid=1, time=0), fp)
+
+    swp = Sweep(path)
+    assert swp.run(jobs=1) == 1
+    assert swp.missing() == [0]
+
+    swp.stale = -1
+    assert swp.run(jobs=2) == 3
+    assert swp.missing() == []
+    assert not os.listdir(swp.claims_dir)
+
+    got = list(swp.results())
+    assert [r["seed"] for r in got] == list(range(10, 17))
+    assert got[3]["score"] == play(13, (5,5))["score"]
+
+    with pytest.raises(ValueError):
+        Sweep(path, start=0, stop=17, chunk=3, shape=(5,5))
+    with pytest.raises(ValueError):
+        Sweep(str(tmp_path / "nothing"))
+
+
+def test_cli_sweep(tmp_path):
+    path = str(tmp_path / "sweep")
+    runner = CliRunner()
+    got = runner.invoke(main, ["sweep", path, "--stop", "4", "--chunk", "2",
+                               "--shape", "5x5"])
+    assert got.exit_code == 0, got.output
+    status = json.loads(got.stdout.splitlines()[-1])
+    assert status["done"] == 2
+    assert status["played"] == 4
+
+    got = runner.invoke(main, ["sweep", path])
+    assert got.exit_code == 0, got.output
+    assert json.loads(got.stdout.splitlines()[-1])["played"] == 0
+
+
+def test_sweep_heatmaps(tmp_path):
+    from expony.heatmap import play_games
+    path = str(tmp_path / "sweep")
+    swp = Sweep(path, start=0, stop=5, chunk=2, shape=(5,5), heatmaps=True)
+    assert swp.run(jobs=2) == 5
+    assert sorted(os.listdir(swp.done_dir)) == [
+        f'0000000{i}.{ext}' for i in range(3) for ext in ("jsonl", "npz")]
+    maps = swp.heatmaps()
+    want = play_games(range(5), (5,5))
+    assert maps.moves == want.moves == sum(r["moves"] for r in swp.results())
+    assert (maps["origins"] == want["origins"]).all()
+    assert Sweep(str(tmp_path / "plain"), stop=1, shape=(5,5)).heatmaps() is None
+
+
+def test_heartbeat(tmp_path, monkeypatch):
+    import time
+    import threading
+    from expony import sweep
+
+    def slow_play(seed, shape, strategy):
+        time.sleep(0.2)
+        return dict(seed=seed)
+    monkeypatch.setattr(sweep, "play", slow_play)
+    monkeypatch.setattr(sweep.socket, "gethostname", lambda: "here")
+    path = str(tmp_path / "sweep")
+    swp = Sweep(path, stop=5, chunk=5, shape=(5,5), stale=0.3)
+    worker = threading.Thread(target=swp.run_chunk, args=(0,))
+    worker.start()
+    while not os.path.exists(swp.claim_path(0)):
+        time.sleep(0.01)
+
+    # another host sees the claim outlive the stale time but kept fresh
+    monkeypatch.setattr(sweep.socket, "gethostname", lambda: "elsewhere")
+    other = Sweep(path, stale=0.3)
+    for _ in range(4):
+        time.sleep(0.15)
+        assert not other.claim(0)
+    worker.join()
+    assert other.missing() == []
+    assert [r["seed"] for r in other.results()] == list(range(5))
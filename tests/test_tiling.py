@@ -3,6 +3,8 @@ import pytest
 from expony.tiling import (
     Tiling,
     fresh_values,
+    FreshStream,
+    philox,
 )
 import random
 
@@ -22,3 +24,48 @@ def test_rands():
     for want, have in zip(wants, fresh):
         assert want == have
         assert have >= 1 and have <= 4
+
+
+def test_philox_kat():
+    # Known answers from the Random123 distribution.
+    got = philox(([0],[0],[0],[0]), (0,0))
+    assert [int(w[0]) for w in got] == [0x6627e8d5, 0xe169c58d,
+                                        0xbc57ac4c, 0x9b00dbd8]
+    f = 0xffffffff
+    got = philox(([f],[f],[f],[f]), (f,f))
+    assert [int(w[0]) for w in got] == [0x408f276d, 0x41c83b0e,
+                                        0xa20bc7c6, 0x6d5451fd]
+
+
+def test_fresh_stream():
+    fs = FreshStream(12345)
+    gots = [next(fs) for n in range(1000)]
+    assert fs.index == 1000
+    assert set(gots) == {1, 2, 3, 4}
+
+    # blocks and random access agree with iteration
+    assert list(FreshStream(12345).block(1000)) == gots
+    assert fs[567] == gots[567]
+    fs.seek(300)
+    assert next(fs) == gots[300]
+    clone = fs.clone()
+    assert [next(clone) for n in range(10)] == gots[301:311]
+
+    kids = fs.split(3)
+    assert len(set(k.stream for k in kids)) == 3
+    seqs = [list(k.block(50)) for k in kids]
+    assert seqs[0] != seqs[1] and seqs[1] != seqs[2]
+    assert [k.stream for k in fs.split(3)] == [k.stream for k in kids]
+
+
+def test_fresh_stream_arr():
+    from expony.arr import Board
+    b1 = Board(8, fresh=FreshStream(42))
+    b2 = Board(8, fresh=FreshStream(42))
+    assert (b1.tiles == b2.tiles).all()
+    assert b1.random_seed == 42
+    for b in (b1, b2):
+        while move := b.automove_hint():
+            b.maybe_swap(*move)
+    assert (b1.tiles == b2.tiles).all()
+    assert b1.fresh.index == b2.fresh.index
@@ -0,0 +1,59 @@
+import json
+from expony import arr, instrument
+from expony.trace import Tracer
+
+
+def test_trace_game(tmp_path):
+    orig = arr.Board.maybe_swap
+    tracer = Tracer()
+    with tracer:
+        board = arr.Board(5, random_seed=3)
+        with tracer.span("game", seed=3):
+            while move := board.automove_hint():
+                board.maybe_swap(*move)
+    assert arr.Board.maybe_swap is orig
+
+    path = tmp_path / "trace.json"
+    tracer.save(path)
+    got = json.loads(path.read_text())
+    events = got["traceEvents"]
+    names = set(e["name"] for e in events)
+    assert {"hint", "swap", "match", "gravity", "game"} <= names
+    for e in events:
+        assert e["ph"] == "X"
+        assert e["dur"] >= 0
+    game = [e for e in events if e["name"] == "game"][0]
+    assert game["args"] == dict(seed=3)
+    assert got["otherData"]["dropped"] == 0
+
+
+def test_ring_buffer():
+    tracer = Tracer(capacity=10)
+    for n in range(25):
+        with tracer.span("s", n=n):
+            pass
+    assert len(tracer.events) == 10
+    assert tracer.dropped == 15
+    assert tracer.events[0]["args"]["n"] == 15
+
+
+def test_with_instrument():
+    orig = arr.Board.maybe_swap
+    for tracer_first in (True, False):
+        counters = instrument.enable()
+        tracer = Tracer().attach()
+        board = arr.Board((6,6), random_seed=3)
+        board.maybe_swap(*board.automove_hint())
+        assert counters.moves == 1
+        assert any(e["name"] == "swap" for e in tracer.events)
+        if tracer_first:
+            tracer.detach()
+            instrument.disable()
+        else:
+            instrument.disable()
+            nspans = tracer.nspans
+            board.maybe_swap(*board.automove_hint())
+            assert tracer.nspans > nspans
+            tracer.detach()
+        assert arr.Board.maybe_swap is orig
+        board.maybe_swap(*board.automove_hint())
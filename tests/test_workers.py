@@ -0,0 +1,119 @@
+import os
+import stat
+import threading
+import multiprocessing
+import numpy
+import pytest
+from click.testing import CliRunner
+from multiprocessing.connection import Client as Connection
+from expony.workers import (Server, Client, connect, hint_job, moves_job,
+                            key_path, runtime_dir)
+from expony.autoplay import play
+from expony.arr import Board
+from expony.cli import main
+
+
+@pytest.fixture
+def server(tmp_path):
+    address = str(tmp_path / "workers.sock")
+    srv = Server(address, jobs=2).start()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_jobs():
+    board = Board((6,6), random_seed=2)
+    hint = hint_job(board.tiles)
+    assert hint == [tuple(map(int, p)) for p in board.automove_hint()]
+    moves = moves_job(board.tiles)
+    assert [m["seed"] for m in moves][0] == hint[0]
+
+
+def test_server(server):
+    with Client(server.address) as client:
+        assert client.ping() == 2
+        got = client.autoplay(range(3), (5,5))
+        assert [g["seed"] for g in got] == [0, 1, 2]
+        assert got[1]["score"] == play(1, (5,5))["score"]
+
+        boards = [Board((6,6), random_seed=s) for s in range(4)]
+        hints = client.hint([b.tiles for b in boards])
+        assert hints == [hint_job(b.tiles) for b in boards]
+
+        with pytest.raises(RuntimeError):
+            client.submit("nope", [()])
+        # still usable after an error
+        assert client.moves([boards[0].tiles]) == [moves_job(boards[0].tiles)]
+
+
+def test_cli_server(server):
+    runner = CliRunner()
+    got = runner.invoke(main, ["autoplay", "--server", "--address", server.address,
+                               "--games", "2", "--shape", "5x5"])
+    assert got.exit_code == 0, got.output
+    assert len(got.output.splitlines()) == 2
+
+
+def test_connect_none(tmp_path):
+    assert connect(str(tmp_path / "none.sock")) is None
+
+
+def test_private(server):
+    for path in (server.address, key_path(server.address)):
+        assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+    with pytest.raises(multiprocessing.AuthenticationError):
+        Connection(server.address, family="AF_UNIX", authkey=b"guess")
+    # still serving the rightful user
+    with Client(server.address) as client:
+        assert client.ping() == 2
+
+
+def test_runtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    path = runtime_dir()
+    assert path == str(tmp_path / "expony")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+    os.chmod(path, 0o755)
+    with pytest.raises(PermissionError):
+        runtime_dir()
+
+
+def test_sweep_server(server, tmp_path):
+    from expony.sweep import Sweep
+    swp = Sweep(str(tmp_path / "swp"), 0, 4, 2, (5,5))
+    with Client(server.address) as client:
+        assert swp.run(client=client) == 4
+    got = list(swp.results())
+    assert [g["score"] for g in got] == [play(s, (5,5))["score"] for s in range(4)]
+
+    maps = Sweep(str(tmp_path / "maps"), 0, 2, 2, (5,5), heatmaps=True)
+    with Client(server.address) as client, pytest.raises(ValueError):
+        maps.run(client=client)
+
+
+def test_connect_insecure(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    os.chmod(runtime_dir(), 0o755)
+    assert connect() is None
+    got = CliRunner().invoke(main, ["autoplay", "--server", "--games", "1"])
+    assert got.exit_code == 1
+    assert "no usable worker service" in got.output
+
+
+def test_iautoplay(server):
+    def scores(results):
+        return [(r["seed"], r["score"]) for r in results]
+
+    with Client(server.address) as client:
+        want = scores(client.autoplay(range(7), (5,5)))
+        assert scores(client.iautoplay(range(7), (5,5), batch=2)) == want
+        assert scores(client.iautoplay(range(7), (5,5))) == want
+        games = client.iautoplay(range(7), (5,5), batch=2)
+        assert scores([next(games)]) == want[:1]
+        games.close()
+        # still in step after stopping early
+        assert client.ping() == 2